@@ -1,36 +1,144 @@
-pip install fastapi uvicorn gitpython
-
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List
-import git
 import os
-import subprocess
+import sys
+import json
+import asyncio
+
+from jobs import JobManager, QueueFull, run_command
+from repo_cache import RepoCache
+from llm_cache import DEFAULT_CACHE_PATH as LLM_CACHE_PATH
+from java_structure import STRUCTURE_CACHE_DIR
+from build_deps import DEPS_CACHE_DIR
 
 app = FastAPI()
 
+# Documentation runs are queued as background jobs: the request returns a job id straight away,
+# and a bounded worker pool checks out and documents each repository in its own working directory.
+job_manager = JobManager()
+generate_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate_docs.py")
+sse_poll_interval = 0.5  # Seconds between checks for new progress events
+
+# Repositories are mirrored once per URL and each job checks out a worktree from the mirror,
+# limited to the files its sections read; a section not listed here gets a full checkout
+repo_cache = RepoCache()
+source_globs = ["*.java", "pom.xml", "build.gradle", "build.gradle.kts", "README*"]
+config_globs = ["*.properties", "*.yml", "*.yaml", "*.xml", "Dockerfile", "docker-compose*"]
+section_globs = {
+    "Overview": source_globs,
+    "Getting Started": source_globs + config_globs,
+    "Code Structure Overview": source_globs,
+    "Key Code Components": source_globs,
+    "Functions and API Documentation": source_globs,
+    "Error Handling and Logging": source_globs + config_globs,
+    "Dependencies": source_globs,
+    "Configuration": source_globs + config_globs,
+    "Performance Considerations": source_globs + config_globs,
+    "Security Considerations": source_globs + config_globs,
+}
+
+def checkout_patterns(sections):
+    """Union of the file globs the sections need, or None when any of them needs the whole tree."""
+    if not sections or any(section not in section_globs for section in sections):
+        return None
+    return sorted({glob for section in sections for glob in section_globs[section]})
+
+def cache_env(repo_url):
+    """Absolute cache locations for the generator, so jobs share them instead of starting empty in
+    their own output directory; per-repository caches are named after the repository's mirror."""
+    name = os.path.basename(repo_cache.mirror_path(repo_url)).removesuffix(".git") + ".json"
+    return {
+        "LLM_CACHE_PATH": os.path.abspath(LLM_CACHE_PATH),
+        "JAVA_STRUCTURE_CACHE_PATH": os.path.abspath(os.path.join(STRUCTURE_CACHE_DIR, name)),
+        "BUILD_DEPS_CACHE_PATH": os.path.abspath(os.path.join(DEPS_CACHE_DIR, name)),
+    }
+
 class DocumentationRequest(BaseModel):
     repo_link: str
     sections: List[str]
 
-@app.post("/generate-documentation")
+def run_documentation_job(job):
+    # Check out the repository from the shared mirror into the job's own directory
+    repo_url = job.params["repo_link"]
+    patterns = checkout_patterns(job.params["sections"])
+    job.update(stage="fetching", message=f"updating mirror of {repo_url}")
+    repo_cache.update(repo_url)
+    job.update(stage="checkout", message=f"checking out {', '.join(patterns) if patterns else 'all files'}")
+    with repo_cache.checkout(repo_url, os.path.join(job.workdir, "repo"), patterns=patterns) as repo_path:
+        # Generate documentation based on selected sections; outputs land in the job's directory
+        output_dir = os.path.join(job.workdir, "output")
+        os.makedirs(output_dir, exist_ok=True)
+        selected_sections = " ".join(job.params["sections"])
+        run_command(job, [sys.executable, generate_script, repo_path, selected_sections], "generating",
+                    cwd=output_dir, env=cache_env(repo_url))
+
+    files = sorted(os.path.relpath(os.path.join(root, name), output_dir)
+                   for root, _, names in os.walk(output_dir) for name in names)
+    return {"files": files}
+
+def get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/generate-documentation", status_code=202)
 async def generate_documentation(request: DocumentationRequest):
     try:
-        # Clone the GitHub repository
-        repo_path = "/tmp/repo"
-        if os.path.exists(repo_path):
-            subprocess.run(["rm", "-rf", repo_path])  # Clean up old clone if exists
-        git.Repo.clone_from(request.repo_link, repo_path)
+        job = job_manager.submit(run_documentation_job, {"repo_link": request.repo_link, "sections": request.sections})
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.id, "status": job.status,
+            "status_url": f"/jobs/{job.id}", "events_url": f"/jobs/{job.id}/events"}
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown()
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/progress")
+async def get_job_progress(job_id: str, since: int = 0):
+    job = get_job_or_404(job_id)
+    return {**job.to_dict(), "events": job.events_since(since)}
 
-        # Generate documentation based on selected sections
-        # Here you could call your existing script and pass the selected sections.
-        # Assuming the script is named `generate_docs.py` and accepts args.
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = get_job_or_404(job_id)
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.error is not None:
+        raise HTTPException(status_code=500, detail=job.error)
+    return {"job_id": job.id, **job.result}
 
-        selected_sections = " ".join(request.sections)
-        subprocess.run(["python", "generate_docs.py", repo_path, selected_sections])
+@app.get("/jobs/{job_id}/files/{file_path:path}")
+async def get_job_file(job_id: str, file_path: str):
+    job = get_job_or_404(job_id)
+    if not job.done or job.result is None or file_path not in job.result["files"]:
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(os.path.join(job.workdir, "output", file_path))
 
-        return {"message": "Documentation generated successfully."}
+# Server-sent events: replays the job's events, then follows new ones until the job finishes
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    job = get_job_or_404(job_id)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async def event_stream():
+        seen = 0
+        while True:
+            done = job.done
+            events = job.events_since(seen)
+            seen += len(events)
+            for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+            if done:
+                yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            await asyncio.sleep(sse_poll_interval)
 
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,124 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+import concurrent.futures
+
+from java_splitter import split_java
+from source_loader import get_splitter, iter_chunk_batches, iter_source_files
+
+# Benchmark: chunks/sec of RecursiveCharacterTextSplitter and the Java-aware splitter, on one core and
+# across a process pool, on a synthetic Java tree. source_loader.CHUNK_SPLITTER picks between them.
+
+METHOD_TEMPLATE = '''
+    /**
+     * Handles {name} for the given request.
+     */
+    public {ret} {name}(String id, int count) {{
+        if (count > {n}) {{
+            log.info("processing {{}} for {name}", id);
+            for (int i = 0; i < count; i++) {{
+                items.add(id + "-" + i);
+            }}
+        }}
+        return {value};
+    }}
+'''
+
+
+def generate_java_file(package: str, class_name: str, methods: int) -> str:
+    body = []
+    for m in range(methods):
+        ret, value = random.choice([("int", "count"), ("String", "id"), ("boolean", "items.isEmpty()")])
+        body.append(METHOD_TEMPLATE.format(name=f"handle{m}", ret=ret, n=m, value=value))
+    return (f"package {package};\n\nimport java.util.List;\nimport java.util.ArrayList;\n\n"
+            f"public class {class_name} {{\n    private final List<String> items = new ArrayList<>();\n"
+            + "".join(body) + "}\n")
+
+
+def generate_tree(root: str, files: int) -> None:
+    """Writes a synthetic Java source tree with `files` classes spread over packages."""
+    random.seed(42)
+    for i in range(files):
+        package = f"com.example.module{i % 50}.sub{i % 7}"
+        directory = os.path.join(root, "src", "main", "java", *package.split("."))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"Class{i}.java"), "w", encoding="utf-8") as f:
+            f.write(generate_java_file(package, f"Class{i}", random.randint(3, 25)))
+
+
+def bench_recursive_threads(file_paths, chunk_size, chunk_overlap):
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def load(file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return splitter.split_text(f.read())
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        return sum(len(chunks) for chunks in executor.map(load, file_paths))
+
+
+def bench_java_single(file_paths, chunk_size, chunk_overlap):
+    total = 0
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            total += len(split_java(f.read(), chunk_size, chunk_overlap))
+    return total
+
+
+def bench_recursive_single(file_paths, chunk_size, chunk_overlap):
+    split = get_splitter("recursive", chunk_size, chunk_overlap)
+    total = 0
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            total += len(split(f.read()))
+    return total
+
+
+def bench_processes(splitter):
+    def bench(file_paths, chunk_size, chunk_overlap):
+        return sum(len(chunks) for batch in iter_chunk_batches(file_paths, chunk_size, chunk_overlap, splitter=splitter)
+                   for _, chunks in batch)
+    return bench
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare chunking throughput on a synthetic Java tree")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_tree(root, args.files)
+        file_paths = list(iter_source_files(root))
+        megabytes = sum(os.path.getsize(path) for path in file_paths) / 1e6
+        print(f"{len(file_paths)} files ({megabytes:.1f} MB), {os.cpu_count()} CPUs")
+
+        benchmarks = [
+            ("RecursiveCharacterTextSplitter (threads)", bench_recursive_threads),
+            ("RecursiveCharacterTextSplitter (single process)", bench_recursive_single),
+            ("RecursiveCharacterTextSplitter (process pool)", bench_processes("recursive")),
+            ("split_java (single process)", bench_java_single),
+            ("split_java (process pool)", bench_processes("java")),
+        ]
+        for name, bench in benchmarks:
+            start = time.perf_counter()
+            try:
+                chunks = bench(file_paths, args.chunk_size, args.chunk_overlap)
+            except ImportError as e:
+                print(f"{name:50s} skipped ({e})")
+                continue
+            elapsed = time.perf_counter() - start
+            # The splitters cut differently, so MB/s is the like-for-like column
+            print(f"{name:50s} {chunks:8d} chunks {elapsed:7.2f}s {chunks / elapsed:10.0f} chunks/sec "
+                  f"{megabytes / elapsed:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import re
+import time
+import random
+import argparse
+import tempfile
+
+from bench_chunking import METHOD_TEMPLATE
+from java_structure import StructureCache, extract_files, extract_structure
+from source_loader import iter_source_files
+
+# Benchmark: the regex path genaihack.txt.txt used (class regex, then a method and docstring scan of
+# the whole file for every class found) versus the single-pass extractor, cold, on a process pool
+# and from a warm hash cache, on a synthetic Java tree with nested classes.
+#
+# Measured on one CPU, 500 / 2000 files:
+#   legacy regex path            0.76s / 3.31s
+#   single pass, one process     0.58s / 2.53s  (1.3x; the legacy path also gives every class
+#                                                 the methods of all classes in its file)
+#   process pool                 0.60s / 2.48s  (falls back to one process on one CPU)
+#   cold cache                   0.63s / 2.50s  (single pass plus writing the cache)
+#   warm cache                   0.12s / 0.86s  (6x / 4x)
+# Cold parsing is only modestly faster; the big gain is rerunning over unchanged files.
+
+
+def legacy_extract_methods(content):
+    method_info = []
+    method_pattern = re.compile(r'public\s+[\w<>\[\]]+\s+(\w+)\s*\(([^)]*)\)\s*({|//|/\*)', re.DOTALL)
+    for method in method_pattern.findall(content):
+        params = [param.strip() for param in method[1].split(',') if param.strip()]
+        method_info.append({'name': method[0], 'params': params,
+                            'docstring': legacy_extract_docstring(content, method[0])})
+    return method_info
+
+
+def legacy_extract_docstring(content, identifier):
+    docstring_pattern = re.compile(r'(?:/\*{2}|//\s?\*{1,2})\s*(.*)', re.DOTALL)
+    match = docstring_pattern.search(content)
+    return match.group(1).strip().replace('\n', ' ').strip() if match else "No docstring available"
+
+
+def bench_legacy(file_paths):
+    classes = []
+    for file_path in file_paths:
+        with open(file_path, 'r', encoding="utf-8") as f:
+            content = f.read()
+        for class_name in re.findall(r'class (\w+)', content):
+            classes.append({'name': class_name, 'docstring': legacy_extract_docstring(content, class_name),
+                            'methods': legacy_extract_methods(content)})
+    return classes
+
+
+def bench_single(file_paths):
+    types = []
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            types.extend(extract_structure(f.read())["types"])
+    return types
+
+
+def bench_pool(file_paths):
+    return [t for structure in extract_files(file_paths).values() for t in structure["types"]]
+
+
+def bench_cached(file_paths, cache_path):
+    cache = StructureCache(cache_path)
+    types = [t for structure in extract_files(file_paths, cache).values() for t in structure["types"]]
+    cache.save()
+    return types
+
+
+def generate_tree(root: str, files: int, nested: int) -> None:
+    """Writes `files` classes, each with up to `nested` nested classes, spread over packages."""
+    random.seed(42)
+    for i in range(files):
+        package = f"com.example.module{i % 50}"
+        directory = os.path.join(root, *package.split("."))
+        os.makedirs(directory, exist_ok=True)
+        parts = [f"package {package};\n\nimport java.util.List;\n\n/**\n * Class {i}.\n */\npublic class Class{i} {{\n"
+                 "    private final List<String> items = new java.util.ArrayList<>();\n"]
+        for n in range(random.randint(0, nested)):
+            parts.append(f"    /** Nested {n}. */\n    public static class Nested{n} {{\n    private List<String> items;\n")
+            parts.extend(METHOD_TEMPLATE.format(name=f"nested{n}_{m}", ret="int", n=m, value="count")
+                         for m in range(random.randint(1, 5)))
+            parts.append("    }\n")
+        parts.extend(METHOD_TEMPLATE.format(name=f"handle{m}", ret="String", n=m, value="id")
+                     for m in range(random.randint(3, 15)))
+        parts.append("}\n")
+        with open(os.path.join(directory, f"Class{i}.java"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Java structure extraction on a synthetic tree")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--nested", type=int, default=6, help="Maximum nested classes per file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_tree(root, args.files, args.nested)
+        file_paths = list(iter_source_files(root))
+        cache_path = os.path.join(root, "structure_cache.json")
+        print(f"{len(file_paths)} files, {os.cpu_count()} CPUs")
+
+        benchmarks = [
+            ("regex per class (legacy)", bench_legacy),
+            ("extract_structure (single process)", bench_single),
+            ("extract_files (process pool)", bench_pool),
+            ("extract_files (cold cache)", lambda paths: bench_cached(paths, cache_path)),
+            ("extract_files (warm cache)", lambda paths: bench_cached(paths, cache_path)),
+        ]
+        for name, bench in benchmarks:
+            start = time.perf_counter()
+            types = bench(file_paths)
+            elapsed = time.perf_counter() - start
+            methods = sum(len(t["methods"]) for t in types)
+            print(f"{name:40s} {len(types):7d} classes {methods:9d} methods {elapsed:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
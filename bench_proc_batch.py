@@ -0,0 +1,98 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from parse_storedproc import parse_stored_procedure
+from proc_batch import analyze_procedure, analyze_to_jsonl, iter_procedures
+
+# Benchmark: procedures/sec of the one-at-a-time path (reformat, then parse) versus the batch
+# engine without reformatting, single process and across a process pool, on a synthetic dump.
+
+STATEMENTS = [
+    "SELECT @{v} = COUNT(*) FROM {t} WHERE Column{n} = @{w}",
+    "INSERT INTO {t} (Column1, Column2) SELECT Column1, @{v} FROM {u} WHERE Column3 > @{w}",
+    "UPDATE {t} SET Column{n} = @{v} WHERE Column1 IN (SELECT Column1 FROM {u} WHERE Column2 = @{w})",
+    "DELETE FROM {t} WHERE Column{n} < @{v}",
+    "EXEC {p} @{v}, @{w}",
+    "SET @{v} = @{w} + {n}",
+]
+
+
+def generate_procedure(index: int, procedures: int) -> str:
+    variables = [f"var{i}" for i in range(random.randint(3, 30))]
+    lines = [f"create procedure dbo.proc_{index}", "    @in_id int,", "    @in_name varchar(50)", "as", "begin"]
+    lines.extend(f"    declare @{v} int" for v in variables)
+    for _ in range(random.randint(5, 40)):
+        statement = random.choice(STATEMENTS).format(
+            v=random.choice(variables), w=random.choice(variables), n=random.randint(1, 9),
+            t=f"Table{random.randint(1, 200)}", u=f"Table{random.randint(1, 200)}",
+            p=f"dbo.proc_{random.randrange(procedures)}")
+        if random.random() < 0.2:
+            lines.append(f"    while @{random.choice(variables)} < {random.randint(1, 100)}")
+            lines.append("    begin")
+            lines.append(f"        {statement}")
+            lines.append(f"        set @{variables[0]} = @{variables[0]} + 1")
+            lines.append("    end")
+        elif random.random() < 0.3:
+            lines.append(f"    if @{random.choice(variables)} = {random.randint(0, 5)}")
+            lines.append(f"        {statement}")
+        else:
+            lines.append(f"    {statement}")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def generate_dump(path: str, procedures: int) -> None:
+    """Writes a Sybase-style dump: print / create procedure / grant batches separated by go."""
+    random.seed(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(procedures):
+            f.write(f"print '<<<<< CREATING Stored Procedure - \"dbo.proc_{i}\" >>>>>'\ngo\n\n")
+            f.write(generate_procedure(i, procedures))
+            f.write(f"go\ngrant execute on dbo.proc_{i} to public\ngo\n\n")
+
+
+def bench_reformat_single(dump_path, workers):
+    count = 0
+    for procedure in iter_procedures([dump_path]):
+        parse_stored_procedure(procedure["sql"])
+        count += 1
+    return count
+
+
+def bench_batch_single(dump_path, workers):
+    return sum(1 for procedure in iter_procedures([dump_path]) if analyze_procedure(procedure))
+
+
+def bench_batch_pool(dump_path, workers):
+    with tempfile.NamedTemporaryFile(suffix=".jsonl") as output:
+        return analyze_to_jsonl([dump_path], output.name, workers)["procedures"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stored procedure analysis throughput on a synthetic dump")
+    parser.add_argument("--procedures", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        dump_path = os.path.join(root, "schema.sql")
+        generate_dump(dump_path, args.procedures)
+        print(f"{args.procedures} procedures, {os.path.getsize(dump_path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+        benchmarks = [
+            ("parse_stored_procedure (reformat)", bench_reformat_single),
+            ("analyze_procedure (single process)", bench_batch_single),
+            ("analyze_to_jsonl (process pool)", bench_batch_pool),
+        ]
+        for name, bench in benchmarks:
+            start = time.perf_counter()
+            count = bench(dump_path, args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{name:40s} {count:7d} procedures {elapsed:7.2f}s {count / elapsed:8.1f} procedures/sec")
+
+
+if __name__ == "__main__":
+    main()
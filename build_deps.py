@@ -0,0 +1,468 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import functools
+import subprocess
+import concurrent.futures
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from java_index import MIN_FILES_FOR_POOL, index_path_for
+from source_loader import bounded_map
+
+# Dependencies of Maven and Gradle projects, read from the build files themselves instead of by
+# starting the build tool. Every pom.xml / build.gradle(.kts) under the project is parsed (on a
+# process pool when there are many, since XML and regex parsing hold the GIL), Maven properties,
+# parents and dependencyManagement are resolved inside the project, and the result is cached under a
+# key made of the hashes of all build files. Each project has its own cache file in a cache
+# directory (see cache_path_for), so alternating between projects does not evict their results.
+# The build tool only runs when asked to, only when that key changed, and only in offline mode.
+# Build files that cannot be read or parsed (e.g. broken pom.xml fixtures under test resources) are
+# skipped and listed in the result instead of failing the whole project.
+
+DEPS_CACHE_DIR = os.environ.get("BUILD_DEPS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "build-deps-cache"))
+DEPS_CACHE_PATH = os.environ.get("BUILD_DEPS_CACHE_PATH")  # Overrides the per-project path
+DEPS_CACHE_VERSION = 2
+BUILD_TOOL_TIMEOUT_SECONDS = int(os.environ.get("BUILD_TOOL_TIMEOUT_SECONDS", "600"))
+
+MAVEN_FILES = ("pom.xml",)
+GRADLE_FILES = ("build.gradle", "build.gradle.kts")
+GRADLE_SETTINGS_FILES = ("settings.gradle", "settings.gradle.kts", "gradle.properties")
+SKIPPED_DIRS = {"target", "build", "out", "node_modules", ".gradle", ".mvn", ".idea"}
+
+_MAVEN_PROPERTY = re.compile(r"\$\{([^}]+)\}")
+_GRADLE_DEPENDENCY = re.compile(
+    r"""^\s*(?P<configuration>\w+)\s*\(?\s*(?:(?:enforced)?[pP]latform\s*\(\s*)?(?P<quote>['"])(?P<notation>[^'"\s]+:[^'"\s]+)(?P=quote)""",
+    re.M)
+_GRADLE_MAP_DEPENDENCY = re.compile(
+    r"""^\s*(?P<configuration>\w+)\s*\(?\s*group\s*[:=]\s*['"](?P<group>[^'"]+)['"]\s*,\s*name\s*[:=]\s*['"](?P<name>[^'"]+)['"]"""
+    r"""(?:\s*,\s*version\s*[:=]\s*['"](?P<version>[^'"]+)['"])?""", re.M)
+_GRADLE_PROJECT_DEPENDENCY = re.compile(
+    r"""^\s*(?P<configuration>\w+)\s*\(?\s*project\s*\(\s*(?:path\s*[:=]\s*)?['"](?P<project>[^'"]+)['"]""", re.M)
+_GRADLE_VARIABLE = re.compile(r"""(?:^|[{;])\s*(?:(?:def|val|var|ext\.|extra\[)\s*)?['"]?(\w+)['"]?\]?\s*=\s*['"]([^'"$]*)['"]""", re.M)
+_GRADLE_INTERPOLATION = re.compile(r"\$\{?([\w.]+)\}?")
+_GRADLE_INCLUDE = re.compile(r"^\s*include\b(.*)$", re.M)
+_QUOTED = re.compile(r"""['"]([^'"]+)['"]""")
+_SKIPPED_CONFIGURATIONS = {"classpath", "id", "version", "group", "exclude", "because"}
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def find_build_files(project_dir: str) -> List[str]:
+    """Relative paths of every Maven/Gradle build, settings and properties file under project_dir."""
+    names = MAVEN_FILES + GRADLE_FILES + GRADLE_SETTINGS_FILES
+    found = []
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS and not d.startswith("."))
+        for file in sorted(files):
+            if file in names:
+                found.append(os.path.relpath(os.path.join(root, file), project_dir))
+    return found
+
+
+def coordinate(dependency: Dict) -> str:
+    """group:artifact[:version] of a parsed dependency (project dependencies as project(:path))."""
+    if dependency.get("project"):
+        return f"project({dependency['project']})"
+    parts = [dependency["group"], dependency["artifact"]]
+    if dependency.get("version"):
+        parts.append(dependency["version"])
+    return ":".join(parts)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(element: Optional[ET.Element], name: str) -> Optional[ET.Element]:
+    if element is None:
+        return None
+    for child in element:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _children(element: Optional[ET.Element], name: str) -> List[ET.Element]:
+    child = _child(element, name)
+    return list(child) if child is not None else []
+
+
+def _text(element: Optional[ET.Element], name: str) -> Optional[str]:
+    child = _child(element, name)
+    return child.text.strip() if child is not None and child.text else None
+
+
+def _maven_dependencies(container: Optional[ET.Element]) -> List[Dict]:
+    dependencies = []
+    for dependency in _children(container, "dependencies"):
+        if _local(dependency.tag) != "dependency":
+            continue
+        dependencies.append({
+            "group": _text(dependency, "groupId"),
+            "artifact": _text(dependency, "artifactId"),
+            "version": _text(dependency, "version"),
+            "scope": _text(dependency, "scope") or "compile",
+            "type": _text(dependency, "type"),
+            "optional": _text(dependency, "optional") == "true",
+        })
+    return dependencies
+
+
+def parse_pom(pom_path: str) -> Dict:
+    """Coordinates, parent, modules, properties, dependencies and dependencyManagement of one pom.xml.
+
+    Values are returned as written; ${...} references are resolved by resolve_maven_modules.
+    """
+    root = ET.parse(pom_path).getroot()
+    parent = _child(root, "parent")
+    properties = {_local(child.tag): (child.text or "").strip() for child in _children(root, "properties")}
+    return {
+        "build_tool": "maven",
+        "group": _text(root, "groupId") or _text(parent, "groupId"),
+        "artifact": _text(root, "artifactId"),
+        "version": _text(root, "version") or _text(parent, "version"),
+        "packaging": _text(root, "packaging") or "jar",
+        "parent": None if parent is None else {
+            "group": _text(parent, "groupId"),
+            "artifact": _text(parent, "artifactId"),
+            "version": _text(parent, "version"),
+            "relative_path": _text(parent, "relativePath") or "../pom.xml",
+        },
+        "modules": [module.text.strip() for module in _children(root, "modules") if module.text],
+        "properties": properties,
+        "dependencies": _maven_dependencies(root),
+        "managed": _maven_dependencies(_child(root, "dependencyManagement")),
+    }
+
+
+def _interpolate(value: Optional[str], properties: Dict[str, str]) -> Optional[str]:
+    for _ in range(10):  # Properties may refer to other properties; bounded in case of cycles
+        if not value or "${" not in value:
+            return value
+        value = _MAVEN_PROPERTY.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+        if all(name not in properties for name in _MAVEN_PROPERTY.findall(value)):
+            return value
+    return value
+
+
+def resolve_maven_modules(poms: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Resolves properties and managed versions of parsed poms ({relative path: parse_pom result}).
+
+    Parents are looked up inside the project by relativePath and then by coordinates; parents outside
+    the project (e.g. spring-boot-starter-parent) contribute nothing, so versions they manage stay
+    empty.
+    """
+    by_coordinates = {(pom["group"], pom["artifact"]): path for path, pom in poms.items()}
+
+    def parent_path(path: str) -> Optional[str]:
+        parent = poms[path]["parent"]
+        if parent is None:
+            return None
+        candidate = os.path.normpath(os.path.join(os.path.dirname(path), parent["relative_path"]))
+        if not candidate.endswith("pom.xml"):
+            candidate = os.path.join(candidate, "pom.xml")
+        if candidate in poms:
+            return candidate
+        return by_coordinates.get((parent["group"], parent["artifact"]))
+
+    resolved = {}
+    for path, pom in poms.items():
+        chain = [path]
+        while len(chain) < 20:
+            parent = parent_path(chain[-1])
+            if parent is None or parent in chain:
+                break
+            chain.append(parent)
+        properties = {}
+        managed = {}
+        for ancestor in reversed(chain):  # Nearest definition wins
+            properties.update(poms[ancestor]["properties"])
+            for dependency in poms[ancestor]["managed"]:
+                managed[(dependency["group"], dependency["artifact"])] = dependency
+        builtins = {"groupId": pom["group"], "artifactId": pom["artifact"], "version": pom["version"]}
+        if pom["parent"]:
+            builtins.update({f"parent.{key}": pom["parent"][name] for key, name in
+                             (("groupId", "group"), ("artifactId", "artifact"), ("version", "version"))})
+        for key, value in builtins.items():
+            if value is not None:
+                properties.setdefault(f"project.{key}", value)
+                properties.setdefault(f"pom.{key}", value)
+        properties = {name: _interpolate(value, properties) for name, value in properties.items()}
+
+        dependencies = []
+        for dependency in pom["dependencies"]:
+            dependency = {key: _interpolate(value, properties) if isinstance(value, str) else value
+                          for key, value in dependency.items()}
+            managed_dependency = managed.get((dependency["group"], dependency["artifact"]))
+            if not dependency["version"] and managed_dependency:
+                dependency["version"] = _interpolate(managed_dependency["version"], properties)
+            dependencies.append(dependency)
+        resolved[path] = {
+            "build_tool": "maven",
+            "name": ":".join(filter(None, (_interpolate(pom["group"], properties), pom["artifact"]))),
+            "version": _interpolate(pom["version"], properties),
+            "packaging": pom["packaging"],
+            "modules": pom["modules"],
+            "dependencies": dependencies,
+        }
+    return resolved
+
+
+def read_gradle_properties(path: str) -> Dict[str, str]:
+    properties = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(("#", "!")) and ("=" in line or ":" in line):
+                key, _, value = line.partition("=") if "=" in line else line.partition(":")
+                properties[key.strip()] = value.strip()
+    return properties
+
+
+def parse_gradle_settings(settings_path: str) -> List[str]:
+    """Project paths (":core", ":services:api") included by a settings.gradle(.kts)."""
+    with open(settings_path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    included = []
+    for match in _GRADLE_INCLUDE.finditer(text):
+        included.extend(name if name.startswith(":") else f":{name}" for name in _QUOTED.findall(match.group(1)))
+    return included
+
+
+def parse_gradle(gradle_path: str) -> Dict:
+    """Declared dependencies and string variables of one build.gradle(.kts).
+
+    Dependencies are matched line by line in the common string, map and project() notations;
+    versions computed in code or supplied by plugins (e.g. Spring's dependency management) stay empty.
+    """
+    with open(gradle_path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    found = []  # (position, dependency), so dependencies keep their order in the file
+    for match in _GRADLE_DEPENDENCY.finditer(text):
+        if match.group("configuration") in _SKIPPED_CONFIGURATIONS:
+            continue
+        group, artifact, version = (match.group("notation").split(":") + [None, None])[:3]
+        found.append((match.start(), {"group": group, "artifact": artifact, "version": version,
+                                      "scope": match.group("configuration")}))
+    for match in _GRADLE_MAP_DEPENDENCY.finditer(text):
+        found.append((match.start(), {"group": match.group("group"), "artifact": match.group("name"),
+                                      "version": match.group("version"), "scope": match.group("configuration")}))
+    for match in _GRADLE_PROJECT_DEPENDENCY.finditer(text):
+        found.append((match.start(), {"project": match.group("project"), "scope": match.group("configuration")}))
+    return {
+        "build_tool": "gradle",
+        "variables": dict(_GRADLE_VARIABLE.findall(text)),
+        "dependencies": [dependency for _, dependency in sorted(found, key=lambda item: item[0])],
+    }
+
+
+def resolve_gradle_modules(builds: Dict[str, Dict], properties_files: Dict[str, Dict[str, str]],
+                           settings: Dict[str, List[str]]) -> Dict[str, Dict]:
+    """Interpolates $variables in parsed build.gradle files from their own, the root's and gradle.properties."""
+    root_build = next((path for path in builds if os.path.dirname(path) == ""), None)
+    root_variables = {}
+    for path in sorted(properties_files, key=lambda p: p.count(os.sep)):
+        if os.path.dirname(path) == "":
+            root_variables.update(properties_files[path])
+    if root_build:
+        root_variables.update(builds[root_build]["variables"])
+
+    def interpolate(value: Optional[str], variables: Dict[str, str]) -> Optional[str]:
+        if not value or "$" not in value:
+            return value
+        return _GRADLE_INTERPOLATION.sub(lambda m: variables.get(m.group(1).rsplit(".", 1)[-1], m.group(0)), value)
+
+    resolved = {}
+    for path, build in builds.items():
+        directory = os.path.dirname(path)
+        variables = dict(root_variables)
+        variables.update(properties_files.get(os.path.join(directory, "gradle.properties"), {}))
+        variables.update(build["variables"])
+        dependencies = [{key: interpolate(value, variables) for key, value in dependency.items()}
+                        for dependency in build["dependencies"]]
+        resolved[path] = {
+            "build_tool": "gradle",
+            "name": ":" + directory.replace(os.sep, ":") if directory else ":",
+            "version": variables.get("version"),
+            "modules": settings.get(os.path.join(directory, "settings.gradle"))
+                       or settings.get(os.path.join(directory, "settings.gradle.kts")) or [],
+            "dependencies": dependencies,
+        }
+    return resolved
+
+
+def _parse_build_file(project_dir: str, path: str):
+    full_path = os.path.join(project_dir, path)
+    name = os.path.basename(path)
+    if name in MAVEN_FILES:
+        return parse_pom(full_path)
+    if name in GRADLE_FILES:
+        return parse_gradle(full_path)
+    if name == "gradle.properties":
+        return read_gradle_properties(full_path)
+    return parse_gradle_settings(full_path)
+
+
+def _parse_cache_entry(project_dir: str, job: Tuple[str, str]) -> Dict:
+    """Cache entry of one build file; a broken file is recorded with its error and cached by hash like any other."""
+    path, file_hash = job
+    try:
+        return {"hash": file_hash, "parsed": _parse_build_file(project_dir, path), "error": None}
+    except (ET.ParseError, OSError) as e:
+        return {"hash": file_hash, "parsed": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def cache_path_for(project_dir: str, cache_dir: str = DEPS_CACHE_DIR) -> str:
+    """Returns the dependency cache file of a project (BUILD_DEPS_CACHE_PATH if set)."""
+    return DEPS_CACHE_PATH or index_path_for(project_dir, cache_dir)
+
+
+class DependencyCache:
+    """Per-file parse results keyed by file hash, and the last resolution keyed by all build-file hashes."""
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.data = {"version": DEPS_CACHE_VERSION, "files": {}, "resolved": None, "build_tool": None}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == DEPS_CACHE_VERSION:
+                self.data = data
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.data))
+        os.replace(tmp_path, self.cache_path)
+
+
+def build_files_key(file_hashes: Dict[str, str]) -> str:
+    digest = hashlib.sha1()
+    for path in sorted(file_hashes):
+        digest.update(f"{path}\0{file_hashes[path]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def run_build_tool(project_dir: str, build_tool: str, timeout: int = BUILD_TOOL_TIMEOUT_SECONDS) -> Tuple[bool, str]:
+    """Runs the project's dependency report in offline mode; returns (succeeded, output)."""
+    if build_tool == "gradle":
+        wrapper = os.path.join(project_dir, "gradlew")
+        executable = wrapper if os.access(wrapper, os.X_OK) else shutil.which("gradle")
+        command = [executable, "dependencies", "--configuration", "compileClasspath", "--offline", "-q"]
+    else:
+        wrapper = os.path.join(project_dir, "mvnw")
+        executable = wrapper if os.access(wrapper, os.X_OK) else shutil.which("mvn")
+        command = [executable, "--offline", "--batch-mode", "dependency:tree"]
+    if executable is None:
+        return False, f"{build_tool} is not installed"
+    try:
+        result = subprocess.run(command, cwd=project_dir, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return False, f"{' '.join(command)} timed out after {timeout}s"
+    return result.returncode == 0, result.stdout if result.returncode == 0 else result.stdout + result.stderr
+
+
+def resolve_dependencies(project_dir: str, cache: Optional[DependencyCache] = None,
+                         use_build_tool: bool = False, workers: Optional[int] = None) -> Dict:
+    """Dependencies of every module of a Maven or Gradle project.
+
+    Returns {"key", "modules": {build file: {"build_tool", "name", "version", "modules", "dependencies"}},
+    "dependencies": sorted unique coordinates, "skipped": {build file: error} for files that could not
+    be read or parsed, "build_tool_report": offline dependency report or None}.
+    With use_build_tool, the build tool runs only if some build file changed since its last report.
+    Without a cache, the project's own cache file (cache_path_for) is used. Changed build files are
+    parsed on a process pool when there are at least MIN_FILES_FOR_POOL of them and more than one
+    worker (by default, one per CPU), otherwise in this process.
+    """
+    cache = cache if cache is not None else DependencyCache(cache_path_for(project_dir))
+    paths = []
+    file_hashes = {}
+    unreadable = {}
+    for path in find_build_files(project_dir):
+        try:
+            file_hashes[path] = _hash_file(os.path.join(project_dir, path))
+            paths.append(path)
+        except OSError as e:
+            unreadable[path] = f"{type(e).__name__}: {e}"
+    # Unreadable files are part of the key, so the resolution is redone once they can be read
+    key = build_files_key({**file_hashes, **{path: "" for path in unreadable}})
+    resolved = cache.data["resolved"]
+    if resolved is None or resolved["key"] != key:
+        cached_files = cache.data["files"]
+        changed = [(path, file_hashes[path]) for path in paths
+                   if cached_files.get(path, {}).get("hash") != file_hashes[path]]
+        parse = functools.partial(_parse_cache_entry, project_dir)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(changed) < MIN_FILES_FOR_POOL:
+            entries = list(map(parse, changed))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                entries = list(bounded_map(parse, changed, max_in_flight=4 * workers, executor=executor))
+        for (path, _), entry in zip(changed, entries):
+            cached_files[path] = entry
+        cache.data["files"] = {path: cached_files[path] for path in paths}
+
+        skipped = dict(unreadable)
+        skipped.update((path, entry["error"]) for path, entry in cache.data["files"].items() if entry["error"])
+        for path, error in sorted(skipped.items()):
+            print(f"Skipping build file {path}: {error}")
+        parsed = {path: entry["parsed"] for path, entry in cache.data["files"].items() if not entry["error"]}
+        modules = resolve_maven_modules({p: v for p, v in parsed.items() if os.path.basename(p) in MAVEN_FILES})
+        modules.update(resolve_gradle_modules(
+            {p: v for p, v in parsed.items() if os.path.basename(p) in GRADLE_FILES},
+            {p: v for p, v in parsed.items() if os.path.basename(p) == "gradle.properties"},
+            {p: v for p, v in parsed.items() if os.path.basename(p).startswith("settings.gradle")}))
+        dependencies = sorted({coordinate(dependency) for module in modules.values()
+                               for dependency in module["dependencies"] if not dependency.get("project")})
+        resolved = {"key": key, "modules": modules, "dependencies": dependencies, "skipped": dict(sorted(skipped.items()))}
+        cache.data["resolved"] = resolved
+
+    report = None
+    if use_build_tool and resolved["modules"]:
+        build_tool_cache = cache.data["build_tool"]
+        if build_tool_cache and build_tool_cache["key"] == key:
+            # Unchanged build files: reuse the last report, or skip a run that already failed for them
+            report = build_tool_cache["report"]
+        else:
+            root_tools = [module["build_tool"] for path, module in resolved["modules"].items()
+                          if os.path.dirname(path) == ""]
+            build_tool = (root_tools or [next(iter(resolved["modules"].values()))["build_tool"]])[0]
+            succeeded, output = run_build_tool(project_dir, build_tool)
+            report = output if succeeded else None
+            cache.data["build_tool"] = {"key": key, "report": report}
+            if not succeeded:
+                print(f"Offline {build_tool} dependency report failed, using the parsed build files:\n{output[-2000:]}")
+    cache.save()
+    return {**resolved, "build_tool_report": report}
+
+
+def format_dependency_report(result: Dict) -> str:
+    """Plain-text dependency report per module, in the spirit of `gradle dependencies`.
+
+    Build files that were skipped are listed at the end, also after a build tool report.
+    """
+    lines = []
+    if result.get("build_tool_report"):
+        lines.append(result["build_tool_report"])
+    else:
+        for path in sorted(result["modules"]):
+            module = result["modules"][path]
+            lines.append(f"{module['name'] or path} ({module['build_tool']}, {path})")
+            for dependency in module["dependencies"]:
+                lines.append(f"  {dependency['scope']}: {coordinate(dependency)}")
+            lines.append("")
+    if result.get("skipped"):
+        lines.append("Skipped build files:")
+        lines.extend(f"  {path}: {error}" for path, error in result["skipped"].items())
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+import re
+import concurrent.futures
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dependency_graph import DependencyGraph
+from java_index import MIN_FILES_FOR_POOL, _TOKENS
+from java_structure import extract_structure
+from source_loader import batched, iter_source_files
+
+# Static class -> class and method -> method call graph for Java sources, and Mermaid diagrams
+# generated from it deterministically (same sources, same diagram). Resolution is best effort and
+# purely syntactic: a call's receiver is typed from field, parameter and local declarations in the
+# same file, simple type names are resolved through the file's package and imports, and
+# overloads are merged by method name. Calls that cannot be resolved to project code are dropped.
+
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "synchronized", "return", "new", "else", "do",
+                     "try", "throw", "case", "assert", "super", "this"}
+_VARIABLE = re.compile(r"\b([A-Z][\w.]*)(?:\s*<[^;{}()=]*?>)?(?:\s*\[\s*\])*\s+([a-z_$][\w$]*)\s*(?=[=;,):])")
+_CALL = re.compile(r"(?:([\w$]+|\))\s*\.\s*)?\b([a-zA-Z_$][\w$]*)\s*\(")
+_NEW = re.compile(r"\bnew\s+([\w.]+)")
+_ENTRY_ANNOTATION = re.compile(r"@(?:Get|Post|Put|Delete|Patch|Request)Mapping\b")
+_CONTROLLER_ANNOTATION = re.compile(r"@(?:Rest)?Controller\b")
+
+
+def _blank(match: re.Match) -> str:
+    """Replaces a comment or literal with spaces (keeping quotes and line breaks) so offsets stay valid."""
+    token = match.group()
+    if token in "{}":
+        return token
+    if token[0] in "\"'":
+        return token[0] + re.sub(r"[^\n]", " ", token[1:-1]) + token[-1]
+    return re.sub(r"[^\n]", " ", token)
+
+
+def parse_java_source(text: str) -> Dict:
+    """Types of one Java file with their methods and, per method, the calls it makes in source order.
+
+    Returns {"package", "imports", "wildcard_imports", "variables": {name: declared type},
+    "types": [{"name", "extends", "controller", "methods": [{"name", "entry", "calls": [[receiver, name]],
+    "news": [type]}]}]}. Variables (fields, parameters and locals) are collected per file, which is
+    precise enough to type call receivers.
+    """
+    structure = extract_structure(text)
+    code = _TOKENS.sub(_blank, text)
+    types = []
+    for type_item in structure["types"]:
+        methods = []
+        for method in type_item["methods"]:
+            item = {"name": method["name"], "entry": any(_ENTRY_ANNOTATION.match(a) for a in method["annotations"]),
+                    "calls": [], "news": []}
+            if method["body"] is not None:
+                _collect_calls(item, code[method["body"][0]:method["body"][1]])
+            methods.append(item)
+        types.append({
+            "name": type_item["name"],
+            "extends": _simple_type(type_item["extends"][0]) if type_item["extends"] else None,
+            "controller": any(_CONTROLLER_ANNOTATION.match(a) for a in type_item["annotations"]),
+            "methods": methods,
+        })
+
+    variables = {}
+    for match in _VARIABLE.finditer(code):
+        variables.setdefault(match.group(2), match.group(1))
+    return {
+        "package": structure["package"],
+        "imports": structure["imports"],
+        "wildcard_imports": structure["wildcard_imports"],
+        "variables": variables,
+        "types": types,
+    }
+
+
+def _collect_calls(method: Dict, body: str) -> None:
+    new_positions = set()
+    for match in _NEW.finditer(body):
+        method["news"].append(match.group(1))
+        new_positions.add(match.end())
+    for match in _CALL.finditer(body):
+        name = match.group(2)
+        if name in _CONTROL_KEYWORDS or match.end(2) in new_positions:
+            continue
+        method["calls"].append([match.group(1), name])
+
+
+def _parse_file(file_path: str) -> Tuple[str, Dict]:
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        return file_path, parse_java_source(f.read())
+
+
+def _parse_batch(file_paths: List[str]) -> List[Tuple[str, Dict]]:
+    return [_parse_file(file_path) for file_path in file_paths]
+
+
+def _simple_type(type_name: str) -> str:
+    return re.sub(r"<.*|\[.*", "", type_name).strip()
+
+
+class CallGraph:
+    """Class and method call graphs of a set of parsed Java files."""
+
+    def __init__(self, parsed_files: Iterable[Tuple[str, Dict]]):
+        self.files = dict(parsed_files)
+        self.types: Dict[str, Dict] = {}         # fully qualified type -> parsed type
+        self.type_files: Dict[str, Dict] = {}    # fully qualified type -> parsed file
+        self.packages: Dict[str, Dict[str, str]] = {}  # package -> {simple name: fully qualified}
+        for parsed in self.files.values():
+            prefix = f"{parsed['package']}." if parsed["package"] else ""
+            for type_item in parsed["types"]:
+                qualified = prefix + type_item["name"]
+                self.types[qualified] = type_item
+                self.type_files[qualified] = parsed
+                self.packages.setdefault(parsed["package"], {})[type_item["name"]] = qualified
+        self.method_calls: Dict[str, List[str]] = {}  # "Type.method" -> called "Type.method"s in order
+        self.class_graph = DependencyGraph()
+        self.method_graph = DependencyGraph()
+        self._resolve_all()
+
+    @classmethod
+    def from_directory(cls, project_dir: str, workers: Optional[int] = None, files_per_batch: int = 64) -> "CallGraph":
+        file_paths = list(iter_source_files(project_dir))
+        if len(file_paths) < MIN_FILES_FOR_POOL:
+            return cls(_parse_batch(file_paths))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            return cls(parsed for batch in executor.map(_parse_batch, batched(file_paths, files_per_batch))
+                       for parsed in batch)
+
+    def resolve_type(self, type_name: str, context_type: str) -> Optional[str]:
+        """Fully qualified project type for a simple or qualified name used inside context_type."""
+        type_name = _simple_type(type_name)
+        if type_name in self.types:
+            return type_name
+        parsed = self.type_files[context_type]
+        first, _, rest = type_name.partition(".")
+        # Nested types of the enclosing types, then the package and single-type imports, then wildcards
+        outer = context_type
+        while outer in self.types:
+            if f"{outer}.{first}" in self.types:
+                return f"{outer}.{type_name}"
+            if "." not in outer:
+                break
+            outer = outer.rsplit(".", 1)[0]
+        candidate = self.packages.get(parsed["package"], {}).get(first)
+        for imp in parsed["imports"]:
+            if imp.rsplit(".", 1)[-1] == first:
+                candidate = imp
+        for package in parsed["wildcard_imports"]:
+            candidate = candidate or self.packages.get(package, {}).get(first)
+        if candidate is None:
+            return None
+        qualified = f"{candidate}.{rest}" if rest else candidate
+        return qualified if qualified in self.types else None
+
+    def _method_owner(self, type_name: Optional[str], method_name: str) -> Optional[str]:
+        """The type (or nearest project superclass) declaring method_name."""
+        seen = set()
+        while type_name and type_name not in seen:
+            seen.add(type_name)
+            type_item = self.types[type_name]
+            if any(method["name"] == method_name for method in type_item["methods"]):
+                return type_name
+            type_name = self.resolve_type(type_item["extends"], type_name) if type_item["extends"] else None
+        return None
+
+    def _resolve_all(self) -> None:
+        for qualified in sorted(self.types):
+            type_item = self.types[qualified]
+            self.class_graph.add_node(qualified)
+            for method in type_item["methods"]:
+                source = f"{qualified}.{method['name']}"
+                self.method_graph.add_node(source)
+                calls = self.method_calls.setdefault(source, [])
+                for new_type in method["news"]:
+                    target_type = self.resolve_type(new_type, qualified)
+                    if target_type and target_type != qualified:
+                        self.class_graph.add_edge(qualified, target_type)
+                for receiver, name in method["calls"]:
+                    target_type = self._receiver_type(receiver, qualified, type_item)
+                    owner = self._method_owner(target_type, name)
+                    if owner is None:
+                        continue
+                    target = f"{owner}.{name}"
+                    calls.append(target)
+                    self.method_graph.add_edge(source, target)
+                    if owner != qualified:
+                        self.class_graph.add_edge(qualified, owner)
+
+    def _receiver_type(self, receiver: Optional[str], qualified: str, type_item: Dict) -> Optional[str]:
+        if receiver is None or receiver == "this":
+            return qualified
+        if receiver == "super":
+            return self.resolve_type(type_item["extends"], qualified) if type_item["extends"] else None
+        if receiver == ")":
+            return None
+        variable_type = self.type_files[qualified]["variables"].get(receiver)
+        if variable_type is not None:
+            return self.resolve_type(variable_type, qualified)
+        if receiver[:1].isupper():
+            return self.resolve_type(receiver, qualified)  # Static call on a class
+        return None
+
+    def entry_points(self) -> List[str]:
+        """Request-mapped controller methods, else public entry classes' methods, else main methods."""
+        mapped = [f"{qualified}.{method['name']}" for qualified in sorted(self.types)
+                  for method in self.types[qualified]["methods"] if method["entry"]]
+        if mapped:
+            return mapped
+        controllers = [f"{qualified}.{method['name']}" for qualified in sorted(self.types)
+                       if self.types[qualified]["controller"] or qualified.endswith("Controller")
+                       for method in self.types[qualified]["methods"]]
+        if controllers:
+            return controllers
+        return [f"{qualified}.main" for qualified in sorted(self.types)
+                if any(method["name"] == "main" for method in self.types[qualified]["methods"])]
+
+    def call_sequence(self, entry: str, max_depth: int = 4, max_messages: int = 40) -> List[Tuple[str, str, str]]:
+        """(caller type, callee type, method) messages reached from entry, depth first in source order."""
+        messages = []
+        active = set()
+
+        def visit(method, depth):
+            if depth >= max_depth or method in active:
+                return
+            active.add(method)
+            caller_type = method.rsplit(".", 1)[0]
+            for target in self.method_calls.get(method, []):
+                if len(messages) >= max_messages:
+                    break
+                target_type, target_name = target.rsplit(".", 1)
+                messages.append((caller_type, target_type, target_name))
+                visit(target, depth + 1)
+            active.discard(method)
+
+        visit(entry, 0)
+        return messages
+
+    def sequence_diagram(self, entry: str, max_depth: int = 4, max_messages: int = 40) -> str:
+        """Mermaid sequence diagram of the calls reachable from an entry method."""
+        entry_type, entry_name = entry.rsplit(".", 1)
+        messages = self.call_sequence(entry, max_depth, max_messages)
+        participants = [entry_type]
+        for caller, callee, _ in messages:
+            for type_name in (caller, callee):
+                if type_name not in participants:
+                    participants.append(type_name)
+        ids = {type_name: f"p{i}" for i, type_name in enumerate(participants)}
+        lines = ["sequenceDiagram", "    actor Client"]
+        lines.extend(f"    participant {ids[t]} as {t.rsplit('.', 1)[-1] if '.' in t else t}" for t in participants)
+        lines.append(f"    Client->>{ids[entry_type]}: {entry_name}()")
+        lines.extend(f"    {ids[caller]}->>{ids[callee]}: {name}()" for caller, callee, name in messages)
+        return "\n".join(lines)
+
+    def flow_diagrams(self, max_diagrams: int = 5, max_depth: int = 4, max_messages: int = 40) -> List[Dict]:
+        """Sequence diagrams for the entry points with the most reachable calls (ties in name order)."""
+        entries = self.entry_points()
+        ranked = sorted(entries, key=lambda entry: (-len(self.call_sequence(entry, max_depth, max_messages)), entry))
+        diagrams = []
+        for entry in ranked[:max_diagrams]:
+            messages = self.call_sequence(entry, max_depth, max_messages)
+            diagrams.append({
+                "entry": entry,
+                "calls": [f"{caller.rsplit('.', 1)[-1]} -> {callee.rsplit('.', 1)[-1]}.{name}()"
+                          for caller, callee, name in messages],
+                "mermaid": self.sequence_diagram(entry, max_depth, max_messages),
+            })
+        return diagrams
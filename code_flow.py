@@ -3,7 +3,17 @@ from langchain.document_loaders import DirectoryLoader
 from langchain.llms import OpenAI
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
+import re
 import json
+from collections import defaultdict
+
+from source_loader import iter_source_files
+from flow_java import build_dependency_graph, select_view
+from call_graph import CallGraph
+from context_packer import pack_files, truncate_to_tokens
+from llm_executor import LLMExecutor
+from hierarchical_summary import (PACKAGE_FILES_PROMPT, MODULE_SUMMARY_PROMPT, find_module_roots, module_of,
+                                  package_of, reduce_level)
 
 # Set up paths and OpenAI API key
 project_path = "/path/to/spring-petclinic"  # Update with actual path to the project
@@ -30,14 +40,8 @@ directory_structure = generate_directory_structure(project_path)
 loader = DirectoryLoader(project_path, glob="README.md")  # Load README if present
 readme_document = loader.load()[0] if loader.load() else None  # Assuming README.md exists
 
-documents = []
-for root, dirs, files in os.walk(project_path):
-    for file in files:
-        if file.endswith(".java") or file in ["pom.xml", "build.gradle"]:
-            file_path = os.path.join(root, file)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            documents.append({"filename": file_path, "content": content})
+# Only file names feed the module breakdown, so contents are never read into memory
+documents = [{"filename": file_path} for file_path in iter_source_files(project_path, (".java", "pom.xml", "build.gradle"))]
 
 # Step 3: Initialize LLM and Define Prompt for Module Breakdown
 llm = OpenAI(model_name="gpt-4-turbo", api_key=openai_api_key)
@@ -46,39 +50,80 @@ module_breakdown_prompt = """
 Given the following files and descriptions from a Spring Boot project, provide a description of each main module or component.
 For each module, explain its responsibility within the codebase.
 
-Files:
+Modules:
 {file_list}
 
 README Content (if available):
 {readme_content}
 """
 
-file_list = "\n".join([doc["filename"] for doc in documents])
+# Map-reduce instead of one giant file list: file names are grouped into packages, each package is
+# described from its file names, then each module from its package descriptions (all levels run in
+# parallel and are cached), so the breakdown prompt only carries one description per module
+executor = LLMExecutor(llm, max_concurrency=8)
+packages = defaultdict(list)
+for doc in documents:
+    packages[package_of(doc["filename"], project_path)].append(os.path.basename(doc["filename"]))
+package_descriptions = reduce_level(executor, PACKAGE_FILES_PROMPT, packages)
+
+module_roots = find_module_roots(project_path)
+modules = defaultdict(list)
+for package, description in sorted(package_descriptions.items()):
+    modules[module_of(package, module_roots)].append(f"Package {package}: {description}")
+module_descriptions = reduce_level(executor, MODULE_SUMMARY_PROMPT, modules)
+
+module_list_token_budget = 6000
+file_list = truncate_to_tokens("\n".join(f"Module {module}: {description}" for module, description in sorted(module_descriptions.items())),
+                               module_list_token_budget, "gpt-4-turbo")
+# Keep the README within a fixed token budget so large READMEs cannot overflow the prompt
+readme_token_budget = 2000
 readme_content = readme_document.page_content if readme_document else "README not available"
+packed_readme = pack_files([("README.md", readme_content)], budget=readme_token_budget, model_name="gpt-4-turbo")
+print(packed_readme.report("Module Breakdown README"))
+readme_content = packed_readme.text
 
 module_breakdown_text = module_breakdown_prompt.format(file_list=file_list, readme_content=readme_content)
 module_breakdown = llm(module_breakdown_text)
 
 # Step 4: Generate Flow Diagrams
-# Prompt to create a Mermaid sequence diagram to represent app flow and module interactions
-flow_diagram_prompt = """
-Using Mermaid syntax, generate a flowchart or sequence diagram based on the following project structure and module responsibilities.
-
-Directory Structure:
-{directory_structure}
-
-Module Breakdown:
-{module_breakdown}
-
-Represent the main flow of the application, including how different modules interact in the sequence diagram. Use high-level module names rather than specific functions.
+# The package dependency diagram is built from the import index rather than by the LLM, and only a
+# bounded view (the most connected packages) is written, however large the repository is
+package_diagram_max_nodes = 40
+dependency_graph = build_dependency_graph(project_path)
+package_graph = dependency_graph.collapse()
+package_view = select_view(dependency_graph, max_nodes=package_diagram_max_nodes)
+package_diagram = package_view.to_mermaid()
+package_cycles = "\n".join(" -> ".join(cycle) for cycle in package_graph.cycles()) or "None"
+
+# Flow diagrams are generated from a static call graph of the sources: one sequence diagram per
+# main entry point (request-mapped controller methods first), plus the class-level call graph.
+# The LLM only writes a short title for each diagram, from a compact list of its calls
+call_graph = CallGraph.from_directory(project_path)
+flow_diagrams = call_graph.flow_diagrams(max_diagrams=5)
+class_call_diagram = call_graph.class_graph.top_nodes(30).to_mermaid(label=lambda name: name.rsplit(".", 1)[-1])
+
+flow_label_prompt = """
+Below are call flows extracted from a Java project, each starting at an entry point.
+For each flow, write one line in the form "<number>. <short title>: <one sentence describing what the flow does>".
+
+{file_content}
 """
 
-flow_diagram_text = flow_diagram_prompt.format(
-    directory_structure=json.dumps(directory_structure, indent=2),
-    module_breakdown=module_breakdown
-)
-
-flow_diagram = llm(flow_diagram_text)
+flow_summaries = "\n\n".join(f"{i}. Entry point: {diagram['entry']}\nCalls:\n" + "\n".join(diagram["calls"][:20])
+                              for i, diagram in enumerate(flow_diagrams, 1))
+flow_labels = {}
+if flow_diagrams:
+    labels_response = executor.run_all([(flow_label_prompt, flow_summaries)])[0]
+    if not isinstance(labels_response, Exception):
+        for line in labels_response.splitlines():
+            match = re.match(r"\s*(\d+)\.\s*(.+)", line)
+            if match:
+                flow_labels[int(match.group(1))] = match.group(2).strip()
+
+flow_diagram = "\n\n".join(
+    f"{flow_labels.get(i, diagram['entry'])}\n```mermaid\n{diagram['mermaid']}\n```"
+    for i, diagram in enumerate(flow_diagrams, 1)) or "No entry points found"
+flow_diagram += f"\n\nClass Call Graph:\n```mermaid\n{class_call_diagram}\n```"
 
 # Step 5: Combine All Parts into a "Code Structure Overview" Section
 code_structure_overview = f"""
@@ -92,6 +137,14 @@ Module Breakdown:
 
 Flow Diagrams:
 {flow_diagram}
+
+Package Dependencies ({len(package_view.edges)} of {len(package_graph.edges)} packages shown):
+```mermaid
+{package_diagram}
+```
+
+Package Dependency Cycles:
+{package_cycles}
 """
 
 print("Code Structure Overview:\n", code_structure_overview)
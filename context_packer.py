@@ -0,0 +1,160 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; fall back to a rough word/punctuation count
+    tiktoken = None
+
+# Token-budgeted context packing for section prompts. Retrieved chunks are deduplicated (adjacent
+# chunks share chunk_overlap characters) and added by relevance until the section budget is used up.
+
+DEFAULT_SECTION_BUDGET = 3000
+TRUNCATION_MARKER = "\n[truncated]\n"
+_FALLBACK_TOKEN = re.compile(r"\w+|[^\w\s]")
+_encodings = {}
+
+
+def _get_encoding(model_name: Optional[str]):
+    key = model_name or ""
+    if key not in _encodings:
+        try:
+            _encodings[key] = tiktoken.encoding_for_model(model_name) if model_name else tiktoken.get_encoding("cl100k_base")
+        except KeyError:
+            _encodings[key] = tiktoken.get_encoding("cl100k_base")
+    return _encodings[key]
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Counts tokens with the model's local tokenizer (tiktoken), or approximates without it."""
+    if tiktoken is not None:
+        return len(_get_encoding(model_name).encode(text, disallowed_special=()))
+    return len(_FALLBACK_TOKEN.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cuts text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    if tiktoken is not None:
+        encoding = _get_encoding(model_name)
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    matches = list(_FALLBACK_TOKEN.finditer(text))
+    return text if len(matches) <= max_tokens else text[:matches[max_tokens - 1].end()]
+
+
+def _truncate_with_marker(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cuts text and appends TRUNCATION_MARKER within max_tokens tokens; "" if not even the marker fits."""
+    text = text.removesuffix(TRUNCATION_MARKER)
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER, model_name)
+    while keep > 0:
+        truncated = truncate_to_tokens(text, keep, model_name) + TRUNCATION_MARKER
+        excess = count_tokens(truncated, model_name) - max_tokens
+        if excess <= 0:
+            return truncated
+        keep -= excess  # Tokens can merge across the cut, so counts of the two pieces only add up roughly
+    return ""
+
+
+def _overlap_length(previous: str, chunk: str, max_overlap: int) -> int:
+    """Length of the longest suffix of previous that is also a prefix of chunk (up to max_overlap)."""
+    for length in range(min(len(previous), len(chunk), max_overlap), 0, -1):
+        if previous.endswith(chunk[:length]):
+            return length
+    return 0
+
+
+def dedupe_chunks(chunks: Sequence[Tuple[str, str]], max_overlap: int = 200) -> List[Tuple[str, str]]:
+    """Drops repeated text from (source, text) chunks, keeping their order.
+
+    Chunks fully contained in an earlier chunk of the same source are dropped, and the prefix a
+    chunk shares with the end of an earlier chunk (the splitter's chunk_overlap) is trimmed.
+    """
+    kept = []
+    by_source: Dict[str, List[str]] = {}
+    for source, text in chunks:
+        earlier = by_source.setdefault(source, [])
+        if any(text in previous for previous in earlier):
+            continue
+        trimmed = text
+        for previous in earlier:
+            overlap = _overlap_length(previous, trimmed, max_overlap)
+            if overlap:
+                trimmed = trimmed[overlap:]
+        earlier.append(text)
+        if trimmed.strip():
+            kept.append((source, trimmed.strip()))
+    return kept
+
+
+class PackedContext:
+    """Result of packing: the context text plus token accounting for reporting."""
+
+    def __init__(self, text: str, used_tokens: int, original_tokens: int, chunks_used: int, chunks_total: int):
+        self.text = text
+        self.used_tokens = used_tokens
+        self.original_tokens = original_tokens
+        self.chunks_used = chunks_used
+        self.chunks_total = chunks_total
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.used_tokens
+
+    def report(self, section_name: str) -> str:
+        return (f"{section_name}: {self.used_tokens} context tokens from {self.chunks_used}/{self.chunks_total} chunks "
+                f"({self.saved_tokens} tokens saved)")
+
+
+def pack_chunks(scored_chunks: Sequence[Tuple[str, str, float]], budget: int = DEFAULT_SECTION_BUDGET,
+                model_name: Optional[str] = None, separator: str = "\n\n") -> PackedContext:
+    """Packs (source, text, relevance score) chunks into at most budget tokens, most relevant first."""
+    original_tokens = count_tokens(separator.join(text for _, text, _ in scored_chunks), model_name)
+    ranked = sorted(scored_chunks, key=lambda chunk: chunk[2], reverse=True)
+    unique = dedupe_chunks([(source, text) for source, text, _ in ranked])
+
+    selected = []
+    used = 0
+    separator_tokens = count_tokens(separator, model_name)
+    for _, text in unique:
+        cost = count_tokens(text, model_name) + (separator_tokens if selected else 0)
+        # Skip chunks that do not fit; a smaller, less relevant one may still fill the gap
+        if used + cost > budget:
+            continue
+        selected.append(text)
+        used += cost
+    return PackedContext(separator.join(selected), used, original_tokens, len(selected), len(scored_chunks))
+
+
+def pack_files(files: Sequence[Tuple[str, str]], budget: int = DEFAULT_SECTION_BUDGET,
+               model_name: Optional[str] = None) -> PackedContext:
+    """Packs whole (filename, content) files in priority order, truncating whatever no longer fits."""
+    parts = [f"\n{filename}:\n{content}\n" for filename, content in files]
+    original_tokens = count_tokens("".join(parts), model_name)
+    selected = []
+    used = 0
+    for part in parts:
+        remaining = budget - used
+        if remaining <= 0:
+            break
+        cost = count_tokens(part, model_name)
+        if cost > remaining:
+            part = _truncate_with_marker(part, remaining, model_name)
+            if not part:
+                break
+            cost = count_tokens(part, model_name)
+        selected.append(part)
+        used += cost
+    text = "".join(selected)
+    used = count_tokens(text, model_name)
+    # The joined text can tokenize differently from its parts, so check the whole and shorten the
+    # last part until it fits
+    while used > budget and selected:
+        last = selected.pop()
+        shorter = _truncate_with_marker(last, count_tokens(last, model_name) - (used - budget), model_name)
+        if shorter:
+            selected.append(shorter)
+        text = "".join(selected)
+        used = count_tokens(text, model_name)
+    return PackedContext(text, used, original_tokens, len(selected), len(files))
@@ -16,30 +16,66 @@ documentation_dashboard/
 
 
   # backend/app.py
-from flask import Flask, jsonify, request
-import json
+from flask import Flask, Response, g, jsonify, request
+
+from doc_snapshot import DocWatcher
 
 app = Flask(__name__)
 
-# Load documentation JSON
-with open('data/documentation.json') as f:
-    documentation = json.load(f)
+# Serve documentation from the compact store built next to documentation.json: only its index is
+# parsed at startup, and sections are streamed straight from the memory-mapped file.
+# The watcher swaps in a new snapshot (store + search index) in the background whenever the JSON is
+# regenerated; each request pins the snapshot that was current when it started.
+watcher = DocWatcher('data/documentation.json').start()
+
+@app.before_request
+def pin_snapshot():
+    g.snapshot = watcher.current
+
+@app.after_request
+def add_version_header(response):
+    response.headers['X-Docs-Version'] = str(g.snapshot.version)
+    return response
+
+# Stream a byte range of the store as JSON, answering conditional GETs with 304 Not Modified
+def stream_json(offset, length, etag):
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    response = Response(g.snapshot.store.iter_bytes(offset, length), mimetype='application/json')
+    response.headers['ETag'] = f'"{etag}"'
+    response.headers['Content-Length'] = str(length)
+    return response
+
+@app.route('/api/version', methods=['GET'])
+def get_version():
+    return jsonify({'version': g.snapshot.version, 'loaded_at': g.snapshot.loaded_at})
 
 @app.route('/api/sections', methods=['GET'])
 def get_sections():
-    return jsonify(list(documentation.keys()))
+    return jsonify(g.snapshot.store.sections())
 
 @app.route('/api/section/<section_name>', methods=['GET'])
 def get_section(section_name):
-    return jsonify(documentation.get(section_name, {}))
-
+    location = g.snapshot.store.section_range(section_name)
+    if location is None:
+        return jsonify({})
+    return stream_json(*location)
+
+@app.route('/api/section/<section_name>/<path:file_name>', methods=['GET'])
+def get_section_entry(section_name, file_name):
+    location = g.snapshot.store.entry_range(section_name, file_name)
+    if location is None:
+        return jsonify({'error': 'Not found'}), 404
+    return stream_json(*location)
+
+# BM25-ranked search over the inverted index; the last query word also matches as a prefix
 @app.route('/api/search', methods=['GET'])
 def search():
-    query = request.args.get('query', '').lower()
-    results = {}
-    for section, files in documentation.items():
-        results[section] = {file: content for file, content in files.items() if query in content.lower()}
-    return jsonify(results)
+    query = request.args.get('query', '')
+    page = request.args.get('page', 1, type=int)
+    page_size = min(request.args.get('page_size', 20, type=int), 100)
+    section = request.args.get('section')
+    return jsonify(g.snapshot.search_index().search(query, page=page, page_size=page_size, section=section))
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -75,7 +111,10 @@ function App() {
         <div className="App">
             <Sidebar sections={sections} onSelect={fetchContent} />
             <Content section={currentSection} content={content} />
-            <Search onSearch={query => fetch(`/api/search?query=${query}`).then(res => res.json()).then(setContent)} />
+            <Search onSearch={query => fetch(`/api/search?query=${encodeURIComponent(query)}`)
+                .then(res => res.json())
+                .then(data => setContent(Object.fromEntries(
+                    data.results.map(hit => [`${hit.section}: ${hit.file}`, hit.snippet]))))} />
         </div>
     );
 }
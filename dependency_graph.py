@@ -0,0 +1,193 @@
+import re
+import json
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Lightweight directed graph for code dependency views. Large graphs are never rendered as a whole:
+# a view is first reduced (collapsed by package, cut to the k-hop neighborhood of a node, or to the
+# most connected nodes) and only that view is written out as Mermaid, DOT or JSON text, so output
+# time and size depend on the view rather than on the repository.
+
+_MERMAID_LABEL_UNSAFE = re.compile(r'["\[\]{}()<>|]')
+
+
+def package_of_type(type_name: str) -> str:
+    """Package part of a fully qualified top-level type name ("" for the default package)."""
+    return type_name.rsplit(".", 1)[0] if "." in type_name else ""
+
+
+class DependencyGraph:
+    """Directed graph with weighted edges; nodes are strings (e.g. fully qualified class names)."""
+
+    def __init__(self):
+        self.edges: Dict[str, Dict[str, int]] = {}  # node -> {successor: weight}
+
+    @classmethod
+    def from_dependencies(cls, dependencies: Dict[str, Iterable[str]]) -> "DependencyGraph":
+        graph = cls()
+        for node, targets in dependencies.items():
+            graph.add_node(node)
+            for target in targets:
+                graph.add_edge(node, target)
+        return graph
+
+    def add_node(self, node: str) -> None:
+        self.edges.setdefault(node, {})
+
+    def add_edge(self, source: str, target: str, weight: int = 1) -> None:
+        self.add_node(target)
+        successors = self.edges.setdefault(source, {})
+        successors[target] = successors.get(target, 0) + weight
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self.edges)
+
+    def edge_count(self) -> int:
+        return sum(len(successors) for successors in self.edges.values())
+
+    def reverse_edges(self) -> Dict[str, Set[str]]:
+        predecessors = {node: set() for node in self.edges}
+        for source, successors in self.edges.items():
+            for target in successors:
+                predecessors[target].add(source)
+        return predecessors
+
+    def subgraph(self, nodes: Iterable[str]) -> "DependencyGraph":
+        keep = set(nodes)
+        graph = DependencyGraph()
+        for node in sorted(keep & self.edges.keys()):
+            graph.add_node(node)
+            for target, weight in self.edges[node].items():
+                if target in keep:
+                    graph.add_edge(node, target, weight)
+        return graph
+
+    def collapse(self, group_of: Callable[[str], str] = package_of_type) -> "DependencyGraph":
+        """Merges nodes into groups (by package by default); edge weights count the merged edges."""
+        graph = DependencyGraph()
+        for source, successors in self.edges.items():
+            source_group = group_of(source)
+            graph.add_node(source_group)
+            for target, weight in successors.items():
+                target_group = group_of(target)
+                if target_group != source_group:
+                    graph.add_edge(source_group, target_group, weight)
+        return graph
+
+    def neighborhood(self, node: str, hops: int = 2, direction: str = "both") -> "DependencyGraph":
+        """Subgraph of nodes within `hops` edges of node, following "out", "in" or "both" directions."""
+        if node not in self.edges:
+            raise KeyError(node)
+        predecessors = self.reverse_edges() if direction in ("in", "both") else {}
+        seen = {node}
+        frontier = deque([(node, 0)])
+        while frontier:
+            current, distance = frontier.popleft()
+            if distance == hops:
+                continue
+            neighbors = []
+            if direction in ("out", "both"):
+                neighbors.extend(self.edges[current])
+            if direction in ("in", "both"):
+                neighbors.extend(predecessors[current])
+            for neighbor in neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    frontier.append((neighbor, distance + 1))
+        return self.subgraph(seen)
+
+    def top_nodes(self, limit: int) -> "DependencyGraph":
+        """Subgraph of the `limit` nodes with the highest total edge weight (in + out)."""
+        degree = {node: sum(successors.values()) for node, successors in self.edges.items()}
+        for successors in self.edges.values():
+            for target, weight in successors.items():
+                degree[target] += weight
+        ranked = sorted(degree, key=lambda node: (-degree[node], node))
+        return self.subgraph(ranked[:limit])
+
+    def strongly_connected_components(self) -> List[List[str]]:
+        """Tarjan's algorithm, iterative so deep graphs cannot hit the recursion limit.
+
+        Components are returned in reverse topological order (dependencies first), each sorted.
+        """
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+        counter = 0
+        for root in self.nodes:
+            if root in index_of:
+                continue
+            work = [(root, iter(sorted(self.edges[root])))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for target in successors:
+                    if target not in index_of:
+                        index_of[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(sorted(self.edges[target]))))
+                        advanced = True
+                        break
+                    if target in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[target])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+
+    def cycles(self) -> List[List[str]]:
+        """Strongly connected components with more than one node (dependency cycles), largest first."""
+        return sorted((c for c in self.strongly_connected_components() if len(c) > 1), key=lambda c: (-len(c), c))
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "nodes": self.nodes,
+            "edges": [{"source": source, "target": target, "weight": weight}
+                      for source in self.nodes for target, weight in sorted(self.edges[source].items())],
+        }, indent=2)
+
+    def to_dot(self, name: str = "dependencies", label: Optional[Callable[[str], str]] = None) -> str:
+        lines = [f"digraph {json.dumps(name)} {{", "  rankdir=LR;", "  node [shape=box];"]
+        for node in self.nodes:
+            node_label = label(node) if label else node
+            lines.append(f"  {json.dumps(node or '(default)')} [label={json.dumps(node_label or '(default)')}];")
+        for source in self.nodes:
+            for target, weight in sorted(self.edges[source].items()):
+                attributes = f" [label={weight}]" if weight > 1 else ""
+                lines.append(f"  {json.dumps(source or '(default)')} -> {json.dumps(target or '(default)')}{attributes};")
+        lines.append("}")
+        return "\n".join(lines)
+
+    def to_mermaid(self, label: Optional[Callable[[str], str]] = None, direction: str = "LR") -> str:
+        """Mermaid flowchart; node ids are generated (n0, n1, ...) so any name is safe as a label."""
+        ids = {node: f"n{i}" for i, node in enumerate(self.nodes)}
+        lines = [f"flowchart {direction}"]
+        for node, node_id in ids.items():
+            node_label = _MERMAID_LABEL_UNSAFE.sub("_", (label(node) if label else node) or "(default)")
+            lines.append(f'    {node_id}["{node_label}"]')
+        for source in self.nodes:
+            for target, weight in sorted(self.edges[source].items()):
+                arrow = f"-->|{weight}|" if weight > 1 else "-->"
+                lines.append(f"    {ids[source]} {arrow} {ids[target]}")
+        return "\n".join(lines)
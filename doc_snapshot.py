@@ -0,0 +1,121 @@
+import os
+import time
+import threading
+from typing import Optional, Tuple
+
+from doc_store import DocStore, build_doc_store_from_json, ensure_doc_store
+from search_index import SearchIndex
+
+# Hot reload for the dashboard: a snapshot bundles one version of the doc store with its search
+# index, and a watcher thread polls documentation.json and swaps in a fully built new snapshot
+# when the file changes. Requests grab the current snapshot once and use it throughout, so
+# in-flight requests keep reading the old snapshot (its mmap stays open until nothing uses it).
+# The search index is built on the first search. After a reload it is a copy of the previous
+# snapshot's index with only the entries whose store etag changed re-indexed, and it reads snippet
+# text from the store's mmap instead of keeping every entry in memory.
+
+POLL_INTERVAL_SECONDS = float(os.environ.get("DOCS_POLL_INTERVAL", "2"))
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime) of a file, which changes whenever it is rewritten or replaced."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def store_text_source(store: DocStore):
+    """(section, file) -> entry text, read from the store's mmap on each call."""
+    def text(section: str, file: str) -> str:
+        value = store.load_entry(section, file)
+        return value if isinstance(value, str) else str(value)
+    return text
+
+
+class DocSnapshot:
+    """One immutable version of the documentation: its store, search index and version number."""
+
+    def __init__(self, store: DocStore, version: int, signature: Optional[Tuple[int, int, int]],
+                 previous_index: Optional[SearchIndex] = None):
+        self.store = store
+        self.version = version
+        self.signature = signature
+        self.loaded_at = time.time()
+        self._search_index: Optional[SearchIndex] = None
+        self._previous_index = previous_index
+        self._lock = threading.Lock()
+
+    @property
+    def has_search_index(self) -> bool:
+        return self._search_index is not None
+
+    def search_index(self) -> SearchIndex:
+        """The snapshot's search index, built on first use (from the previous snapshot's, if any)."""
+        with self._lock:
+            if self._search_index is None:
+                text = store_text_source(self.store)
+                if self._previous_index is not None:
+                    # Still reads the previous store, which removals need to find the old postings
+                    search_index = self._previous_index.copy()
+                else:
+                    search_index = SearchIndex(text_source=text)
+                search_index.update_versions(self.store.iter_etags(), text)
+                search_index.text_source = text
+                self._search_index = search_index
+                self._previous_index = None
+            return self._search_index
+
+
+class DocWatcher:
+    """Keeps `current` pointing at a snapshot of the latest documentation.json."""
+
+    def __init__(self, json_path: str, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.json_path = json_path
+        self.poll_interval = poll_interval
+        self.current = self._load(1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self, version: int, rebuild: bool = False,
+              previous_index: Optional[SearchIndex] = None) -> DocSnapshot:
+        signature = file_signature(self.json_path)
+        if rebuild:
+            # A replaced file can carry an older mtime (e.g. copied with cp -p), so always rebuild on change
+            store_path = os.path.splitext(self.json_path)[0] + ".docstore"
+            build_doc_store_from_json(self.json_path, store_path)
+        else:
+            store_path = ensure_doc_store(self.json_path)
+        return DocSnapshot(DocStore(store_path), version, signature, previous_index)
+
+    def reload(self) -> bool:
+        """Swaps in a new snapshot if the file changed; returns whether it did."""
+        if file_signature(self.json_path) == self.current.signature:
+            return False
+        current = self.current
+        previous_index = current.search_index() if current.has_search_index else None
+        snapshot = self._load(current.version + 1, rebuild=True, previous_index=previous_index)
+        if previous_index is not None:
+            # Searches are in use: update the index before the swap, so no request waits for it
+            snapshot.search_index()
+        self.current = snapshot
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if self.reload():
+                    print(f"Reloaded {self.json_path} as version {self.current.version}")
+            except Exception as e:
+                # Keep serving the last good snapshot, e.g. while the file is being replaced by hand
+                print(f"Reloading {self.json_path} failed: {e}")
+
+    def start(self) -> "DocWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="doc-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
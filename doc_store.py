@@ -0,0 +1,147 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Compact on-disk form of documentation.json for the dashboard backend.
+#
+# Layout: MAGIC, then one JSON object per section laid out back to back, then a JSON index, then a
+# footer (index offset and length as two little-endian uint64, followed by MAGIC). Every section is
+# stored as a valid JSON document on its own, and for dict sections the index also records where
+# each entry's value sits inside it, so a section or a single entry can be served straight from an
+# mmap of the file without parsing anything but the index.
+
+MAGIC = b"DOCSTORE1\n"
+_FOOTER = struct.Struct("<QQ")
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _etag(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def build_doc_store(documentation: Dict, store_path: str) -> None:
+    """Writes a documentation dict ({section: {file: content}}) in the store format, atomically."""
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    index = {"sections": {}}
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for section, value in documentation.items():
+            entry = {"offset": f.tell()}
+            section_hash = hashlib.sha1()
+
+            def write(data):
+                section_hash.update(data)
+                f.write(data)
+
+            if isinstance(value, dict):
+                files = {}
+                write(b"{")
+                for i, (file, content) in enumerate(value.items()):
+                    write((b", " if i else b"") + _encode(file) + b": ")
+                    data = _encode(content)
+                    files[file] = [f.tell(), len(data), _etag(data)]
+                    write(data)
+                write(b"}")
+                entry["files"] = files
+            else:
+                write(_encode(value))
+            entry["length"] = f.tell() - entry["offset"]
+            entry["etag"] = section_hash.hexdigest()[:20]
+            index["sections"][section] = entry
+        index_offset = f.tell()
+        index_data = _encode(index)
+        f.write(index_data)
+        f.write(_FOOTER.pack(index_offset, len(index_data)) + MAGIC)
+    os.replace(tmp_path, store_path)
+
+
+def build_doc_store_from_json(json_path: str, store_path: str) -> None:
+    with open(json_path, "r", encoding="utf-8") as f:
+        documentation = json.load(f)
+    build_doc_store(documentation, store_path)
+
+
+def ensure_doc_store(json_path: str, store_path: Optional[str] = None) -> str:
+    """Rebuilds the store next to json_path if it is missing or older than the JSON; returns its path."""
+    store_path = store_path or os.path.splitext(json_path)[0] + ".docstore"
+    if not os.path.exists(store_path) or os.path.getmtime(store_path) < os.path.getmtime(json_path):
+        build_doc_store_from_json(json_path, store_path)
+    return store_path
+
+
+class DocStore:
+    """Read-only view of a store file through mmap; only the index is parsed up front."""
+
+    def __init__(self, store_path: str):
+        self.path = store_path
+        with open(store_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        footer_start = len(self._mmap) - _FOOTER.size - len(MAGIC)
+        if self._mmap[:len(MAGIC)] != MAGIC or self._mmap[footer_start + _FOOTER.size:] != MAGIC:
+            raise ValueError(f"{store_path} is not a documentation store")
+        index_offset, index_length = _FOOTER.unpack_from(self._mmap, footer_start)
+        self.index = json.loads(self._mmap[index_offset:index_offset + index_length])["sections"]
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def sections(self) -> List[str]:
+        return list(self.index)
+
+    def section_range(self, section: str) -> Optional[Tuple[int, int, str]]:
+        """(offset, length, etag) of a section's JSON, or None if there is no such section."""
+        entry = self.index.get(section)
+        return None if entry is None else (entry["offset"], entry["length"], entry["etag"])
+
+    def entry_range(self, section: str, file: str) -> Optional[Tuple[int, int, str]]:
+        """(offset, length, etag) of one entry's JSON value inside a dict section, or None."""
+        location = self.index.get(section, {}).get("files", {}).get(file)
+        return None if location is None else tuple(location)
+
+    def files(self, section: str) -> List[str]:
+        return list(self.index.get(section, {}).get("files", {}))
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._mmap[offset:offset + length]
+
+    def iter_bytes(self, offset: int, length: int, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yields a byte range in chunks, so responses stream without holding the whole range."""
+        end = offset + length
+        for start in range(offset, end, chunk_size):
+            yield self._mmap[start:min(start + chunk_size, end)]
+
+    def load_section(self, section: str):
+        offset, length, _ = self.section_range(section)
+        return json.loads(self.read(offset, length))
+
+    def iter_etags(self) -> Iterator[Tuple[str, str, str]]:
+        """Yields (section, file, etag) for every entry without reading any content."""
+        for section, entry in self.index.items():
+            if "files" in entry:
+                for file, (_, _, etag) in entry["files"].items():
+                    yield section, file, etag
+            else:
+                yield section, "", entry["etag"]
+
+    def load_entry(self, section: str, file: str):
+        """The value of one entry as iter_entries() yields it (file "" for a non-dict section)."""
+        location = self.entry_range(section, file)
+        if location is None:
+            return self.load_section(section)
+        return json.loads(self.read(location[0], location[1]))
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, object]]:
+        """Yields (section, file, value) for every entry, decoding one entry at a time."""
+        for section, entry in self.index.items():
+            if "files" in entry:
+                for file, (offset, length, _) in entry["files"].items():
+                    yield section, file, json.loads(self.read(offset, length))
+            else:
+                yield section, "", self.load_section(section)
@@ -0,0 +1,67 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local fake of an OpenAI-style completions endpoint for exercising llm_executor.py.
+# It injects latency and a configurable share of 429 responses.
+
+
+def make_handler(latency: float, error_rate: float, retry_after: float):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        stats = {"requests": 0, "rate_limited": 0}
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            FakeLLMHandler.stats["requests"] += 1
+            time.sleep(random.uniform(0, 2 * latency))
+
+            if random.random() < error_rate:
+                FakeLLMHandler.stats["rate_limited"] += 1
+                self.send_response(429)
+                self.send_header("Retry-After", str(retry_after))
+                self.end_headers()
+                return
+
+            # Deterministic answer so callers can check ordering and caching
+            prompt = payload.get("prompt", "")
+            text = f"response:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}"
+            body = json.dumps({"model": payload.get("model"), "choices": [{"text": text}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeLLMHandler
+
+
+def start_fake_server(latency: float = 0.05, error_rate: float = 0.2, retry_after: float = 0.1, port: int = 0):
+    """Starts the fake server in a background thread and returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, error_rate, retry_after))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LLM completions server with injected latency and 429s")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After header value for 429s")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.error_rate, args.retry_after))
+    print(f"Fake LLM server listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import os
-import glob
-import concurrent.futures
-from typing import List, Dict, Optional
+import json
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
@@ -11,64 +10,155 @@ from langchain.llms import OpenAI
 
 # Import prompts from prompts.py
 from prompts import prompts
+from llm_cache import cached_llm_call, get_default_cache
+from llm_executor import LLMExecutor
+from vector_index import VectorIndex
+from context_packer import DEFAULT_SECTION_BUDGET, PackedContext, pack_chunks
+from source_loader import iter_chunk_batches, iter_source_files, iter_text_windows
+from incremental import get_changed_files, get_head_commit, load_state, save_state
 
 def load_and_chunk_file(file_path: str, chunk_size: int = 1000, chunk_overlap: int = 100) -> List[Document]:
-    """Loads and chunks a single file."""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        text = file.read()
+    """Loads and chunks a single file, reading very large files window by window."""
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    chunks = text_splitter.split_text(text)
-    documents = [Document(page_content=chunk, metadata={"source": file_path}) for chunk in chunks]
+    documents = []
+    for text in iter_text_windows(file_path, overlap=chunk_overlap):
+        chunks = text_splitter.split_text(text)
+        documents.extend(Document(page_content=chunk, metadata={"source": os.path.normpath(file_path)}) for chunk in chunks)
     return documents
 
+def iter_documents(file_paths: Iterable[str], workers: Optional[int] = None) -> Iterator[Document]:
+    """Streams chunked documents for the given files, chunked in batches across a process pool."""
+    for batch in iter_chunk_batches(file_paths, workers=workers):
+        for file_path, chunks in batch:
+            for chunk in chunks:
+                yield Document(page_content=chunk, metadata={"source": file_path})
+
+def iter_documents_from_directory(directory_path: str, file_extension: str = "*.java", workers: Optional[int] = None) -> Iterator[Document]:
+    """Streams chunked documents from a directory as files are read, instead of collecting them all first."""
+    extension = file_extension.lstrip("*")
+    return iter_documents(iter_source_files(directory_path, (extension,)), workers)
+
 def load_documents_from_directory(directory_path: str, file_extension: str = "*.java") -> List[Document]:
-    """Loads documents from a directory using multithreading and returns a list of Document objects."""
-    file_paths = glob.glob(os.path.join(directory_path, '**', file_extension), recursive=True)
-    all_documents = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(load_and_chunk_file, file_path) for file_path in file_paths]
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                documents = future.result()
-                all_documents.extend(documents)
-            except Exception as e:
-                print(f"Error loading file: {e}")
-    return all_documents
+    """Loads documents from a directory using a process pool and returns a list of Document objects."""
+    return list(iter_documents_from_directory(directory_path, file_extension))
+
+def build_section_context(documents: List[Document], scores: Optional[List[float]] = None,
+                          budget: int = DEFAULT_SECTION_BUDGET) -> PackedContext:
+    """Packs the retrieved chunks into a deduplicated, token-budgeted context for a section prompt."""
+    # Without relevance scores the retrieval order is used as the ranking
+    scores = scores if scores is not None else [-float(i) for i in range(len(documents))]
+    scored_chunks = [(doc.metadata["source"], doc.page_content, score) for doc, score in zip(documents, scores)]
+    return pack_chunks(scored_chunks, budget)
+
+def format_section(section_name: str, response: str) -> str:
+    return f"## {section_name}\n\n{response}\n\n"
 
 def generate_documentation_section(documents: List[Document], section_name: str, prompt: str, llm: OpenAI) -> str:
     """Generates documentation for a given section using the provided prompt."""
-    docs_text = "\n\n".join([doc.page_content for doc in documents])
-    response = llm(f"{prompt}\n\n{docs_text}")
-    return f"## {section_name}\n\n{response}\n\n"
+    context = build_section_context(documents)
+    print(context.report(section_name))
+    response = cached_llm_call(llm, prompt, context.text)
+    return format_section(section_name, response)
 
-def generate_and_save_documentation(directory_path: str, output_dir: str, selected_sections: Optional[List[str]] = None) -> Dict[str, str]:
-    """Generates a full documentation structure and saves each section as a markdown file."""
-    documents = load_documents_from_directory(directory_path)
-    
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma.from_documents(documents, embeddings)
+def load_documents_from_paths(file_paths: Iterable[str]) -> Iterator[Document]:
+    """Streams chunked documents for only the given files, skipping any that no longer exist."""
+    return iter_documents(file_path for file_path in file_paths if os.path.exists(file_path))
+
+def build_vectorstore(directory_path: str, persist_directory: str, changes: Optional[Tuple[Set[str], Set[str]]],
+                      embedding_batch_size: int = 64) -> Chroma:
+    """Syncs the persistent vector index, embedding only new or changed chunks.
+
+    When git changes are known only those files are re-chunked; otherwise the whole tree is
+    re-chunked (cheap) and compared against the index, which still skips unchanged chunks.
+    """
+    index = VectorIndex(persist_directory, OpenAIEmbeddings(), batch_size=embedding_batch_size)
+    if changes is not None:
+        changed, deleted = changes
+        stats = index.sync(load_documents_from_paths(sorted(changed)), sources=changed | deleted)
+    else:
+        stats = index.sync(iter_documents_from_directory(directory_path))
+    print(f"Vector index: {stats['added']} chunks embedded, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    return index.store
+
+def generate_and_save_documentation(directory_path: str, output_dir: str, selected_sections: Optional[List[str]] = None, incremental: bool = False,
+                                    embedding_batch_size: int = 64, top_k: int = 10,
+                                    section_token_budget: int = DEFAULT_SECTION_BUDGET) -> Dict[str, str]:
+    """Generates a full documentation structure and saves each section as a markdown file.
+
+    With incremental=True only files changed since the last documented commit are re-chunked and
+    re-embedded, and sections whose retrieved sources are unchanged are reused from documentation.json.
+    Each section's top_k retrieved chunks are packed into at most section_token_budget tokens.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    head_commit = get_head_commit(directory_path)
+    changes = get_changed_files(directory_path, load_state(output_dir).get("last_commit")) if incremental else None
+
+    json_path = os.path.join(output_dir, "documentation.json")
+    previous = {}
+    if changes is not None and os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    touched = changes[0] | changes[1] if changes is not None else set()
+
+    vectorstore = build_vectorstore(directory_path, os.path.join(output_dir, ".chroma"), changes, embedding_batch_size)
     
     llm = OpenAI()
 
     documentation = {}
-    
-    os.makedirs(output_dir, exist_ok=True)
+    entries = {}
+    pending = []
     
     for section_name, prompt in prompts.items():
         if selected_sections and section_name not in selected_sections:
             continue
-        relevant_docs = vectorstore.similarity_search(prompt, top_k=5)
-        section_text = generate_documentation_section(relevant_docs, section_name, prompt, llm)
+        scored_docs = vectorstore.similarity_search_with_relevance_scores(prompt, k=top_k)
+        relevant_docs = [doc for doc, _ in scored_docs]
+        sources = sorted({doc.metadata["source"] for doc in relevant_docs})
+
+        # Reuse the previous entry when it was built from the same, untouched source files
+        entry = previous.get(section_name)
+        if entry and entry["sources"] == sources and not touched.intersection(sources):
+            documentation[section_name] = entry["text"]
+            entries[section_name] = entry
+            print(f"Reused section: {section_name}")
+        else:
+            context = build_section_context(relevant_docs, [score for _, score in scored_docs], section_token_budget)
+            print(context.report(section_name))
+            pending.append((section_name, prompt, context, sources))
+
+    # Generate all remaining sections concurrently through the shared executor
+    executor = LLMExecutor(llm, max_concurrency=8)
+    results = executor.run_all([(prompt, context.text) for _, prompt, context, _ in pending])
+    failed = set()
+    for (section_name, _, _, sources), response in zip(pending, results):
+        if isinstance(response, Exception):
+            print(f"Error generating section {section_name}: {response}")
+            failed.add(section_name)
+            continue
+        section_text = format_section(section_name, response)
         documentation[section_name] = section_text
-        
+        entries[section_name] = {"text": section_text, "sources": sources}
+
+    for section_name, section_text in documentation.items():
         output_file = os.path.join(output_dir, f"{section_name.replace(' ', '_').lower()}.md")
         with open(output_file, 'w', encoding='utf-8') as file:
             file.write(section_text)
         print(f"Saved section: {section_name} to {output_file}")
+
+    # last_commit moves on below, so an old entry is only kept while its sources are untouched since
+    # it was built; entries of failed sections are dropped so the next run regenerates them
+    kept = {section_name: entry for section_name, entry in previous.items()
+            if section_name not in failed and not touched.intersection(entry["sources"])}
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({**kept, **entries}, f, indent=4)
+    save_state(output_dir, head_commit)
     
     return documentation
 
-project_path = "./path_to_your_codebase"
-output_dir = "./docs"
-selected_sections = ["Overview", "Getting Started", "Code Structure Overview"]
-documentation = generate_and_save_documentation(project_path, output_dir, selected_sections)
+# Guarded so worker processes of the chunking pool can import this module safely
+if __name__ == "__main__":
+    project_path = "./path_to_your_codebase"
+    output_dir = "./docs"
+    selected_sections = ["Overview", "Getting Started", "Code Structure Overview"]
+    documentation = generate_and_save_documentation(project_path, output_dir, selected_sections, incremental=True)
+    print(get_default_cache().format_stats())
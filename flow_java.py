@@ -1,75 +1,85 @@
-import os
-import re
 import graphviz
 
+from dependency_graph import DependencyGraph
+from java_index import JavaIndex, index_path_for
+from source_loader import iter_source_files
+
+MAX_VIEW_NODES = 200    # Larger views are cut down to their most connected nodes
+MAX_RENDER_NODES = 300  # PNG rendering with dot is only attempted for views up to this size
+
 def find_java_files(project_dir):
     """Find all Java files in the project directory."""
-    java_files = []
-    for root, _, files in os.walk(project_dir):
-        for file in files:
-            if file.endswith(".java"):
-                java_files.append(os.path.join(root, file))
-    return java_files
+    return list(iter_source_files(project_dir))
 
-def parse_imports(java_file):
-    """Parse import statements in a Java file to find dependencies."""
-    imports = []
-    with open(java_file, 'r') as f:
-        for line in f:
-            # Match lines that start with 'import ' and capture the class path
-            match = re.match(r'import\s+([a-zA-Z0-9_.]+);', line)
-            if match:
-                imports.append(match.group(1))
-    return imports
+def load_java_index(project_dir, index_path=None):
+    """Load the persisted declaration index and re-parse only files changed since the last run.
 
-def get_class_name(java_file):
-    """Extract the class name from a Java file path."""
-    with open(java_file, 'r') as f:
-        for line in f:
-            match = re.match(r'(public\s+)?class\s+([A-Za-z0-9_]+)', line)
-            if match:
-                return match.group(2)
-    return None
+    The index is kept in the cache directory, keyed by project path, unless index_path is given.
+    """
+    index = JavaIndex(index_path or index_path_for(project_dir))
+    stats = index.update(find_java_files(project_dir))
+    index.save()
+    print(f"Java index: {stats['parsed']} parsed, {stats['unchanged'] + stats['touched']} unchanged, "
+          f"{stats['removed']} removed")
+    return index
 
-def build_dependency_graph(project_dir):
-    """Build a dependency graph for the Java project."""
-    # Initialize a directed graph using Graphviz
-    graph = graphviz.Digraph(comment="Project Flow Diagram", format="png")
-    
-    # Create a mapping from class names to their dependencies
+def collect_dependencies(index):
+    """Map every top-level type (fully qualified) to the project types its file imports."""
+    owners = index.type_owners()
+    packages = index.types_by_package()
     dependencies = {}
-    java_files = find_java_files(project_dir)
-    
-    for java_file in java_files:
-        class_name = get_class_name(java_file)
-        if class_name:
-            imports = parse_imports(java_file)
-            dependencies[class_name] = imports
+    for entry in index.files.values():
+        prefix = f"{entry['package']}." if entry["package"] else ""
+        targets = set()
+        for imp in entry["imports"] + entry["static_imports"]:
+            if imp in owners:
+                targets.add(owners[imp])  # Imports of nested types depend on their top-level type
+        for package in entry["wildcard_imports"]:
+            targets.update(packages.get(package, ()))
+        for type_name in entry["types"]:
+            if "." not in type_name:
+                dependencies[prefix + type_name] = targets - {prefix + type_name}
+    return dependencies
 
-    # Add nodes and edges to the graph
-    for class_name, imports in dependencies.items():
-        graph.node(class_name)  # Add the class as a node in the graph
-        for imp in imports:
-            imported_class = imp.split('.')[-1]  # Only use the class name
-            if imported_class in dependencies:
-                graph.edge(class_name, imported_class)  # Add a directed edge
-    
-    return graph
+def build_dependency_graph(project_dir, index_path=None):
+    """Build a class-level dependency graph for the Java project."""
+    # Create a mapping from class names to their dependencies, parsing only changed files
+    return DependencyGraph.from_dependencies(collect_dependencies(load_java_index(project_dir, index_path)))
+
+def select_view(graph, focus=None, hops=2, collapse_packages=True, max_nodes=MAX_VIEW_NODES):
+    """Reduce the full graph to the view that gets written: a class neighborhood or the package graph."""
+    if focus:
+        view = graph.neighborhood(focus, hops)
+    elif collapse_packages:
+        view = graph.collapse()
+    else:
+        view = graph
+    return view.top_nodes(max_nodes) if len(view.edges) > max_nodes else view
 
-def save_diagram(graph, output_path="project_flow_diagram"):
-    """Save the generated graph as an image file."""
-    graph.render(filename=output_path, cleanup=True)
-    print(f"Flow diagram saved to {output_path}.png")
+def save_diagram(graph, output_path="project_flow_diagram", max_render_nodes=MAX_RENDER_NODES):
+    """Save the graph as DOT, Mermaid and JSON text, and render a PNG only when the view is small."""
+    dot = graph.to_dot()
+    outputs = {".dot": dot, ".mmd": graph.to_mermaid(), ".json": graph.to_json()}
+    for extension, content in outputs.items():
+        with open(output_path + extension, "w") as f:
+            f.write(content)
+    print(f"Flow diagram ({len(graph.edges)} nodes, {graph.edge_count()} edges) saved to {output_path}.dot/.mmd/.json")
+    if len(graph.edges) <= max_render_nodes:
+        graphviz.Source(dot, format="png").render(filename=output_path, cleanup=True)
+        print(f"Flow diagram saved to {output_path}.png")
 
 def main():
     # Set your project directory path here
     project_dir = "/path/to/your/java/project"
+    focus_class = None  # e.g. "org.example.OwnerController" to show only its neighborhood
     
     # Build the dependency graph
     graph = build_dependency_graph(project_dir)
+    for cycle in graph.collapse().cycles():
+        print(f"Package dependency cycle: {' -> '.join(cycle)}")
     
-    # Save the flow diagram
-    save_diagram(graph)
+    # Save the flow diagram of the selected view
+    save_diagram(select_view(graph, focus=focus_class))
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,8 @@ from langchain.llms import OpenAI
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 
+from context_packer import pack_files
+
 # Set up paths and OpenAI API key
 project_path = "/path/to/spring-petclinic"  # Update with actual path to the project
 openai_api_key = "your_openai_api_key"      # Replace with your OpenAI API key
@@ -39,12 +41,16 @@ Files:
 If any sections don't apply, indicate so.
 """
 
-# Use README and configuration files as input
-files_content = ""
+# Use README and configuration files as input, packed into a fixed token budget
+# (README first, then config files in the order above; whatever does not fit is truncated)
+context_token_budget = 4000
+files = []
 if readme_document:
-    files_content += f"\nREADME.md:\n{readme_document.page_content}\n"
-for config in config_files:
-    files_content += f"\n{config['filename']}:\n{config['content']}\n"
+    files.append(("README.md", readme_document.page_content))
+files.extend((config['filename'], config['content']) for config in config_files)
+packed_context = pack_files(files, budget=context_token_budget, model_name="gpt-4-turbo")
+print(packed_context.report("Getting Started"))
+files_content = packed_context.text
 
 # Create the final prompt
 final_prompt = getting_started_template.format(files_content=files_content)
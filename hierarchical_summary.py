@@ -0,0 +1,163 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from llm_executor import LLMExecutor
+from context_packer import count_tokens, truncate_to_tokens
+from source_loader import batched
+
+# Hierarchical map-reduce summarization: files -> packages -> modules -> project.
+# Every level runs all of its prompts concurrently through the shared executor, and every prompt
+# goes through the LLM cache, so an unchanged package (same file summaries) is never re-summarized.
+# Each reduce prompt is kept under a token budget by summarizing oversized groups in parts first.
+
+DEFAULT_LEVEL_BUDGET = 6000
+
+FILE_SUMMARY_PROMPT = """
+Summarize the purpose of the following Java file.
+Describe the main purpose, key functions, and any significant components or logic used.
+
+{file_content}
+"""
+
+PACKAGE_SUMMARY_PROMPT = """
+Below are summaries of the files in one package of a Java project.
+Summarize the package: its responsibility, its main classes, and how they work together.
+
+{file_content}
+"""
+
+PACKAGE_FILES_PROMPT = """
+Below are the names of the files in one package of a Java project.
+Describe the likely responsibility of the package in one or two sentences.
+
+{file_content}
+"""
+
+MODULE_SUMMARY_PROMPT = """
+Below are summaries of the packages in one module of a Java project.
+Summarize the module: its responsibility within the codebase and its main components.
+
+{file_content}
+"""
+
+PROJECT_OVERVIEW_PROMPT = """
+Based on the following summaries of the modules of a project, provide a high-level overview of the project.
+Include details on the main purpose of the project, its architecture, and the primary components or functionalities it includes.
+
+{file_content}
+"""
+
+BUILD_FILES = ("pom.xml", "build.gradle", "build.gradle.kts")
+
+
+def package_of(file_path: str, project_root: str) -> str:
+    """Groups files by their directory relative to the project root."""
+    return os.path.relpath(os.path.dirname(file_path), project_root)
+
+
+def find_module_roots(project_root: str) -> List[str]:
+    """Returns directories (relative to project_root) that hold a Maven or Gradle build file.
+
+    Deepest first, and the project root (".") last, since it encloses every path.
+    """
+    roots = []
+    for root, dirs, files in os.walk(project_root):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        if any(build_file in files for build_file in BUILD_FILES):
+            roots.append(os.path.relpath(root, project_root))
+    return sorted(roots, key=lambda root: (root == ".", -root.count(os.sep)))
+
+
+def module_of(relative_path: str, module_roots: List[str]) -> str:
+    """Returns the nearest enclosing build module of a path, or its top-level directory if there is none."""
+    for module_root in module_roots:
+        if module_root == "." or relative_path == module_root or relative_path.startswith(module_root + os.sep):
+            return module_root
+    return relative_path.split(os.sep)[0]
+
+
+def reduce_level(executor: LLMExecutor, prompt_template: str, groups: Dict[str, List[str]],
+                 budget: int = DEFAULT_LEVEL_BUDGET) -> Dict[str, str]:
+    """Summarizes each group of child summaries into one summary, all groups in parallel.
+
+    A group whose children do not fit into one prompt of `budget` tokens is split into parts;
+    the part summaries are then reduced again in the next round until one summary is left. If a
+    round does not make a group's input shorter, its next round is one prompt of the truncated parts.
+    """
+    results = {}
+    pending = groups
+    sizes = {name: sum(count_tokens(item) for item in items) for name, items in groups.items()}
+    last_round = set()
+    while pending:
+        jobs = []
+        for name, items in pending.items():
+            if name in last_round:
+                jobs.append((name, truncate_to_tokens("\n\n".join(items), budget)))
+                continue
+            batch, used = [], 0
+            for item in items:
+                item = truncate_to_tokens(item, budget)
+                cost = count_tokens(item)
+                if batch and used + cost > budget:
+                    jobs.append((name, "\n\n".join(batch)))
+                    batch, used = [], 0
+                batch.append(item)
+                used += cost
+            jobs.append((name, "\n\n".join(batch)))
+
+        responses = executor.run_all([(prompt_template, content) for _, content in jobs])
+        parts = defaultdict(list)
+        for (name, _), response in zip(jobs, responses):
+            if isinstance(response, Exception):
+                raise response
+            parts[name].append(response.strip())
+
+        pending = {}
+        for name, summaries in parts.items():
+            if len(summaries) == 1:
+                results[name] = summaries[0]
+            else:
+                pending[name] = [f"Part {i + 1}: {summary}" for i, summary in enumerate(summaries)]
+                size = sum(count_tokens(part) for part in pending[name])
+                if size >= sizes[name]:
+                    last_round.add(name)
+                sizes[name] = size
+    return results
+
+
+def summarize_files(executor: LLMExecutor, java_files: Iterable[Dict[str, str]], budget: int = DEFAULT_LEVEL_BUDGET,
+                    files_per_batch: int = 32) -> Dict[str, str]:
+    """Map step: summarizes {"filename", "content"} files concurrently, a batch of files at a time."""
+    summaries = {}
+    for batch in batched(java_files, files_per_batch):
+        contents = [f"File: {f['filename']}\n\nCode:\n{truncate_to_tokens(f['content'], budget)}" for f in batch]
+        responses = executor.run_all([(FILE_SUMMARY_PROMPT, content) for content in contents])
+        for java_file, response in zip(batch, responses):
+            if isinstance(response, Exception):
+                raise response
+            summaries[java_file['filename']] = response.strip()
+    return summaries
+
+
+def summarize_project(executor: LLMExecutor, project_root: str, file_summaries: Dict[str, str],
+                      budget: int = DEFAULT_LEVEL_BUDGET, overview_prompt: str = PROJECT_OVERVIEW_PROMPT) -> Dict:
+    """Reduce steps: file summaries -> package summaries -> module summaries -> project overview."""
+    packages = defaultdict(list)
+    for filename in sorted(file_summaries):
+        packages[package_of(filename, project_root)].append(f"{os.path.basename(filename)}: {file_summaries[filename]}")
+    package_summaries = reduce_level(executor, PACKAGE_SUMMARY_PROMPT, packages, budget)
+
+    module_roots = find_module_roots(project_root)
+    modules = defaultdict(list)
+    for package in sorted(package_summaries):
+        modules[module_of(package, module_roots)].append(f"Package {package}: {package_summaries[package]}")
+    module_summaries = reduce_level(executor, MODULE_SUMMARY_PROMPT, modules, budget)
+
+    project = {"project": [f"Module {module}: {module_summaries[module]}" for module in sorted(module_summaries)]}
+    overview = reduce_level(executor, overview_prompt, project, budget)["project"]
+    return {
+        "package_summaries": package_summaries,
+        "module_summaries": module_summaries,
+        "overview": overview,
+    }
@@ -0,0 +1,71 @@
+import os
+import json
+import subprocess
+from typing import Dict, Optional, Set, Tuple
+
+# Incremental re-documentation: remember the last documented commit and ask git what changed since.
+STATE_FILE = ".docs_state.json"
+
+
+def load_state(output_dir: str) -> Dict:
+    """Loads the incremental state (last documented commit) stored next to the generated docs."""
+    state_path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(output_dir: str, commit: Optional[str]) -> None:
+    """Records the commit the docs in output_dir were generated from."""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, STATE_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"last_commit": commit}, f, indent=4)
+
+
+def get_head_commit(repo_dir: str) -> Optional[str]:
+    """Returns the HEAD commit of the repository, or None if repo_dir is not a git checkout."""
+    result = subprocess.run(["git", "-C", repo_dir, "rev-parse", "HEAD"], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def get_changed_files(repo_dir: str, since_commit: Optional[str], extension: str = ".java") -> Optional[Tuple[Set[str], Set[str]]]:
+    """Returns (changed, deleted) file paths since since_commit, including uncommitted and untracked files.
+
+    Paths are joined onto repo_dir and normalized so they compare equal to os.walk output.
+    Returns None when there is no usable previous commit and a full rebuild is needed.
+    """
+    if not since_commit:
+        return None
+    check = subprocess.run(["git", "-C", repo_dir, "cat-file", "-e", f"{since_commit}^{{commit}}"], capture_output=True)
+    if check.returncode != 0:
+        return None
+
+    # Diff the recorded commit against the working tree; --relative keeps paths relative to repo_dir
+    cmd = ["git", "-C", repo_dir, "diff", "--name-status", "--relative", "-M", "-z", since_commit]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    changed, deleted = set(), set()
+    fields = result.stdout.split("\0")
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in ("R", "C"):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status[0] == "R":
+                deleted.add(old_path)
+            changed.add(new_path)
+            i += 3
+        else:
+            (deleted if status[0] == "D" else changed).add(fields[i + 1])
+            i += 2
+
+    cmd = ["git", "-C", repo_dir, "ls-files", "--others", "--exclude-standard", "-z"]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    changed.update(path for path in result.stdout.split("\0") if path)
+
+    def absolute(paths):
+        return {os.path.normpath(os.path.join(repo_dir, p)) for p in paths if p.endswith(extension)}
+
+    return absolute(changed), absolute(deleted)
@@ -0,0 +1,228 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import itertools
+import concurrent.futures
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from source_loader import batched, iter_source_files
+
+# Persisted per-file index of Java declarations for dependency graphs. One linear scan per file
+# collects the package, every declared type (nested ones as Outer.Inner), and its imports.
+# Entries are keyed by path and validated by mtime/size, falling back to a content hash, so a rerun
+# only parses files that actually changed; parsing runs on a process pool. Indexes live in a cache
+# directory keyed by project path (see index_path_for), never inside the project being indexed.
+
+INDEX_FILE = ".java_index.json"
+INDEX_CACHE_DIR = os.environ.get("JAVA_INDEX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "java-index-cache"))
+INDEX_VERSION = 1
+MIN_FILES_FOR_POOL = 64  # Below this, a process pool costs more to start than it saves
+
+# Comments and string/char/text-block literals are matched as whole tokens and thereby skipped, so
+# declarations inside them are never picked up; braces track nesting of type bodies. The pattern
+# only starts at rare characters, so the regex engine skips ordinary code quickly.
+_TOKENS = re.compile(
+    r'//[^\n]*|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""'
+    r'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\'|[{}]')
+
+# Declarations are located with str.find on their keyword (much faster than a regex scan for
+# word boundaries) and then confirmed with this pattern at the keyword's position.
+_KEYWORDS = ("package", "import", "class", "interface", "enum", "record")
+_DECLARATION = re.compile(
+    r'package\s+(?P<package>[\w.]+)\s*;'
+    r'|import\s+(?P<static>static\s+)?(?P<import>\w+(?:\s*\.\s*\w+)*)(?P<wildcard>\s*\.\s*\*)?\s*;'
+    r'|(?:class|interface|enum)\s+(?P<name>\w+)'
+    r'|record\s+(?P<record>\w+)\s*(?=[(<])')
+_SPACES = re.compile(r"\s+")
+
+
+def _find_declarations(text: str) -> List[Tuple[int, re.Match]]:
+    """(position, match) of every keyword-led declaration, including ones inside comments or strings."""
+    found = []
+    for keyword in _KEYWORDS:
+        # A keyword must start a word; only "interface" may follow "@" (annotation type declarations)
+        blocked = "_$." if keyword == "interface" else "_$.@"
+        position = text.find(keyword)
+        while position != -1:
+            previous = text[position - 1] if position else " "
+            if not (previous.isalnum() or previous in blocked):
+                match = _DECLARATION.match(text, position)
+                if match:
+                    found.append((position, match))
+            position = text.find(keyword, position + len(keyword))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def extract_java_info(text: str) -> Dict:
+    """Package, declared types, imports, wildcard imports and static imports of one Java source."""
+    package = ""
+    types: List[str] = []
+    imports: List[str] = []
+    wildcard_imports: List[str] = []
+    static_imports: List[str] = []
+    depth = 0
+    stack: List[Tuple[str, int]] = []  # (qualified type name, brace depth of its body)
+    pending: Optional[str] = None       # Type declared but whose body has not been opened yet
+
+    declarations = _find_declarations(text)
+    next_declaration = 0
+    for token in itertools.chain(_TOKENS.finditer(text), (None,)):
+        token_start = token.start() if token else len(text)
+        # Declarations before this token are in code; those inside it (a comment or literal) are skipped
+        while next_declaration < len(declarations) and declarations[next_declaration][0] < token_start:
+            match = declarations[next_declaration][1]
+            next_declaration += 1
+            if match.group("package"):
+                package = match.group("package")
+            elif match.group("import"):
+                name = _SPACES.sub("", match.group("import"))
+                if match.group("static"):
+                    # import static a.B.member / a.B.* -> the class is a.B
+                    static_imports.append(name if match.group("wildcard") else name.rsplit(".", 1)[0])
+                elif match.group("wildcard"):
+                    wildcard_imports.append(name)
+                else:
+                    imports.append(name)
+            else:
+                name = match.group("name") or match.group("record")
+                qualified = f"{stack[-1][0]}.{name}" if stack else name
+                types.append(qualified)
+                pending = qualified
+        if token is None:
+            break
+        while next_declaration < len(declarations) and declarations[next_declaration][0] < token.end():
+            next_declaration += 1
+        brace = token.group()
+        if brace == "{":
+            depth += 1
+            if pending is not None:
+                stack.append((pending, depth))
+                pending = None
+        elif brace == "}":
+            if stack and stack[-1][1] == depth:
+                stack.pop()
+            depth -= 1
+    return {
+        "package": package,
+        "types": types,
+        "imports": imports,
+        "wildcard_imports": wildcard_imports,
+        "static_imports": static_imports,
+    }
+
+
+def _file_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def index_file(file_path: str, known_hash: Optional[str] = None) -> Tuple[str, int, int, str, Optional[Dict]]:
+    """Reads a file once; returns (path, mtime_ns, size, hash, info), info None if the hash is known_hash."""
+    stat = os.stat(file_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    digest = _file_hash(data)
+    info = None if digest == known_hash else extract_java_info(data.decode("utf-8", errors="replace"))
+    return file_path, stat.st_mtime_ns, stat.st_size, digest, info
+
+
+def _index_batch(jobs: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, int, int, str, Optional[Dict]]]:
+    return [index_file(file_path, known_hash) for file_path, known_hash in jobs]
+
+
+def index_path_for(project_dir: str, cache_dir: str = INDEX_CACHE_DIR) -> str:
+    """Returns the index file of a project under cache_dir (stable across runs, separate per project path)."""
+    project_dir = os.path.abspath(project_dir)
+    name = os.path.basename(project_dir.rstrip(os.sep)) or "project"
+    digest = hashlib.sha256(project_dir.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}-{digest}.json")
+
+
+class JavaIndex:
+    """Declarations of every Java file under a project, persisted between runs."""
+
+    def __init__(self, index_path: str = INDEX_FILE):
+        self.index_path = index_path
+        self.files: Dict[str, Dict] = {}
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.files = data["files"]
+
+    def save(self) -> None:
+        if os.path.dirname(self.index_path):
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self, file_paths: Iterable[str], workers: Optional[int] = None,
+               files_per_batch: int = 256) -> Dict[str, int]:
+        """Re-indexes files whose mtime/size changed (and whose content did), drops files no longer listed."""
+        stats = {"parsed": 0, "touched": 0, "unchanged": 0, "removed": 0}
+        jobs = []
+        seen = set()
+        for file_path in file_paths:
+            seen.add(file_path)
+            entry = self.files.get(file_path)
+            if entry is not None:
+                stat = os.stat(file_path)
+                if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    stats["unchanged"] += 1
+                    continue
+            jobs.append((file_path, entry["hash"] if entry else None))
+
+        if len(jobs) < MIN_FILES_FOR_POOL:
+            results = _index_batch(jobs)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                results = [result for batch in executor.map(_index_batch, batched(jobs, files_per_batch))
+                           for result in batch]
+        for file_path, mtime_ns, size, digest, info in results:
+            entry = self.files.get(file_path)
+            if info is None:
+                # Only the timestamp changed; keep the parsed declarations
+                entry.update(mtime_ns=mtime_ns, size=size)
+                stats["touched"] += 1
+            else:
+                self.files[file_path] = {"mtime_ns": mtime_ns, "size": size, "hash": digest, **info}
+                stats["parsed"] += 1
+
+        for file_path in [file_path for file_path in self.files if file_path not in seen]:
+            del self.files[file_path]
+            stats["removed"] += 1
+        return stats
+
+    def update_directory(self, project_dir: str, workers: Optional[int] = None) -> Dict[str, int]:
+        return self.update(iter_source_files(project_dir), workers)
+
+    def types_by_name(self) -> Dict[str, str]:
+        """Fully qualified type name -> file declaring it."""
+        declared = {}
+        for file_path, entry in self.files.items():
+            prefix = f"{entry['package']}." if entry["package"] else ""
+            for type_name in entry["types"]:
+                declared[prefix + type_name] = file_path
+        return declared
+
+    def type_owners(self) -> Dict[str, str]:
+        """Fully qualified type name (nested types included) -> its fully qualified top-level type."""
+        owners = {}
+        for entry in self.files.values():
+            prefix = f"{entry['package']}." if entry["package"] else ""
+            for type_name in entry["types"]:
+                owners[prefix + type_name] = prefix + type_name.split(".")[0]
+        return owners
+
+    def types_by_package(self) -> Dict[str, List[str]]:
+        """Package -> fully qualified top-level types declared in it."""
+        packages: Dict[str, List[str]] = {}
+        for entry in self.files.values():
+            prefix = f"{entry['package']}." if entry["package"] else ""
+            packages.setdefault(entry["package"], []).extend(
+                prefix + type_name for type_name in entry["types"] if "." not in type_name)
+        return packages
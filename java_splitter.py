@@ -0,0 +1,85 @@
+from typing import List
+
+# Code-aware splitter for Java sources. Chunks end at a blank line at class-member depth or
+# shallower, i.e. between top-level declarations or between the members of a class, so methods
+# are not cut at a blank line inside their body and Javadoc stays with the member it documents.
+# Where a chunk has no such blank line (a member longer than a chunk), it ends at a line that
+# closes a member, then at any line end, and only a single line longer than a chunk is cut mid-line.
+#
+# Each chunk is packed greedily: the last candidate cut before the size limit is found with
+# str.rfind and its brace depth with str.count over the text between it and the last position
+# whose depth is known, so every character is handled by C string methods and Python only does a
+# few steps per chunk, which keeps this ahead of RecursiveCharacterTextSplitter (see
+# bench_chunking.py). Braces are counted as written, so braces in string literals and comments are
+# assumed to pair up, as in "{}" placeholders and {@link} tags; where they do not, cuts fall back to
+# line ends like the recursive splitter's, and no text is lost.
+
+_SEPARATORS = ("\n\n", "\n")
+
+
+def find_java_boundaries(text: str) -> List[int]:
+    """Returns offsets just after each blank line at class-member depth or shallower, and the text end."""
+    boundaries = []
+    depth = 0
+    position = -2
+    for part in text.split("\n\n"):
+        position += len(part) + 2
+        depth += part.count('{') - part.count('}')
+        if depth <= 1:
+            boundaries.append(position)
+    if not boundaries or boundaries[-1] != len(text):
+        boundaries.append(len(text))
+    return boundaries
+
+
+def _overlap_start(text: str, start: int, end: int, chunk_overlap: int) -> int:
+    """Start of the trailing whole lines of text[start:end] that fit within chunk_overlap characters."""
+    if chunk_overlap <= 0:
+        return end
+    tail_start = max(start, end - chunk_overlap)
+    if end - start > chunk_overlap:
+        newline = text.find('\n', tail_start, end)
+        if newline != -1:
+            tail_start = newline + 1
+    return tail_start
+
+
+def split_java(text: str, chunk_size: int = 1000, chunk_overlap: int = 100) -> List[str]:
+    """Splits Java source into chunks of at most chunk_size characters along declaration boundaries."""
+    chunks = []
+    rfind = text.rfind
+    count = text.count
+    start = 0     # Start of the current chunk, inside the previous chunk's overlap
+    searched = 0  # The current chunk must end after this (the previous chunk's end)
+    known = known_depth = 0  # Brace depth of text[:known]
+    while len(text) - start > chunk_size:
+        limit = start + chunk_size
+        end = -1
+        for separator in _SEPARATORS:
+            cut = rfind(separator, searched, limit)
+            while cut != -1:
+                candidate = cut + len(separator)
+                if candidate >= known:
+                    known_depth += count('{', known, candidate) - count('}', known, candidate)
+                else:
+                    known_depth -= count('{', candidate, known) - count('}', candidate, known)
+                known = candidate
+                if known_depth <= 1:
+                    end = candidate
+                    break
+                cut = rfind(separator, searched, cut)
+            if end != -1:
+                break
+        if end == -1:
+            newline = rfind('\n', searched, limit)
+            end = newline + 1 if newline != -1 else limit
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        tail_start = _overlap_start(text, start, end, chunk_overlap)
+        start = tail_start if end - tail_start < chunk_size else end
+        searched = end
+    chunk = text[start:].strip()
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -0,0 +1,467 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import concurrent.futures
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from java_index import MIN_FILES_FOR_POOL, index_path_for, _TOKENS as _BLOCK_TOKENS
+from source_loader import batched, iter_source_files
+
+# Structure of Java sources (types, nested types, fields, methods, parameters and Javadoc) from a
+# single tokenizer pass per file. Only declaration level code is tokenized: once a method body or
+# initializer block opens, it is skipped to its matching brace with the cheaper brace scanner of
+# java_index, so each method is attributed to exactly the type whose body declares it.
+# Parse results are cached by content hash, so unchanged files are not parsed again; each project's
+# cache lives in a cache directory (see cache_path_for), never in the working directory.
+
+STRUCTURE_CACHE_DIR = os.environ.get("JAVA_STRUCTURE_CACHE_DIR",
+                                     os.path.join(tempfile.gettempdir(), "java-structure-cache"))
+STRUCTURE_CACHE_PATH = os.environ.get("JAVA_STRUCTURE_CACHE_PATH")  # Overrides the per-project path
+CACHE_VERSION = 1
+
+_TOKEN = re.compile(
+    r'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*'
+    r'|"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\''
+    r'|[^\W\d][\w$]*|\$[\w$]*|\d[\w.]*|\.\.\.|\S')
+# Declaration-level scan: comments, literals and braces/semicolons one by one, everything else in
+# runs; only a finished statement is split into _TOKEN tokens.
+_SCAN = re.compile(
+    r'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*'
+    r'|"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|\'[^\'\\\n]*(?:\\.[^\'\\\n]*)*\''
+    r'|[{};]|[^{};/"\']+|/')
+_JAVADOC_LINE = re.compile(r"^[ \t]*\*+[ \t]?", re.M)
+
+_TYPE_KEYWORDS = frozenset(("class", "interface", "enum", "record"))
+_MODIFIERS = {"public", "protected", "private", "static", "final", "abstract", "native", "synchronized",
+              "transient", "volatile", "strictfp", "default", "sealed", "non-sealed"}
+_NOT_NAMES = {"new", "return", "throw", "if", "for", "while", "switch", "catch", "synchronized", "this", "super"}
+_OPEN = {"(": ")", "<": ">", "[": "]"}
+
+
+def clean_javadoc(comment: str) -> str:
+    """Text of a /** ... */ comment on one line, without the comment markers and leading asterisks."""
+    return " ".join(_JAVADOC_LINE.sub("", comment[3:-2]).split())
+
+
+def _is_identifier(token: str) -> bool:
+    return token[0].isalpha() or token[0] in "_$"
+
+
+def _join(tokens: List[str]) -> str:
+    """Source-like text of a token run, e.g. a type: ['Map', '<', 'K', ',', 'V', '>'] -> 'Map<K, V>'."""
+    if len(tokens) == 1:
+        return tokens[0]
+    parts = []
+    previous = ""
+    for token in tokens:
+        if (_is_identifier(token) or token[0].isdigit()) and previous and (
+                _is_identifier(previous) or previous[0].isdigit() or previous in (">", "]", "...")):
+            parts.append(" ")
+        parts.append(token)
+        if token == ",":
+            parts.append(" ")
+        previous = token
+    return "".join(parts)
+
+
+def _split_top(tokens: List[str]) -> List[List[str]]:
+    """Splits a token run at commas outside of (), <> and []."""
+    if "," not in tokens:
+        return [tokens] if tokens else []
+    segments = [[]]
+    depth = 0
+    for token in tokens:
+        if token in _OPEN:
+            depth += 1
+        elif token in (")", ">", "]"):
+            depth -= 1
+        elif token == "," and depth <= 0:
+            segments.append([])
+            continue
+        segments[-1].append(token)
+    return [segment for segment in segments if segment]
+
+
+def _closing(tokens: List[str], start: int) -> Optional[int]:
+    """Index of the token closing the bracket at tokens[start], or None if it is not closed."""
+    opening, closing = tokens[start], _OPEN[tokens[start]]
+    if tokens.count(opening) == 1:
+        return tokens.index(closing, start) if closing in tokens[start:] else None
+    depth = 0
+    for i in range(start, len(tokens)):
+        if tokens[i] == opening:
+            depth += 1
+        elif tokens[i] == closing:
+            depth -= 1
+            if not depth:
+                return i
+    return None
+
+
+def _strip_annotations(tokens: List[str]) -> Tuple[List[str], List[str]]:
+    """(annotations outside parentheses, remaining tokens); annotations on parameters are dropped."""
+    if "@" not in tokens:
+        return [], tokens
+    annotations, rest = [], []
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "@" and i + 1 < len(tokens) and tokens[i + 1] != "interface":
+            end = i + 2
+            while end + 1 < len(tokens) and tokens[end] == "." and _is_identifier(tokens[end + 1]):
+                end += 2
+            if end < len(tokens) and tokens[end] == "(":
+                end = (_closing(tokens, end) or len(tokens) - 1) + 1
+            if depth == 0:
+                annotations.append("@" + _join(tokens[i + 1:end]))
+            i = end
+            continue
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        rest.append(token)
+        i += 1
+    return annotations, rest
+
+
+def _skip_generics(tokens: List[str], start: int) -> int:
+    if start < len(tokens) and tokens[start] == "<":
+        return (_closing(tokens, start) or len(tokens) - 1) + 1
+    return start
+
+
+def _parameter(tokens: List[str]) -> str:
+    return _join([token for token in tokens if token != "final"])
+
+
+def _type_header(tokens: List[str]) -> Optional[Dict]:
+    if _TYPE_KEYWORDS.isdisjoint(tokens):
+        return None
+    for i, token in enumerate(tokens[:-1]):
+        if token not in _TYPE_KEYWORDS or (i and tokens[i - 1] == ".") or not _is_identifier(tokens[i + 1]):
+            continue
+        if token == "record" and tokens[i + 2:i + 3] not in (["("], ["<"]):
+            continue
+        item = {
+            "name": tokens[i + 1],
+            "kind": "annotation" if i and tokens[i - 1] == "@" else token,
+            "modifiers": [t for t in tokens[:i] if t in _MODIFIERS],
+            "extends": [],
+            "implements": [],
+            "fields": [],
+        }
+        position = _skip_generics(tokens, i + 2)
+        if token == "record" and position < len(tokens) and tokens[position] == "(":
+            close = _closing(tokens, position) or len(tokens)
+            for component in _split_top(tokens[position + 1:close]):
+                item["fields"].append({"name": component[-1], "type": _join(component[:-1])})
+            position = close + 1
+        clause = None
+        for segment_token in tokens[position:]:
+            if segment_token in ("extends", "implements", "permits"):
+                clause = [] if segment_token == "permits" else item[segment_token]
+                clause.append([])
+            elif clause is not None:
+                clause[-1].append(segment_token)
+        for key in ("extends", "implements"):
+            item[key] = [_join(segment) for part in item[key] for segment in _split_top(part)]
+        return item
+    return None
+
+
+def _method_header(tokens: List[str]) -> Optional[Dict]:
+    if "(" not in tokens:
+        return None
+    open_paren = tokens.index("(")
+    if not open_paren or not _is_identifier(tokens[open_paren - 1]) or tokens[open_paren - 1] in _NOT_NAMES:
+        return None
+    before = tokens[:open_paren - 1]
+    if "=" in before or "new" in before:
+        return None
+    close = _closing(tokens, open_paren)
+    if close is None:
+        return None
+    after = tokens[close + 1:]
+    if after and after[0] not in ("throws", "default", "["):
+        return None
+    remaining = [token for token in before if token not in _MODIFIERS]
+    return_type = _join(remaining[_skip_generics(remaining, 0):])
+    throws = after[1:] if after and after[0] == "throws" else []
+    return {
+        "name": tokens[open_paren - 1],
+        "constructor": not return_type,
+        "return_type": return_type or None,
+        "params": [_parameter(segment) for segment in _split_top(tokens[open_paren + 1:close])],
+        "throws": [_join(segment) for segment in _split_top(throws)],
+        "modifiers": [token for token in before if token in _MODIFIERS],
+        "default_value": "default" in after,
+    }
+
+
+def _fields(tokens: List[str]) -> List[Dict]:
+    fields = []
+    segments = _split_top([token for token in tokens if token not in _MODIFIERS])
+    for i, segment in enumerate(segments):
+        declaration = segment[:segment.index("=")] if "=" in segment else segment
+        names = [token for token in declaration if _is_identifier(token)]
+        if not names or (i == 0 and len(declaration) < 2):
+            continue
+        if i == 0:
+            name_index = max(j for j, token in enumerate(declaration) if _is_identifier(token))
+            fields.append({"name": declaration[name_index], "type": _join(declaration[:name_index])})
+        else:
+            fields.append({"name": names[0], "type": fields[0]["type"] if fields else None})
+    return fields
+
+
+def _enum_constants(tokens: List[str]) -> List[str]:
+    return [segment[0] for segment in _split_top(_strip_annotations(tokens)[1]) if _is_identifier(segment[0])]
+
+
+def _skip_block(text: str, position: int) -> int:
+    """Offset of the '}' closing a block whose '{' ends right before position."""
+    depth = 1
+    for match in _BLOCK_TOKENS.finditer(text, position):
+        brace = match.group()
+        if brace == "{":
+            depth += 1
+        elif brace == "}":
+            depth -= 1
+            if not depth:
+                return match.start()
+    return len(text)
+
+
+def extract_structure(text: str) -> Dict:
+    """Package, imports and declared types of one Java source, in a single pass.
+
+    Returns {"package", "imports", "wildcard_imports", "static_imports", "types": [{"name" (Outer.Inner
+    for nested types), "kind", "modifiers", "annotations", "extends", "implements", "javadoc", "line",
+    "fields": [{"name", "type"}], "constants", "methods": [{"name", "constructor", "return_type",
+    "params", "throws", "modifiers", "annotations", "javadoc", "line", "body"}]}]}. "body" is the
+    (start, end) character range of a method body, or None for abstract and interface methods.
+    """
+    package = ""
+    imports: List[str] = []
+    wildcard_imports: List[str] = []
+    static_imports: List[str] = []
+    types: List[Dict] = []
+    stack: List[List] = []  # [type, enum constants still pending] per open type body
+    statement: List[str] = []
+    statement_start = 0
+    statement_doc: Optional[str] = None
+    doc: Optional[str] = None
+    line_offset, line_number = 0, 1
+
+    def line_at(offset: int) -> int:
+        nonlocal line_offset, line_number
+        line_number += text.count("\n", line_offset, offset)
+        line_offset = offset
+        return line_number
+
+    def declared(item: Dict, annotations: List[str]) -> Dict:
+        item["annotations"] = annotations
+        item["javadoc"] = clean_javadoc(statement_doc) if statement_doc else None
+        item["line"] = line_at(statement_start)
+        return item
+
+    scanner = _SCAN.finditer(text)
+    while True:
+        match = next(scanner, None)
+        if match is None:
+            break
+        piece = match.group()
+        first = piece[0]
+        if first == "/" and len(piece) > 1 and piece[1] in "/*":
+            if piece.startswith("/**") and piece != "/**/":
+                if statement and statement_doc is None:
+                    statement_doc = piece
+                else:
+                    doc = piece
+            elif statement:
+                statement.append(" ")
+            continue
+        if first not in "{};":
+            if not statement:
+                if piece.isspace():
+                    continue
+                statement_start = match.start() + len(piece) - len(piece.lstrip())
+                statement_doc, doc = doc, None
+            statement.append(piece)
+            continue
+
+        tokens = _TOKEN.findall("".join(statement))
+        current = stack[-1] if stack else None
+        if piece == "{":
+            annotations, rest = _strip_annotations(tokens)
+            type_item = _type_header(rest)
+            if type_item is not None:
+                if current is not None:
+                    type_item["name"] = f"{current[0]['name']}.{type_item['name']}"
+                type_item.update(constants=[], methods=[])
+                types.append(declared(type_item, annotations))
+                stack.append([type_item, type_item["kind"] == "enum"])
+            else:
+                body_end = _skip_block(text, match.end())
+                scanner = _SCAN.finditer(text, body_end + 1)
+                method = _method_header(rest) if current is not None and not (current[1] or "=" in rest) else None
+                if method is None or method["default_value"]:
+                    if (current is not None and current[1]) or "=" in rest or (method and method["default_value"]):
+                        # Initializer, lambda or anonymous class in a field, or an enum constant body
+                        statement.append(" {} ")
+                        continue
+                else:
+                    method.pop("default_value")
+                    method["body"] = (match.end(), body_end)
+                    current[0]["methods"].append(declared(method, annotations))
+        elif piece == ";":
+            if current is None:
+                if tokens and tokens[0] == "package":
+                    package = "".join(tokens[1:])
+                elif tokens and tokens[0] == "import":
+                    name = "".join(tokens[2:] if tokens[1:2] == ["static"] else tokens[1:])
+                    if tokens[1:2] == ["static"]:
+                        static_imports.append(name[:-2] if name.endswith(".*") else name.rsplit(".", 1)[0])
+                    elif name.endswith(".*"):
+                        wildcard_imports.append(name[:-2])
+                    else:
+                        imports.append(name)
+            elif current[1]:
+                current[0]["constants"].extend(_enum_constants(tokens))
+                current[1] = False
+            else:
+                annotations, rest = _strip_annotations(tokens)
+                method = _method_header(rest)
+                if method is not None:
+                    method.pop("default_value")
+                    method["body"] = None
+                    current[0]["methods"].append(declared(method, annotations))
+                else:
+                    current[0]["fields"].extend(_fields(rest))
+        else:
+            if current is not None:
+                if current[1] and tokens:
+                    current[0]["constants"].extend(_enum_constants(tokens))
+                stack.pop()
+        statement = []
+        statement_doc = doc = None
+
+    return {
+        "package": package,
+        "imports": imports,
+        "wildcard_imports": wildcard_imports,
+        "static_imports": static_imports,
+        "types": types,
+    }
+
+
+def _file_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def _extract_file(file_path: str) -> Tuple[str, str, Dict]:
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return file_path, _file_hash(data), extract_structure(data.decode("utf-8", errors="replace"))
+
+
+def _extract_batch(file_paths: List[str]) -> List[Tuple[str, str, Dict]]:
+    return [_extract_file(file_path) for file_path in file_paths]
+
+
+def cache_path_for(project_dir: str, cache_dir: str = STRUCTURE_CACHE_DIR) -> str:
+    """Returns the structure cache file of a project (JAVA_STRUCTURE_CACHE_PATH if set)."""
+    return STRUCTURE_CACHE_PATH or index_path_for(project_dir, cache_dir)
+
+
+class StructureCache:
+    """Parsed structures keyed by file content hash, persisted between runs."""
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self.entries: Dict[str, Dict] = {}
+        self.used = set()
+        self.changed = False
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["entries"]
+
+    def get(self, digest: str) -> Optional[Dict]:
+        entry = self.entries.get(digest)
+        if entry is not None:
+            self.used.add(digest)
+        return entry
+
+    def put(self, digest: str, structure: Dict) -> None:
+        self.entries[digest] = structure
+        self.used.add(digest)
+        self.changed = True
+
+    def save(self, prune: bool = True) -> None:
+        """Writes the cache if it changed; with prune, only entries used since it was loaded are kept."""
+        if prune and len(self.used) < len(self.entries):
+            self.entries = {digest: entry for digest, entry in self.entries.items() if digest in self.used}
+            self.changed = True
+        if not self.cache_path or not self.changed:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        # json.dumps runs the C encoder; json.dump to a file streams through the much slower
+        # pure-Python one, which made storing a cold cache cost more than the parsing
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CACHE_VERSION, "entries": self.entries}))
+        os.replace(tmp_path, self.cache_path)
+        self.changed = False
+
+
+def extract_file(file_path: str, cache: Optional[StructureCache] = None) -> Dict:
+    with open(file_path, "rb") as f:
+        data = f.read()
+    digest = _file_hash(data)
+    structure = cache.get(digest) if cache is not None else None
+    if structure is None:
+        structure = extract_structure(data.decode("utf-8", errors="replace"))
+        if cache is not None:
+            cache.put(digest, structure)
+    return structure
+
+
+def extract_files(file_paths: Iterable[str], cache: Optional[StructureCache] = None,
+                  workers: Optional[int] = None, files_per_batch: int = 256) -> Dict[str, Dict]:
+    """Structure of every file (path -> structure); cache misses are parsed on a process pool.
+
+    The pool is only used with more than one worker (by default, one per CPU) and at least
+    MIN_FILES_FOR_POOL misses; otherwise they are parsed in this process.
+    """
+    structures: Dict[str, Dict] = {}
+    misses = []
+    for file_path in file_paths:
+        with open(file_path, "rb") as f:
+            cached = cache.get(_file_hash(f.read())) if cache is not None else None
+        structures[file_path] = cached
+        if cached is None:
+            misses.append(file_path)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(misses) < MIN_FILES_FOR_POOL:
+        results = _extract_batch(misses)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [result for batch in executor.map(_extract_batch, batched(misses, files_per_batch))
+                       for result in batch]
+    for file_path, digest, structure in results:
+        structures[file_path] = structure
+        if cache is not None:
+            cache.put(digest, structure)
+    return structures
+
+
+def extract_directory(project_dir: str, cache: Optional[StructureCache] = None,
+                      workers: Optional[int] = None) -> Dict[str, Dict]:
+    return extract_files(iter_source_files(project_dir), cache, workers)
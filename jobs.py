@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import subprocess
+import concurrent.futures
+from typing import Callable, Dict, List, Optional
+
+# Background jobs for long-running documentation requests. Each job gets its own working directory
+# and runs on a bounded worker pool; callers get a job id straight away and poll status/progress
+# (or follow the event list) while the work runs.
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+JOBS_DIR = os.environ.get("DOCS_JOBS_DIR", os.path.join(tempfile.gettempdir(), "doc-jobs"))
+MAX_WORKERS = int(os.environ.get("DOCS_MAX_WORKERS", "4"))
+MAX_PENDING = int(os.environ.get("DOCS_MAX_PENDING", "100"))
+JOB_TTL_SECONDS = int(os.environ.get("DOCS_JOB_TTL_SECONDS", str(24 * 3600)))
+
+_PERCENT = re.compile(r"(\d{1,3})%")
+
+
+class QueueFull(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+
+class Job:
+    """State of one job. Fields are only written by its worker; readers get snapshots via to_dict()."""
+
+    def __init__(self, job_id: str, workdir: str, params: Dict):
+        self.id = job_id
+        self.workdir = workdir
+        self.params = params
+        self.status = PENDING
+        self.stage = "queued"
+        self.progress = 0
+        self.events: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def update(self, stage: Optional[str] = None, progress: Optional[int] = None, message: Optional[str] = None,
+               status: Optional[str] = None):
+        """Records a progress step and appends it to the job's event list."""
+        with self._lock:
+            if status is not None:
+                self.status = status
+            if stage is not None:
+                self.stage = stage
+            if progress is not None:
+                self.progress = max(0, min(100, progress))
+            self.events.append({"stage": self.stage, "progress": self.progress, "message": message,
+                                "status": self.status, "time": time.time()})
+
+    def events_since(self, index: int) -> List[Dict]:
+        with self._lock:
+            return self.events[index:]
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool, one working directory per job."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING,
+                 jobs_dir: str = JOBS_DIR, ttl_seconds: int = JOB_TTL_SECONDS):
+        self.jobs_dir = jobs_dir
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="doc-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def submit(self, func: Callable[[Job], Dict], params: Dict) -> Job:
+        """Queues func(job) and returns the job at once; func's return value becomes the job result.
+
+        Never blocks on the filesystem beyond creating the job directory, so it is safe to call from
+        an event loop; expired jobs are cleaned up by the worker that picks the job up.
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == PENDING)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs are already waiting")
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, tempfile.mkdtemp(prefix=f"{job_id}-", dir=self.jobs_dir), params)
+            self._jobs[job_id] = job
+        job.update(message="queued")
+        self._pool.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Dict]):
+        self.cleanup()
+        job.update(stage="starting", message="started", status=RUNNING)
+        try:
+            job.result = func(job)
+            job.finished_at = time.time()
+            job.update(stage="done", progress=100, message="finished", status=SUCCEEDED)
+        except Exception as e:
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.update(stage="failed", message=job.error, status=FAILED)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cleanup(self):
+        """Forgets finished jobs older than the TTL and removes their working directories."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.done and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.workdir, ignore_errors=True)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_command(job: Job, command: List[str], stage: str, cwd: Optional[str] = None,
+                env: Optional[Dict[str, str]] = None) -> None:
+    """Runs a command for a job, turning each output line into a progress event.
+
+    Percentages printed by the command (e.g. tqdm bars) update the job's progress. env adds to (or
+    overrides) this process's environment.
+    Raises RuntimeError if the command exits with a non-zero status.
+    """
+    job.update(stage=stage, message=" ".join(command))
+    process = subprocess.Popen(command, cwd=cwd or job.workdir, env={**os.environ, **env} if env else None,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1)
+    tail = []
+    # Universal newlines also end a line at a carriage return, so tqdm bar redraws arrive one by one
+    for line in process.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        percents = _PERCENT.findall(line)
+        job.update(progress=int(percents[-1]) if percents else None, message=line)
+        tail = (tail + [line])[-5:]
+    if process.wait() != 0:
+        raise RuntimeError(f"{command[0]} exited with status {process.returncode}: " + "\n".join(tail))
@@ -3,18 +3,19 @@ from langchain.llms import OpenAI
 from langchain.document_loaders import DirectoryLoader
 from langchain.prompts import PromptTemplate
 
+from llm_cache import get_default_cache
+from llm_executor import LLMExecutor
+from source_loader import batched, iter_java_files
+from multi_section import extract_sections
+
 # Set up project path and OpenAI API key
 project_path = "/path/to/spring-petclinic"  # Update with actual project path
 openai_api_key = "your_openai_api_key"      # Replace with your OpenAI API key
 
 # Step 1: Collect Java Files for Analysis
-java_files = []
-for root, dirs, files in os.walk(project_path):
-    for file in files:
-        if file.endswith(".java"):
-            file_path = os.path.join(root, file)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                java_files.append({"filename": file_path, "content": f.read()})
+# Files are streamed lazily and processed in small batches, so memory stays flat with repo size
+java_files = iter_java_files(project_path)
+files_per_batch = 32
 
 # Step 2: Initialize LLM
 llm = OpenAI(model_name="gpt-4-turbo", api_key=openai_api_key)
@@ -48,25 +49,25 @@ File Content:
 """
 
 # Step 4: Process Each Java File
-key_components_text = "4. Key Code Components\n\n"
-for java_file in java_files:
-    file_content = java_file['content']
-    
-    # Generate Class and Method Details
-    class_prompt = class_component_prompt.format(file_content=file_content)
-    class_details = llm(class_prompt)
-    
-    # Generate Data Structure Details
-    data_structure_prompt_text = data_structure_prompt.format(file_content=file_content)
-    data_structure_details = llm(data_structure_prompt_text)
-    
-    # Combine results for this file
-    key_components_text += f"File: {java_file['filename']}\n\n"
-    key_components_text += "Classes and Methods:\n" + class_details + "\n"
-    key_components_text += "Data Structures:\n" + data_structure_details + "\n\n"
+# Class and data structure sections are requested in one combined prompt per file; the files of a
+# batch run concurrently through the shared executor, and each batch is written to the output file
+# (Step 5) as soon as it is done
+executor = LLMExecutor(llm, max_concurrency=8)
+section_prompts = {"classes": class_component_prompt, "data_structures": data_structure_prompt}
 
-# Step 5: Save Key Code Components to a File
 with open("key_code_components.txt", "w") as f:
-    f.write(key_components_text)
+    f.write("4. Key Code Components\n\n")
+    for batch in batched(java_files, files_per_batch):
+        for java_file, sections in zip(batch, extract_sections(executor, section_prompts, batch)):
+            class_details, data_structure_details = sections["classes"], sections["data_structures"]
+            for result in (class_details, data_structure_details):
+                if isinstance(result, Exception):
+                    raise result
+
+            # Combine results for this file
+            f.write(f"File: {java_file['filename']}\n\n")
+            f.write("Classes and Methods:\n" + class_details + "\n")
+            f.write("Data Structures:\n" + data_structure_details + "\n\n")
 
 print("Key Code Components section generated and saved as 'key_code_components.txt'")
+print(get_default_cache().format_stats())
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Table lineage across stored procedures, stored in SQLite: which tables each procedure reads and
+# writes, and which procedures it calls. Built from the JSON Lines written by proc_batch.py, so
+# questions like "which procedures write to Table2" are index lookups instead of a reparse of the
+# whole schema. Names are matched case-insensitively and without database/owner prefixes
+# ("dbo.Table2" and "[TABLE2]" are the same table); temp tables (#name) are left out.
+
+DEFAULT_INDEX_PATH = os.environ.get("LINEAGE_INDEX_PATH", "lineage.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS procedures (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    source TEXT NOT NULL,
+    line INTEGER,
+    error TEXT,
+    UNIQUE (source, name)
+);
+CREATE INDEX IF NOT EXISTS procedures_name_key ON procedures (name_key);
+CREATE TABLE IF NOT EXISTS table_access (
+    procedure_id INTEGER NOT NULL REFERENCES procedures (id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    table_key TEXT NOT NULL,
+    access TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_line INTEGER,
+    PRIMARY KEY (procedure_id, table_key, access)
+);
+CREATE INDEX IF NOT EXISTS table_access_table ON table_access (table_key, access);
+CREATE TABLE IF NOT EXISTS calls (
+    caller_id INTEGER NOT NULL REFERENCES procedures (id) ON DELETE CASCADE,
+    callee TEXT NOT NULL,
+    callee_key TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_line INTEGER,
+    PRIMARY KEY (caller_id, callee_key)
+);
+CREATE INDEX IF NOT EXISTS calls_callee ON calls (callee_key);
+"""
+
+
+def name_key(name: str) -> str:
+    """Lookup key of a table or procedure name: last dotted part, unquoted, lower case."""
+    return name.rsplit(".", 1)[-1].strip('[]"').lower()
+
+
+def iter_records(jsonl_paths: Iterable[str]) -> Iterator[Dict]:
+    """Streams procedure records from proc_batch.py output files."""
+    for path in jsonl_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LineageIndex:
+    """SQLite index of procedure -> tables read/written, table -> procedures and call edges."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add_records(self, records: Iterable[Dict]) -> int:
+        """Adds or replaces procedures from proc_batch records in one transaction; returns the count."""
+        count = 0
+        with self._conn:
+            for record in records:
+                self._add_record(record)
+                count += 1
+        return count
+
+    def _add_record(self, record: Dict) -> None:
+        # Replacing the procedure row drops its old table and call rows through the cascade
+        self._conn.execute("DELETE FROM procedures WHERE source = ? AND name = ?", (record["source"], record["name"]))
+        procedure_id = self._conn.execute(
+            "INSERT INTO procedures (name, name_key, source, line, error) VALUES (?, ?, ?, ?, ?)",
+            (record["name"], name_key(record["name"]), record["source"], record.get("line"), record.get("error")),
+        ).lastrowid
+        summary = record.get("summary") or {}
+
+        access_rows: Dict[tuple, List] = {}
+        for table, access in (summary.get("table_access") or {}).items():
+            if table.startswith("#"):
+                continue
+            for mode, lines in (("read", access["reads"]), ("write", access["writes"])):
+                if not lines:
+                    continue
+                row = access_rows.setdefault((name_key(table), mode), [procedure_id, table, name_key(table), mode, 0, None])
+                row[4] += len(lines)
+                row[5] = min(lines) if row[5] is None else min(row[5], *lines)
+        self._conn.executemany(
+            "INSERT INTO table_access (procedure_id, table_name, table_key, access, occurrences, first_line)"
+            " VALUES (?, ?, ?, ?, ?, ?)", access_rows.values())
+
+        call_rows: Dict[str, List] = {}
+        for call in summary.get("calls") or []:
+            row = call_rows.setdefault(name_key(call["procedure"]),
+                                       [procedure_id, call["procedure"], name_key(call["procedure"]), 0, call["line"]])
+            row[3] += 1
+        self._conn.executemany(
+            "INSERT INTO calls (caller_id, callee, callee_key, occurrences, first_line) VALUES (?, ?, ?, ?, ?)",
+            call_rows.values())
+
+    def build(self, jsonl_paths: Iterable[str]) -> int:
+        """Rebuilds the index from proc_batch.py output files; returns the number of procedures."""
+        with self._conn:
+            self._conn.execute("DELETE FROM procedures")
+        return self.add_records(iter_records(jsonl_paths))
+
+    def _procedures_accessing(self, table: str, access: Optional[str]) -> List[Dict]:
+        query = ("SELECT p.name, p.source, p.line, a.table_name, a.access, a.occurrences, a.first_line"
+                 " FROM table_access a JOIN procedures p ON p.id = a.procedure_id WHERE a.table_key = ?")
+        params = [name_key(table)]
+        if access:
+            query += " AND a.access = ?"
+            params.append(access)
+        rows = self._conn.execute(query + " ORDER BY p.name, a.access", params).fetchall()
+        return [{"procedure": name, "source": source, "line": line, "table": table_name, "access": mode,
+                 "occurrences": occurrences, "first_line": first_line}
+                for name, source, line, table_name, mode, occurrences, first_line in rows]
+
+    def writers(self, table: str) -> List[Dict]:
+        """Procedures that insert into, update, delete from or truncate a table."""
+        return self._procedures_accessing(table, "write")
+
+    def readers(self, table: str) -> List[Dict]:
+        """Procedures that select from a table (including in subqueries and joins)."""
+        return self._procedures_accessing(table, "read")
+
+    def tables_of(self, procedure: str) -> Dict[str, List[str]]:
+        """Tables a procedure reads and writes: {"read": [...], "write": [...]}."""
+        rows = self._conn.execute(
+            "SELECT DISTINCT a.access, a.table_name FROM table_access a JOIN procedures p ON p.id = a.procedure_id"
+            " WHERE p.name_key = ? ORDER BY a.table_name", (name_key(procedure),)).fetchall()
+        tables = {"read": [], "write": []}
+        for mode, table in rows:
+            tables[mode].append(table)
+        return tables
+
+    def callees(self, procedure: str, transitive: bool = False) -> List[str]:
+        """Procedures called by a procedure, directly or (transitive) through any chain of calls."""
+        if not transitive:
+            rows = self._conn.execute(
+                "SELECT DISTINCT c.callee FROM calls c JOIN procedures p ON p.id = c.caller_id"
+                " WHERE p.name_key = ? ORDER BY c.callee", (name_key(procedure),)).fetchall()
+            return [row[0] for row in rows]
+        rows = self._conn.execute(
+            "WITH RECURSIVE reach(key) AS ("
+            " SELECT c.callee_key FROM calls c JOIN procedures p ON p.id = c.caller_id WHERE p.name_key = ?"
+            " UNION SELECT c.callee_key FROM reach JOIN procedures p ON p.name_key = reach.key"
+            " JOIN calls c ON c.caller_id = p.id)"
+            " SELECT DISTINCT c.callee FROM calls c JOIN reach ON c.callee_key = reach.key ORDER BY c.callee",
+            (name_key(procedure),)).fetchall()
+        return [row[0] for row in rows]
+
+    def callers(self, procedure: str, transitive: bool = False) -> List[str]:
+        """Procedures that call a procedure, directly or (transitive) through any chain of calls."""
+        if not transitive:
+            rows = self._conn.execute(
+                "SELECT DISTINCT p.name FROM calls c JOIN procedures p ON p.id = c.caller_id"
+                " WHERE c.callee_key = ? ORDER BY p.name", (name_key(procedure),)).fetchall()
+            return [row[0] for row in rows]
+        rows = self._conn.execute(
+            "WITH RECURSIVE reach(key) AS ("
+            " SELECT p.name_key FROM calls c JOIN procedures p ON p.id = c.caller_id WHERE c.callee_key = ?"
+            " UNION SELECT p.name_key FROM reach JOIN calls c ON c.callee_key = reach.key"
+            " JOIN procedures p ON p.id = c.caller_id)"
+            " SELECT DISTINCT p.name FROM procedures p JOIN reach ON p.name_key = reach.key ORDER BY p.name",
+            (name_key(procedure),)).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        procedures, errors = self._conn.execute("SELECT COUNT(*), COUNT(error) FROM procedures").fetchone()
+        tables = self._conn.execute("SELECT COUNT(DISTINCT table_key) FROM table_access").fetchone()[0]
+        calls = self._conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        return {"procedures": procedures, "errors": errors, "tables": tables, "call_edges": calls}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the stored procedure table lineage index")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="SQLite index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="(Re)build the index from proc_batch.py JSON Lines output")
+    build.add_argument("jsonl", nargs="+")
+    build.add_argument("--append", action="store_true", help="Add or replace procedures instead of rebuilding")
+    for command, help_text in (("writers", "Procedures writing to a table"), ("readers", "Procedures reading a table")):
+        commands.add_parser(command, help=help_text).add_argument("table")
+    commands.add_parser("tables", help="Tables a procedure reads and writes").add_argument("procedure")
+    for command, help_text in (("callers", "Procedures calling a procedure"), ("callees", "Procedures called")):
+        query = commands.add_parser(command, help=help_text)
+        query.add_argument("procedure")
+        query.add_argument("--transitive", action="store_true")
+    args = parser.parse_args()
+
+    index = LineageIndex(args.index)
+    start = time.perf_counter()
+    if args.command == "build":
+        count = index.add_records(iter_records(args.jsonl)) if args.append else index.build(args.jsonl)
+        print(f"Indexed {count} procedures in {time.perf_counter() - start:.1f}s: {index.stats()} -> {args.index}")
+    elif args.command in ("writers", "readers"):
+        rows = index.writers(args.table) if args.command == "writers" else index.readers(args.table)
+        for row in rows:
+            # first_line counts from the start of the procedure, line is where it starts in the dump
+            print(f"{row['procedure']}  {row['table']} x{row['occurrences']}  "
+                  f"{row['source']}:{row['line'] + row['first_line'] - 1}")
+        print(f"{len(rows)} procedures in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args.command == "tables":
+        print(json.dumps(index.tables_of(args.procedure), indent=2))
+    else:
+        lookup = index.callers if args.command == "callers" else index.callees
+        for name in lookup(args.procedure, args.transitive):
+            print(name)
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
+
+# Shared on-disk cache for LLM responses, keyed by (prompt template, file content, model name).
+# Location, size bound and offline replay can be controlled through environment variables.
+# The default lives in a cache directory rather than the working directory, so every run shares it
+DEFAULT_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "llm-cache", "responses.sqlite"))
+DEFAULT_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+DEFAULT_OFFLINE = os.environ.get("LLM_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+class CacheMiss(KeyError):
+    """Raised in offline mode when a prompt has no cached answer."""
+
+
+def make_cache_key(prompt_template: str, file_content: str, model_name: Optional[str]) -> str:
+    """Hashes the prompt template, file content and model name into a cache key."""
+    digest = hashlib.sha256()
+    for part in (prompt_template, file_content, model_name or ""):
+        data = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def render_prompt(prompt_template: str, file_content: str) -> str:
+    """Fills {file_content} in the template, or appends the content when there is no placeholder."""
+    if "{file_content}" in prompt_template:
+        return prompt_template.format(file_content=file_content)
+    if not file_content:
+        return prompt_template
+    return f"{prompt_template}\n\n{file_content}"
+
+
+class LLMCache:
+    """SQLite-backed response cache with size-bounded LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = DEFAULT_OFFLINE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for a key and marks it as recently used."""
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Stores a response and evicts the least recently used entries beyond the size bound."""
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_or_generate(self, prompt_template: str, file_content: str, model_name: Optional[str], generate: Callable[[], str]) -> str:
+        """Returns the cached answer for the key parts, calling generate() and storing its result on a miss."""
+        key = make_cache_key(prompt_template, file_content, model_name)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        if self.offline:
+            raise CacheMiss(f"No cached response for key {key} (offline mode)")
+        response = generate()
+        self.put(key, response)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters along with the number and total size of cached entries."""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        return (f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_default_cache: Optional[LLMCache] = None
+
+
+def get_default_cache() -> LLMCache:
+    """Returns the process-wide cache shared by all section generators."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMCache()
+    return _default_cache
+
+
+def cached_llm_call(llm, prompt_template: str, file_content: str = "", model_name: Optional[str] = None,
+                    cache: Optional[LLMCache] = None) -> str:
+    """Calls llm(prompt) through the shared cache, keyed by template, file content and model name."""
+    cache = cache or get_default_cache()
+    model_name = model_name or getattr(llm, "model_name", None)
+    return cache.get_or_generate(prompt_template, file_content, model_name,
+                                 lambda: llm(render_prompt(prompt_template, file_content)))
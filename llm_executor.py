@@ -0,0 +1,175 @@
+import json
+import time
+import random
+import asyncio
+import urllib.error
+import urllib.request
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from llm_cache import LLMCache, get_default_cache, make_cache_key, render_prompt, CacheMiss
+
+# Shared asyncio executor that every generator submits prompts to: bounded concurrency,
+# token-bucket rate limiting (requests and tokens per minute), jittered retries, ordered results.
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitError(Exception):
+    """Raised by LLM clients when the provider answers 429; retry_after is in seconds if known."""
+
+    def __init__(self, message: str = "Rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token) used for rate limiting."""
+    return max(1, len(text) // 4)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Decides whether an LLM call failure is transient and worth retrying."""
+    if isinstance(error, RateLimitError):
+        return True
+    if (getattr(error, "status_code", None) or getattr(error, "code", None)) in RETRYABLE_STATUS_CODES:
+        return True
+    # OpenAI/langchain errors are matched by name so their packages stay optional here
+    name = type(error).__name__
+    return any(marker in name for marker in ("RateLimit", "Timeout", "APIConnection", "ServiceUnavailable"))
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute, holding at most capacity tokens."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LLMExecutor:
+    """Runs prompts against an LLM with bounded concurrency, rate limits and retries.
+
+    `llm` may be a plain callable (e.g. a langchain OpenAI instance), which is run in a worker
+    thread, or an async callable taking the prompt.
+    """
+
+    def __init__(self, llm: Callable, max_concurrency: int = 8, requests_per_minute: Optional[float] = 500,
+                 tokens_per_minute: Optional[float] = 150000, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 30.0, cache: Optional[LLMCache] = None, model_name: Optional[str] = None):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = cache
+        self.model_name = model_name or getattr(llm, "model_name", None)
+        self.retries = 0
+
+    def _setup(self) -> None:
+        # asyncio primitives are bound to the running loop, so they are created per run
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = TokenBucket(self.requests_per_minute) if self.requests_per_minute else None
+        self._token_bucket = TokenBucket(self.tokens_per_minute) if self.tokens_per_minute else None
+
+    async def _call(self, prompt: str) -> str:
+        if asyncio.iscoroutinefunction(self.llm) or asyncio.iscoroutinefunction(getattr(self.llm, "__call__", None)):
+            return await self.llm(prompt)
+        return await asyncio.to_thread(self.llm, prompt)
+
+    async def submit(self, prompt: str) -> str:
+        """Sends one prompt, waiting for a concurrency slot and rate-limit budget, retrying transient errors."""
+        attempt = 0
+        while True:
+            if self._request_bucket:
+                await self._request_bucket.acquire(1)
+            if self._token_bucket:
+                await self._token_bucket.acquire(estimate_tokens(prompt))
+            try:
+                async with self._semaphore:
+                    return await self._call(prompt)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                # Full jitter backoff, but never sooner than the server's Retry-After hint
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                delay = max(delay, getattr(e, "retry_after", None) or 0)
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def submit_cached(self, prompt_template: str, file_content: str = "") -> str:
+        """Like submit(), but answers from the shared LLM cache when possible and stores new responses."""
+        cache = self.cache or get_default_cache()
+        key = make_cache_key(prompt_template, file_content, self.model_name)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+        if cache.offline:
+            raise CacheMiss(f"No cached response for key {key} (offline mode)")
+        response = await self.submit(render_prompt(prompt_template, file_content))
+        await asyncio.to_thread(cache.put, key, response)
+        return response
+
+    async def map_cached(self, jobs: Sequence[Tuple[str, str]], progress: Optional[Callable[[], None]] = None) -> List:
+        """Runs (prompt_template, file_content) jobs concurrently; results (or exceptions) keep the input order."""
+        self._setup()
+
+        async def run(template, content):
+            try:
+                return await self.submit_cached(template, content)
+            except Exception as e:
+                return e
+            finally:
+                if progress:
+                    progress()
+
+        return await asyncio.gather(*(run(template, content) for template, content in jobs))
+
+    def run_all(self, jobs: Sequence[Tuple[str, str]], progress: Optional[Callable[[], None]] = None) -> List:
+        """Synchronous entry point for scripts: runs map_cached() in a fresh event loop."""
+        return asyncio.run(self.map_cached(jobs, progress))
+
+
+class HTTPCompletionClient:
+    """Minimal async client for an OpenAI-style /v1/completions endpoint (e.g. fake_llm_server.py)."""
+
+    def __init__(self, base_url: str, model_name: str = "gpt-4-turbo", api_key: Optional[str] = None, timeout: float = 60):
+        self.url = base_url.rstrip("/") + "/v1/completions"
+        self.model_name = model_name
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _post(self, prompt: str) -> str:
+        body = json.dumps({"model": self.model_name, "prompt": prompt}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        if self.api_key:
+            request.add_header("Authorization", f"Bearer {self.api_key}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)["choices"][0]["text"]
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                retry_after = e.headers.get("Retry-After")
+                raise RateLimitError(f"429 from {self.url}", float(retry_after) if retry_after else None) from e
+            raise
+
+    async def __call__(self, prompt: str) -> str:
+        return await asyncio.to_thread(self._post, prompt)
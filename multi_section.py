@@ -0,0 +1,72 @@
+import re
+import textwrap
+from typing import Dict, List, Sequence, Union
+
+from llm_executor import LLMExecutor
+
+# Single-pass multi-section extraction: instead of sending a file once per section, one structured
+# prompt asks for every per-file section at once and the answer is split back on section markers.
+# Sections the model leaves out are filled in with the original one-section prompt.
+
+SECTION_MARKER = "### SECTION: {name}"
+_MARKER_PATTERN = re.compile(r"^[ \t]*#{1,6}[ \t]*SECTION:[ \t]*(\S+)[ \t]*$", re.MULTILINE)
+_CONTENT_PLACEHOLDER = re.compile(r"(?:^[ \t]*File Content:[ \t]*\n)?^[ \t]*\{file_content\}[ \t]*$", re.MULTILINE)
+
+
+def section_instructions(prompt_template: str) -> str:
+    """Strips the file content placeholder (and its 'File Content:' label) from a per-file template."""
+    return textwrap.dedent(_CONTENT_PLACEHOLDER.sub("", prompt_template)).strip()
+
+
+def build_multi_section_prompt(section_prompts: Dict[str, str]) -> str:
+    """Combines per-file section templates into one template that asks for all sections at once."""
+    parts = [
+        "Analyze the following Java file once and produce every section listed below.",
+        "Start each section with its marker line exactly as shown, and write nothing outside the sections.",
+        "",
+    ]
+    for name, template in section_prompts.items():
+        parts.append(SECTION_MARKER.format(name=name))
+        parts.append(section_instructions(template))
+        parts.append("")
+    parts.append("File Content:")
+    parts.append("{file_content}")
+    return "\n".join(parts)
+
+
+def split_multi_section_response(response: str, section_names: Sequence[str]) -> Dict[str, str]:
+    """Splits a combined answer back into sections; sections without a marker are left out."""
+    sections = {}
+    matches = list(_MARKER_PATTERN.finditer(response))
+    for i, match in enumerate(matches):
+        name = match.group(1)
+        if name not in section_names or name in sections:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        sections[name] = response[match.end():end].strip()
+    return sections
+
+
+def extract_sections(executor: LLMExecutor, section_prompts: Dict[str, str],
+                     java_files: Sequence[Dict[str, str]]) -> List[Dict[str, Union[str, Exception]]]:
+    """Runs one combined prompt per file and returns {section name: text or exception} per file, in order."""
+    names = list(section_prompts)
+    template = build_multi_section_prompt(section_prompts)
+    responses = executor.run_all([(template, java_file['content']) for java_file in java_files])
+
+    results = []
+    missing = []
+    for i, response in enumerate(responses):
+        if isinstance(response, Exception):
+            results.append({name: response for name in names})
+            continue
+        sections = split_multi_section_response(response, names)
+        missing.extend((i, name) for name in names if name not in sections)
+        results.append(sections)
+
+    # Fall back to the single-section prompt for anything the combined answer did not contain
+    if missing:
+        fallback = executor.run_all([(section_prompts[name], java_files[i]['content']) for i, name in missing])
+        for (i, name), response in zip(missing, fallback):
+            results[i][name] = response if isinstance(response, Exception) else response.strip()
+    return results
@@ -1,7 +1,25 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
 import sqlglot
+from sqlglot.expressions import Expression
+
+# sqlglot view of Sybase SQL. Trees are walked iteratively, so deeply nested T-SQL cannot hit the
+# recursion limit, and walk() yields (depth, node type, key, value) lazily with optional filtering
+# by node type. Parses are memoized by a hash of the SQL text, and dump_structure() turns a tree
+# into flat rows that other tools can load without parsing printed text.
+# T-SQL is the closest sqlglot dialect to Sybase; SQL_DIALECT overrides it ("" for sqlglot's default).
+
+DEFAULT_DIALECT = os.environ.get("SQL_DIALECT", "tsql") or None
+PARSE_CACHE_SIZE = int(os.environ.get("SQL_PARSE_CACHE_SIZE", 256))
 
 # Sample Sybase SQL code (simplified)
-sql_code = """
+SAMPLE_SQL = """
     CREATE PROCEDURE my_proc AS
     BEGIN
         DECLARE @id INT;
@@ -13,24 +31,124 @@ sql_code = """
     END;
 """
 
-# Parse SQL code
-parsed_tree = sqlglot.parse_one(sql_code)
-
-# Helper function to print the AST recursively
-def print_ast(node, level=0):
-    indent = "  " * level
-    print(f"{indent}{node.__class__.__name__}: {node}")
-
-    # Recursively print child nodes if available
-    for arg, value in node.args.items():
-        print(f"{indent}  {arg}:")
-        if isinstance(value, list):
-            for v in value:
-                print_ast(v, level + 2)
-        elif isinstance(value, sqlglot.expressions.Expression):
-            print_ast(value, level + 2)
+_parse_cache: "OrderedDict[str, Expression]" = OrderedDict()
+
+
+def sql_hash(sql: str, dialect: Optional[str] = DEFAULT_DIALECT) -> str:
+    """Cache key of a parse: the SQL text and the dialect it is read with."""
+    return hashlib.sha1(f"{dialect or ''}\x00{sql}".encode("utf-8")).hexdigest()
+
+
+def parse_sql(sql: str, dialect: Optional[str] = DEFAULT_DIALECT) -> Expression:
+    """Parses SQL into a sqlglot tree, memoized by SQL hash (least recently used trees are dropped).
+
+    The same tree object is returned for the same SQL; treat it as read-only or copy() it first.
+    """
+    key = sql_hash(sql, dialect)
+    tree = _parse_cache.get(key)
+    if tree is not None:
+        _parse_cache.move_to_end(key)
+        return tree
+    tree = sqlglot.parse_one(sql, read=dialect)
+    _parse_cache[key] = tree
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return tree
+
+
+def _matches(node, types) -> bool:
+    return any(node.__class__.__name__ == t if isinstance(t, str) else isinstance(node, t) for t in types)
+
+
+def _walk(node: Expression, types=None, max_depth: Optional[int] = None):
+    """walk() with a fifth element: the index (in yield order) of the nearest yielded ancestor, or -1."""
+    if isinstance(types, (str, type)):
+        types = (types,)
+    count = 0
+    stack = [(0, None, node, -1)]
+    while stack:
+        depth, key, value, parent = stack.pop()
+        if not isinstance(value, Expression):
+            if types is None:
+                yield depth, type(value).__name__, key, value, parent
+                count += 1
+            continue
+        if types is None or _matches(value, types):
+            yield depth, value.__class__.__name__, key, value, parent
+            parent = count
+            count += 1
+        if max_depth is not None and depth >= max_depth:
+            continue
+        children = []
+        for arg, arg_value in value.args.items():
+            for child in (arg_value if isinstance(arg_value, list) else [arg_value]):
+                if child is not None:
+                    children.append((depth + 1, arg, child, parent))
+        stack.extend(reversed(children))
+
+
+def walk(node: Expression, types=None,
+         max_depth: Optional[int] = None) -> Iterator[Tuple[int, str, Optional[str], object]]:
+    """Yields (depth, node type, key, value) for the tree in pre-order, without recursion.
+
+    key is the argument name under which the value hangs in its parent (None for the root). For
+    expression nodes value is the node itself; plain argument values (names, flags) are yielded with
+    their Python type as node type. With types (an expression class or class name, or a collection
+    of them) only matching nodes are yielded, but the whole tree is still visited; max_depth stops
+    descending below it.
+    """
+    for depth, node_type, key, value, _ in _walk(node, types, max_depth):
+        yield depth, node_type, key, value
+
+
+def dump_structure(node: Expression, types=None) -> List[list]:
+    """Flat rows [index, parent index, depth, node type, key, value] for the tree, in walk order.
+
+    value is None for expression nodes and the plain value otherwise; parent index is -1 for the
+    root, so consumers can rebuild the tree. With types only matching nodes are listed, and parent
+    index is the nearest listed ancestor.
+    """
+    return [[index, parent, depth, node_type, key, None if isinstance(value, Expression) else value]
+            for index, (depth, node_type, key, value, parent) in enumerate(_walk(node, types))]
+
+
+def print_ast(node: Expression, types=None, max_depth: Optional[int] = None, file=None) -> None:
+    """Prints the tree one line per node: its type, or the value of plain arguments."""
+    file = file or sys.stdout
+    for depth, node_type, key, value in walk(node, types, max_depth):
+        label = f"{key}: " if key else ""
+        if isinstance(value, Expression):
+            print(f"{'  ' * depth}{label}{node_type}", file=file)
         else:
-            print(f"{indent}    {value}")
+            print(f"{'  ' * depth}{label}{value!r}", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print or dump the sqlglot tree of a SQL file")
+    parser.add_argument("sql_file", nargs="?", help="SQL to parse (default: a sample procedure)")
+    parser.add_argument("--dialect", default=DEFAULT_DIALECT)
+    parser.add_argument("--types", help="Comma-separated node types to list, e.g. Table,Column")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--json", action="store_true", help="Write the structural dump as JSON instead")
+    args = parser.parse_args()
+
+    if args.sql_file:
+        with open(args.sql_file, "r", encoding="utf-8") as f:
+            sql_code = f.read()
+    else:
+        sql_code = SAMPLE_SQL
+    types = args.types.split(",") if args.types else None
+
+    # Parse SQL code
+    parsed_tree = parse_sql(sql_code, args.dialect)
+
+    # Print the parsed tree structure, or dump it for other tools
+    if args.json:
+        json.dump(dump_structure(parsed_tree, types), sys.stdout, default=str)
+        print()
+    else:
+        print_ast(parsed_tree, types, args.max_depth)
+
 
-# Print the parsed tree structure
-print_ast(parsed_tree)
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,67 @@
+import os
+import time
+import logging
+import contextlib
+from collections import Counter
+
 import sqlparse
 from sqlparse.sql import IdentifierList, Identifier, Parenthesis
-from sqlparse.tokens import Keyword, DML, DDL, Name, Whitespace, Comparison, String, Punctuation
+from sqlparse.tokens import (Keyword, DML, Name, Whitespace, Comparison, String, Punctuation, Operator, Comment,
+                             Number)
+
+# Tracing is off by default. Levels: INFO logs one line per procedure (timings and statement
+# counts), DEBUG adds declarations, assignments and statement summaries, and TRACE adds every token.
+# Call sites check a flag computed once per procedure, so disabled tracing costs a branch per token.
+# PROC_PARSE_TRACE=<level> turns it on, including in worker processes.
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+logger = logging.getLogger("parse_storedproc")
+
+
+def enable_tracing(level="DEBUG"):
+    """Sends the parser's trace to stderr at level (a name such as "TRACE", "DEBUG" or "INFO")."""
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(process)d %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+if os.environ.get("PROC_PARSE_TRACE"):
+    enable_tracing(os.environ["PROC_PARSE_TRACE"])
+
+
+class ParseProfile:
+    """Where parsing one procedure spent its time (ms per phase) and what it found."""
+
+    def __init__(self):
+        self.timings = Counter()
+        self.statement_types = Counter()
+        self.tokens = 0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += (time.perf_counter() - start) * 1000
+
+    def to_dict(self):
+        return {
+            "timings_ms": {phase: round(ms, 3) for phase, ms in self.timings.items()},
+            "total_ms": round(sum(self.timings.values()), 3),
+            "tokens": self.tokens,
+            "statement_types": dict(self.statement_types),
+        }
+
+
+@contextlib.contextmanager
+def _no_phase(name):
+    yield
+
 
 def extract_identifiers(token):
     """Helper to extract table/column identifiers from tokens."""
@@ -14,12 +75,291 @@ def extract_identifiers(token):
         identifiers.extend(extract_identifiers(token))
     return identifiers
 
-def parse_stored_procedure(proc_text):
+# Keywords that start a clause in which variables are read, written or declared differently. Other
+# keywords (CASE, WHEN, AND, ELSE, END, ...) leave the current clause as it is.
+_CLAUSE_KEYWORDS = {
+    'SELECT': 'select', 'SET': 'set', 'DECLARE': 'declare', 'EXEC': 'exec', 'EXECUTE': 'exec',
+    'FETCH': 'fetch', 'UPDATE': 'update', 'INSERT': 'insert', 'DELETE': 'delete', 'FROM': 'from',
+    'WHERE': 'where', 'VALUES': 'values', 'IF': 'if', 'WHILE': 'while', 'RETURN': 'return',
+    'PRINT': 'print', 'RAISERROR': 'raiserror', 'HAVING': 'having', 'GROUP BY': 'group by',
+    'ORDER BY': 'order by', 'ON': 'on', 'CURSOR': 'cursor', 'OPEN': 'open', 'CLOSE': 'close',
+    'DEALLOCATE': 'deallocate', 'WAITFOR': 'waitfor',
+}
+_ASSIGNMENT_CLAUSES = ('select', 'set')
+
+
+class SymbolTable:
+    """Variables of a procedure with their declaration and def/use sites, built in one token pass.
+
+    symbols maps each local variable (with its @) to {"kind", "type", "line", "defs", "uses"}: kind is
+    "parameter", "output parameter", "local" or None when it is never declared, line the declaration
+    line, and defs/uses the lines where it is written and read. Lines count from the start of the
+    parsed text. variables maps declared or assigned variables to their first assigned expression.
+    """
+
+    def __init__(self, debug=False):
+        self.symbols = {}
+        self.variables = {}
+        self.line = 1
+        self.tokens = 0
+        self._debug = debug
+
+    def _symbol(self, name):
+        symbol = self.symbols.get(name)
+        if symbol is None:
+            symbol = self.symbols[name] = {'kind': None, 'type': None, 'line': None, 'defs': [], 'uses': []}
+        return symbol
+
+    def scan_statement(self, stmt):
+        """Records the variables of one parsed statement; returns its (reads, writes) in order."""
+        reads, writes = {}, {}
+        clause, previous_keyword = None, None
+        depth = case_depth = 0
+        prev = None  # Upper-cased value of the previous significant token
+        pending = None  # (name, line, prev, clause): a variable waiting for the token after it
+        declaring = None  # [symbol, type parts, depth] while a declaration's type follows
+        assigning = None  # [name, expression parts, depth] while an assigned expression follows
+        at = None  # "@" or "@@" operator glued to the name token after it
+        last_parameter = None
+
+        def resolve(name, line, before, var_clause, after):
+            nonlocal declaring, assigning, last_parameter
+            if var_clause == 'exec' and after == '=' and before not in ('EXEC', 'EXECUTE'):
+                return  # "@param = value" names a parameter of the called procedure
+            symbol = self._symbol(name)
+            if var_clause == 'params' or (var_clause == 'declare' and before in ('DECLARE', ',')):
+                symbol['kind'] = 'parameter' if var_clause == 'params' else 'local'
+                symbol['line'] = line
+                self.variables.setdefault(name, None)
+                declaring = [symbol, [], depth]
+                last_parameter = symbol if var_clause == 'params' else None
+                if self._debug:
+                    logger.debug("Declared Variable: %s", name)
+                return
+            write = (after == '=' and (var_clause in _ASSIGNMENT_CLAUSES and before in ('SELECT', 'SET', ',')
+                                       or var_clause == 'exec')) or var_clause == 'fetch into'
+            if write:
+                writes[name] = None
+                symbol['defs'].append(line)
+                if after == '=' and var_clause in _ASSIGNMENT_CLAUSES:
+                    assigning = [name, [], depth]
+            else:
+                reads[name] = None
+                symbol['uses'].append(line)
+                if after in ('OUTPUT', 'OUT') and var_clause == 'exec':
+                    writes[name] = None
+                    symbol['defs'].append(line)
+
+        def finish_assignment():
+            nonlocal assigning
+            name, parts, _ = assigning
+            assigning = None
+            value = " ".join("".join(parts).split())
+            if self.variables.get(name) is None:
+                self.variables[name] = value
+                if self._debug:
+                    logger.debug("Assigned Variable: %s = %s", name, value)
+
+        for token in stmt.flatten():
+            self.tokens += 1
+            ttype, value = token.ttype, token.value
+            name = None
+            if at is not None:
+                glued, at = at, None
+                if ttype in Name:
+                    if glued == '@@':  # A global such as @@rowcount
+                        prev = '@@'
+                        continue
+                    name = '@' + value
+            elif ttype in Name and value.startswith('@') and not value.startswith('@@'):
+                name = value
+            if name is None and (ttype in Whitespace or ttype in Comment):
+                self.line += value.count('\n')
+                if assigning is not None:
+                    assigning[1].append(' ')
+                continue
+            upper = value.upper()
+            if pending is not None:
+                resolve(*pending, name or upper)
+                pending = None
+            if name is not None:
+                pending = (name, self.line, prev, clause)
+                declaring = None
+                if assigning is not None:
+                    assigning[1].append(name)
+                prev = name
+                continue
+            if ttype in Operator and value in ('@', '@@'):
+                at = value
+                continue
+
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+            if ttype in Keyword:
+                # The lexer joins END with the keyword after it ("end\n if"), GROUP BY may span a newline
+                words = upper.split()
+                keywords = ['END', " ".join(words[1:])] if len(words) > 1 and words[0] == 'END' else [" ".join(words)]
+                for keyword in keywords:
+                    if keyword == 'CASE':
+                        case_depth += 1
+                    elif keyword == 'END' and case_depth:
+                        case_depth -= 1
+                    elif keyword in ('END', 'BEGIN', 'ELSE') and assigning is not None:
+                        finish_assignment()
+                    if keyword in ('PROCEDURE', 'PROC') and previous_keyword == 'CREATE':
+                        clause = 'params'
+                    elif keyword == 'AS' and clause == 'params':
+                        clause = None
+                    elif keyword in ('OUTPUT', 'OUT') and clause == 'params' and last_parameter is not None:
+                        last_parameter['kind'] = 'output parameter'
+                    elif depth == 0 and (keyword == 'INTO' or keyword in _CLAUSE_KEYWORDS):
+                        if keyword != 'INTO':
+                            clause = _CLAUSE_KEYWORDS[keyword]
+                        else:
+                            clause = 'fetch into' if clause == 'fetch' else 'into'
+                        if assigning is not None:
+                            finish_assignment()
+                    previous_keyword = keyword
+            if assigning is not None:
+                if value == ',' and depth <= assigning[2]:
+                    finish_assignment()
+                elif assigning[1] or value != '=':
+                    assigning[1].append(value)
+            if declaring is not None:
+                if (value in (',', '=') and depth <= declaring[2]) or depth < declaring[2] or ttype in Keyword:
+                    if declaring[1]:
+                        declaring[0]['type'] = "".join(declaring[1])
+                    declaring = None
+                else:
+                    declaring[1].append(value)
+            self.line += value.count('\n')
+            prev = upper
+
+        if pending is not None:
+            resolve(*pending, None)
+        if declaring is not None and declaring[1]:
+            declaring[0]['type'] = "".join(declaring[1])
+        if assigning is not None:
+            finish_assignment()
+        return list(reads), list(writes)
+
+
+class TableAccess:
+    """Tables a procedure reads and writes and the procedures it calls, from one token pass per statement.
+
+    tables maps each table name (owner and database prefixes kept, brackets and quotes removed) to
+    {"reads": [lines], "writes": [lines]}; calls lists {"procedure", "line"} per EXEC of a named
+    procedure. Tables after FROM/JOIN are read, after INSERT/INTO/UPDATE/DELETE/TRUNCATE TABLE
+    written; subqueries are included.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+        self.line = 1
+
+    def _record(self, parts, mode, line):
+        name = ".".join(part.strip('[]"') for part in "".join(parts).split("."))
+        if mode == 'call':
+            self.calls.append({'procedure': name, 'line': line})
+        else:
+            self.tables.setdefault(name, {'reads': [], 'writes': []})[mode + 's'].append(line)
+
+    def scan_statement(self, stmt):
+        expect = None  # 'read', 'write' or 'call' when the next name is a table or procedure
+        parts, mode, name_line = [], None, 0  # Dotted name being collected
+        depth = 0
+        from_list_depth = None  # Depth of an open FROM list, where a comma introduces another table
+        previous_keyword = None
+        glued = False  # "@" operator, the next name token is a variable
+
+        for token in stmt.flatten():
+            ttype, value = token.ttype, token.value
+            if ttype in Whitespace or ttype in Comment:
+                self.line += value.count('\n')
+                continue
+            # Any word can name a table: sqlparse lexes many common names (Data, Source, Audit) as
+            # keywords. Only the keywords that lead to the name (DELETE FROM, INSERT INTO) are skipped.
+            is_name = (not (ttype in Punctuation or ttype in Operator or ttype in Comparison)
+                       and (ttype in String.Symbol or not (ttype in String or ttype in Number))
+                       and not value.startswith('@')
+                       and not (ttype in Keyword and value.upper() in ('FROM', 'INTO', 'TABLE')))
+            if parts:
+                if value == '.' or (parts[-1] == '.' and is_name):
+                    parts.append(value)
+                    continue
+                self._record(parts, mode, name_line)
+                parts = []
+            if glued:
+                glued = False
+                if ttype in Name:
+                    continue
+            if ttype in Operator and value in ('@', '@@'):
+                glued = True
+                continue
+            if expect and is_name:
+                parts, mode, name_line, expect = [value], expect, self.line, None
+                continue
+            if expect == 'call' and (ttype in Name or value == '='):
+                continue  # "EXEC @status = proc": the return status comes before the procedure name
+
+            expect = None
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+                if from_list_depth is not None and depth < from_list_depth:
+                    from_list_depth = None
+            elif value == ',' and depth == from_list_depth:
+                expect = 'read'
+            elif ttype in Keyword:
+                keyword = " ".join(value.upper().split())
+                if keyword == 'FROM':
+                    expect = 'write' if previous_keyword == 'DELETE' else 'read'
+                    from_list_depth = depth
+                elif keyword.endswith('JOIN'):
+                    expect = 'read'
+                    from_list_depth = depth
+                elif keyword in ('INSERT', 'INTO', 'UPDATE', 'DELETE'):
+                    expect = 'write'
+                elif keyword == 'TABLE' and previous_keyword == 'TRUNCATE':
+                    expect = 'write'
+                elif keyword in ('EXEC', 'EXECUTE'):
+                    expect = 'call'
+                ends_list = keyword in _CLAUSE_KEYWORDS and keyword != 'ON' or keyword.startswith('UNION')
+                if expect is None and ends_list and from_list_depth is not None and depth <= from_list_depth:
+                    from_list_depth = None  # WHERE, the next statement, ... end the FROM list
+                previous_keyword = keyword
+            self.line += value.count('\n')
+
+        if parts:
+            self._record(parts, mode, name_line)
+
+
+def parse_stored_procedure(proc_text, reformat=True, profile=None):
+    """Summarizes a procedure; returns (formatted text, summary).
+
+    Reformatting only makes the returned text readable and costs about as much as the parse, so
+    callers that only need the summary pass reformat=False and get proc_text back unchanged. The
+    summary is always built from proc_text, so its line numbers point into the original source.
+    A ParseProfile passed as profile collects timings and counts.
+    """
+    trace_tokens = logger.isEnabledFor(TRACE)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    info = logger.isEnabledFor(logging.INFO)
+    if profile is None and info:
+        profile = ParseProfile()
+    phase = profile.phase if profile is not None else _no_phase
+
     # Format SQL for better readability
-    formatted_proc = sqlparse.format(proc_text, reindent=True, keyword_case='upper')
+    with phase("format"):
+        formatted_proc = sqlparse.format(proc_text, reindent=True, keyword_case='upper') if reformat else proc_text
     
     # Parse the SQL text
-    parsed = sqlparse.parse(formatted_proc)
+    with phase("parse"):
+        parsed = sqlparse.parse(proc_text)
     
     # Initialize structure to store parsed details
     procedure_summary = {
@@ -30,127 +370,147 @@ def parse_stored_procedure(proc_text):
         'nested_queries': []
     }
 
-    for stmt in parsed:
-        stmt_info = {
-            'type': None,
-            'tables': [],
-            'variables_used': [],
-            'conditions': [],
-            'nested_queries': []
-        }
+    with phase("analyze"):
+        symbols = SymbolTable(debug)
+        table_access = TableAccess()
+        for stmt in parsed:
+            stmt_info = {
+                'type': None,
+                'tables': [],
+                'variables_used': [],
+                'reads': [],
+                'writes': [],
+                'conditions': [],
+                'nested_queries': []
+            }
+
+            # Process tokens within the statement
+            token_iterator = iter(stmt.tokens)
+            for token in token_iterator:
+                if trace_tokens:
+                    logger.log(TRACE, "Token: %s, Type: %s", token, token.ttype)
 
-        # Process tokens within the statement
-        token_iterator = iter(stmt.tokens)
-        for token in token_iterator:
-            print(f"Token: {token}, Type: {token.ttype}")  # Debug: print each token
-
-            # Detect and store declared variables
-            if token.ttype is DDL and token.value.upper() == 'DECLARE':
-                next_token = next(token_iterator, None)
-                if next_token and isinstance(next_token, Identifier):
-                    var_name = next_token.get_real_name()
-                    procedure_summary['variables'][var_name] = None
-                    print(f"Declared Variable: {var_name}")  # Debug: variable declaration
-
-            # Track variable assignments (SET statements)
-            elif token.ttype is Keyword and token.value.upper() == 'SET':
-                var_name = next(token_iterator, None)
-                if var_name and isinstance(var_name, Identifier):
-                    var_name = var_name.get_real_name()
-                    assignment_value = next(token_iterator, None)
-                    if assignment_value:
-                        procedure_summary['variables'][var_name] = str(assignment_value)
-                        print(f"Assigned Variable: {var_name} = {assignment_value}")  # Debug: variable assignment
-
-            # Identify main statement types (SELECT, INSERT, UPDATE, DELETE)
-            elif token.ttype is DML:
-                stmt_info['type'] = token.value.upper()
-                stmt_info['tables'] = extract_identifiers(stmt)
-                print(f"Statement Type: {stmt_info['type']}, Tables: {stmt_info['tables']}")  # Debug: statement type
+                # Identify main statement types (SELECT, INSERT, UPDATE, DELETE)
+                if token.ttype is DML:
+                    stmt_info['type'] = token.value.upper()
+                    stmt_info['tables'] = extract_identifiers(stmt)
+                    if debug:
+                        logger.debug("Statement Type: %s, Tables: %s", stmt_info['type'], stmt_info['tables'])
                 
-            # Capture conditions (IF, WHERE, CASE)
-            elif token.ttype is Keyword and token.value.upper() in ['IF', 'WHERE', 'CASE']:
-                condition_text = str(token)
-                stmt_info['conditions'].append(condition_text)
-                procedure_summary['conditions'].append(condition_text)
-                print(f"Condition Detected: {condition_text}")  # Debug: condition
-
-            # Detect and analyze loops (e.g., WHILE)
-            elif token.ttype is Keyword and token.value.upper() == 'WHILE':
-                loop_condition = next(token_iterator, None)
-                if loop_condition:
-                    loop_condition_text = str(loop_condition)
-                    procedure_summary['loops'].append({
-                        'condition': loop_condition_text,
-                        'body': str(stmt)
-                    })
-                    print(f"Loop Detected: {loop_condition_text}")  # Debug: loop condition
-
-            # Capture nested queries within parentheses
-            elif token.is_group and isinstance(token, Parenthesis):
-                subquery = str(token).strip('()')
-                if 'SELECT' in subquery.upper():
-                    stmt_info['nested_queries'].append(subquery)
-                    procedure_summary['nested_queries'].append(subquery)
-                    print(f"Nested Query Detected: {subquery}")  # Debug: nested query
-
-        # Track variables used in each statement
-        variables_used = [var for var in procedure_summary['variables'] if var in str(stmt)]
-        stmt_info['variables_used'] = variables_used
-        procedure_summary['statements'].append(stmt_info)
-        print(f"Statement Info: {stmt_info}")  # Debug: statement info
+                # Capture conditions (IF, WHERE, CASE)
+                elif token.ttype is Keyword and token.value.upper() in ['IF', 'WHERE', 'CASE']:
+                    condition_text = str(token)
+                    stmt_info['conditions'].append(condition_text)
+                    procedure_summary['conditions'].append(condition_text)
+                    if debug:
+                        logger.debug("Condition Detected: %s", condition_text)
+
+                # Detect and analyze loops (e.g., WHILE)
+                elif token.ttype is Keyword and token.value.upper() == 'WHILE':
+                    loop_condition = next(token_iterator, None)
+                    if loop_condition:
+                        loop_condition_text = str(loop_condition)
+                        procedure_summary['loops'].append({
+                            'condition': loop_condition_text,
+                            'body': str(stmt)
+                        })
+                        if debug:
+                            logger.debug("Loop Detected: %s", loop_condition_text)
+
+                # Capture nested queries within parentheses
+                elif token.is_group and isinstance(token, Parenthesis):
+                    subquery = str(token).strip('()')
+                    if 'SELECT' in subquery.upper():
+                        stmt_info['nested_queries'].append(subquery)
+                        procedure_summary['nested_queries'].append(subquery)
+                        if debug:
+                            logger.debug("Nested Query Detected: %s", subquery)
+
+            # Track variables read and written in each statement
+            reads, writes = symbols.scan_statement(stmt)
+            stmt_info['reads'] = reads
+            stmt_info['writes'] = writes
+            stmt_info['variables_used'] = list(dict.fromkeys(reads + writes))
+            table_access.scan_statement(stmt)
+            procedure_summary['statements'].append(stmt_info)
+            if debug:
+                logger.debug("Statement Info: %s", stmt_info)
+            if profile is not None:
+                profile.statement_types[stmt_info['type'] or 'OTHER'] += 1
+
+        procedure_summary['variables'] = symbols.variables
+        procedure_summary['symbols'] = symbols.symbols
+        procedure_summary['table_access'] = table_access.tables
+        procedure_summary['calls'] = table_access.calls
+        if profile is not None:
+            profile.tokens += symbols.tokens
+
+    if info:
+        logger.info("Parsed procedure: %s", profile.to_dict())
 
     return formatted_proc, procedure_summary
 
-# Example Usage for Sybase Procedure
-sybase_proc_text = """
-CREATE PROCEDURE ExampleProcedure
-AS
-BEGIN
-    DECLARE @ExampleVar INT
-    SET @ExampleVar = 1
-    
-    WHILE @ExampleVar < 5
+if __name__ == "__main__":
+    # Example Usage for Sybase Procedure
+    sybase_proc_text = """
+    CREATE PROCEDURE ExampleProcedure
+    AS
     BEGIN
-        IF @ExampleVar = 1
-        BEGIN
-            SELECT * FROM Table1 WHERE Column1 = @ExampleVar
-        END
-        ELSE
+        DECLARE @ExampleVar INT
+        SET @ExampleVar = 1
+
+        WHILE @ExampleVar < 5
         BEGIN
-            UPDATE Table2 SET Column2 = 'Value' WHERE Column3 = @ExampleVar
+            IF @ExampleVar = 1
+            BEGIN
+                SELECT * FROM Table1 WHERE Column1 = @ExampleVar
+            END
+            ELSE
+            BEGIN
+                UPDATE Table2 SET Column2 = 'Value' WHERE Column3 = @ExampleVar
+            END
+            SET @ExampleVar = @ExampleVar + 1
         END
-        SET @ExampleVar = @ExampleVar + 1
     END
-END
-"""
-
-formatted_text, summary = parse_stored_procedure(sybase_proc_text)
-
-print("Formatted Procedure:\n", formatted_text)
-print("\nProcedure Summary:")
-print("\nVariables Declared and Initial Values:")
-for var, value in summary['variables'].items():
-    print(f"  {var}: {value}")
-
-print("\nStatements Analyzed:")
-for i, stmt in enumerate(summary['statements']):
-    print(f"Statement {i+1}:")
-    print("  Type:", stmt['type'])
-    print("  Tables:", stmt['tables'])
-    print("  Variables Used:", stmt['variables_used'])
-    print("  Conditions:", stmt['conditions'])
-    print("  Nested Queries:", stmt['nested_queries'])
-
-print("\nLoops Detected:")
-for i, loop in enumerate(summary['loops']):
-    print(f"  Loop {i+1} Condition:", loop['condition'])
-    print("  Loop Body:", loop['body'])
-
-print("\nConditions Detected in Procedure:")
-for i, condition in enumerate(summary['conditions']):
-    print(f"  Condition {i+1}: {condition}")
-
-print("\nNested Queries Detected in Procedure:")
-for i, query in enumerate(summary['nested_queries']):
-    print(f"  Nested Query {i+1}: {query}")
+    """
+
+    formatted_text, summary = parse_stored_procedure(sybase_proc_text)
+
+    print("Formatted Procedure:\n", formatted_text)
+    print("\nProcedure Summary:")
+    print("\nVariables Declared and Initial Values:")
+    for var, value in summary['variables'].items():
+        print(f"  {var}: {value}")
+
+    print("\nVariable Definitions and Uses (lines):")
+    for var, symbol in summary['symbols'].items():
+        print(f"  {var} ({symbol['kind']} {symbol['type']}, line {symbol['line']}): "
+              f"defs {symbol['defs']}, uses {symbol['uses']}")
+
+    print("\nTables Read and Written (lines):")
+    for table, access in summary['table_access'].items():
+        print(f"  {table}: reads {access['reads']}, writes {access['writes']}")
+
+    print("\nStatements Analyzed:")
+    for i, stmt in enumerate(summary['statements']):
+        print(f"Statement {i+1}:")
+        print("  Type:", stmt['type'])
+        print("  Tables:", stmt['tables'])
+        print("  Variables Used:", stmt['variables_used'])
+        print("  Reads:", stmt['reads'])
+        print("  Writes:", stmt['writes'])
+        print("  Conditions:", stmt['conditions'])
+        print("  Nested Queries:", stmt['nested_queries'])
+
+    print("\nLoops Detected:")
+    for i, loop in enumerate(summary['loops']):
+        print(f"  Loop {i+1} Condition:", loop['condition'])
+        print("  Loop Body:", loop['body'])
+
+    print("\nConditions Detected in Procedure:")
+    for i, condition in enumerate(summary['conditions']):
+        print(f"  Condition {i+1}: {condition}")
+
+    print("\nNested Queries Detected in Procedure:")
+    for i, query in enumerate(summary['nested_queries']):
+        print(f"  Nested Query {i+1}: {query}")
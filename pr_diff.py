@@ -1,52 +1,208 @@
 import os
+import json
+import argparse
 import subprocess
+from typing import Dict, Iterator, List, Optional
+
+from repo_cache import RepoCache
+from source_loader import bounded_map
+
+# Diffs of merged pull requests (merge commits), written to the output file one PR at a time as
+# they are read, so memory does not grow with the number of PRs. Two modes:
+# - "log": a single `git log --first-parent -m -p` stream over the mainline merges. Each PR's diff
+#   is the change it brought into the mainline (first parent -> merge).
+# - "pool": one `git diff merge^1 merge` per mainline merge, run by a bounded pool of workers and
+#   written in order. Same merges and same diffs as "log", so the two modes are interchangeable.
+
+COMMIT_MARKER = b"\x01"
+DIFF_WORKERS = 8
+MAX_DIFFS_IN_FLIGHT = 32
+
+
+def clone_or_pull_repo(repo_url):
+    """Clone or update the shared bare mirror of the repository and return its path."""
+    # Diffs read every blob they touch, so this mirror is a full clone rather than a partial one;
+    # log and diff run directly against the bare mirror, no working copy is needed
+    return RepoCache(clone_filter=None).update(repo_url)
+
+
+def _range_args(max_count: Optional[int], since: Optional[str], until: Optional[str]) -> List[str]:
+    args = []
+    if max_count:
+        args.append(f"-n{max_count}")
+    if since:
+        args.append(f"--since={since}")
+    if until:
+        args.append(f"--until={until}")
+    return args
+
+
+def _path_args(paths: Optional[List[str]]) -> List[str]:
+    return ["--", *paths] if paths else []
+
+
+def iter_merge_commits(repo_dir, max_count=None, since=None, until=None, paths=None,
+                       first_parent=False) -> Iterator[Dict]:
+    """Yields the most recent merge commits (newest first) as they are listed by git log.
+
+    With first_parent only merges on the mainline are listed, not those inside merged branches.
+    """
+    cmd = ["git", "-C", repo_dir, "log", "--merges", *(["--first-parent"] if first_parent else []),
+           "--format=%H%x00%an%x00%aI%x00%s", *_range_args(max_count, since, until), *_path_args(paths)]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as process:
+        for line in process.stdout:
+            sha, author, date, subject = line.decode("utf-8", errors="replace").rstrip("\n").split("\x00", 3)
+            yield {"commit": sha, "author": author, "date": date, "subject": subject}
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
 
-def clone_or_pull_repo(repo_url, repo_dir):
-    """Clone or update the repository."""
-    if not os.path.exists(repo_dir):
-        subprocess.run(["git", "clone", repo_url, repo_dir], check=True)
-    else:
-        subprocess.run(["git", "-C", repo_dir, "pull"], check=True)
 
 def get_top_merge_commits(repo_dir, top_n=3):
     """Get the top N most recent merge commits."""
-    cmd = ["git", "-C", repo_dir, "log", "--merges", "--pretty=format:%H", f"-n{top_n}"]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    return result.stdout.splitlines()
-
-def get_diff_for_merge_commit(repo_dir, merge_commit):
-    """Get the diff for the changes introduced by the pull request."""
-    cmd = ["git", "-C", repo_dir, "diff", f"{merge_commit}^1", f"{merge_commit}^2"]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return [merge["commit"] for merge in iter_merge_commits(repo_dir, max_count=top_n)]
+
+
+def get_diff_for_merge_commit(repo_dir, merge_commit, paths=None):
+    """Get the diff for the changes introduced by the pull request (first parent -> merge)."""
+    cmd = ["git", "-C", repo_dir, "diff", "--no-color", f"{merge_commit}^1", merge_commit, *_path_args(paths)]
+    result = subprocess.run(cmd, capture_output=True, check=True)
     return result.stdout
 
-def save_diffs_to_file(diffs, output_file):
-    """Save the diffs to a file."""
-    with open(output_file, "w") as f:
-        for pr_num, diff in diffs.items():
-            f.write(f"### Pull Request {pr_num} ###\n")
-            f.write(diff)
-            f.write("\n\n")
 
-def main(repo_url, output_file):
-    repo_dir = "temp_repo"
+class DiffStats:
+    """Per-file added/deleted line counts, accumulated from unified diff lines as they stream by."""
+
+    def __init__(self):
+        self.files: Dict[str, List] = {}  # path -> [added, deleted, binary]
+        self._current: Optional[List] = None
+        self._in_hunk = False
+
+    def feed(self, line: bytes) -> None:
+        if line.startswith(b"diff --git "):
+            path = line.rstrip(b"\n").split(b" b/", 1)[-1].decode("utf-8", errors="replace")
+            self._current = self.files.setdefault(path, [0, 0, False])
+            self._in_hunk = False
+        elif self._current is None:
+            return
+        elif line.startswith(b"@@"):
+            self._in_hunk = True
+        elif self._in_hunk:
+            if line.startswith(b"+"):
+                self._current[0] += 1
+            elif line.startswith(b"-"):
+                self._current[1] += 1
+        elif line.startswith(b"Binary files "):
+            self._current[2] = True
+
+    def to_dict(self) -> Dict:
+        return {
+            "files_changed": len(self.files),
+            "added": sum(added for added, _, _ in self.files.values()),
+            "deleted": sum(deleted for _, deleted, _ in self.files.values()),
+            "files": [{"path": path, "added": added, "deleted": deleted, "binary": binary}
+                      for path, (added, deleted, binary) in self.files.items()],
+        }
+
+
+def _pr_header(number: int, merge: Dict) -> bytes:
+    return (f"### Pull Request PR #{number} ###\n"
+            f"# {merge['commit']} {merge['date']} {merge['author']}: {merge['subject']}\n").encode("utf-8")
+
+
+def iter_pr_diffs_log(repo_dir, max_count=None, since=None, until=None, paths=None) -> Iterator[Dict]:
+    """Yields {"merge", "lines", "stats"} per mainline merge from one streaming git log.
+
+    "lines" is a generator over the PR's diff lines and must be consumed before the next PR is taken;
+    "stats" is complete once it has been.
+    """
+    cmd = ["git", "-C", repo_dir, "log", "--merges", "--first-parent", "-m", "-p", "--no-color",
+           "--format=format:%x01%H%x00%an%x00%aI%x00%s", *_range_args(max_count, since, until), *_path_args(paths)]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as process:
+        lines = iter(process.stdout)
+        line = next(lines, None)
+        while line is not None:
+            if not line.startswith(COMMIT_MARKER):
+                line = next(lines, None)
+                continue
+            sha, author, date, subject = line[1:].decode("utf-8", errors="replace").rstrip("\n").split("\x00", 3)
+            stats = DiffStats()
+            pending = [None]  # First line of the next commit, once this commit's lines are exhausted
+
+            def diff_lines():
+                for diff_line in lines:
+                    if diff_line.startswith(COMMIT_MARKER):
+                        pending[0] = diff_line
+                        return
+                    stats.feed(diff_line)
+                    yield diff_line
+
+            pr_lines = diff_lines()
+            yield {"merge": {"commit": sha, "author": author, "date": date, "subject": subject},
+                   "lines": pr_lines, "stats": stats}
+            for _ in pr_lines:  # Skip whatever the consumer did not read
+                pass
+            line = pending[0]
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+
+def iter_pr_diffs_pool(repo_dir, max_count=None, since=None, until=None, paths=None,
+                       workers=DIFF_WORKERS) -> Iterator[Dict]:
+    """Yields {"merge", "lines", "stats"} per mainline merge, diffed on a bounded pool, in log order."""
+    def diff(merge):
+        stats = DiffStats()
+        lines = get_diff_for_merge_commit(repo_dir, merge["commit"], paths).splitlines(keepends=True)
+        for line in lines:
+            stats.feed(line)
+        return {"merge": merge, "lines": iter(lines), "stats": stats}
+
+    merges = iter_merge_commits(repo_dir, max_count, since, until, paths, first_parent=True)
+    return bounded_map(diff, merges, max_in_flight=MAX_DIFFS_IN_FLIGHT, workers=workers)
+
+
+def write_pr_diffs(pr_diffs: Iterator[Dict], output_file, stats_file=None) -> int:
+    """Streams PR diffs into output_file (and per-PR stats as JSON Lines); returns the number of PRs."""
+    count = 0
+    with open(output_file, "wb") as out, open(stats_file or os.devnull, "w", encoding="utf-8") as stats_out:
+        for count, pr in enumerate(pr_diffs, 1):
+            # In log mode the stats are only known after the diff was read, so they follow it
+            out.write(_pr_header(count, pr["merge"]))
+            for line in pr["lines"]:
+                out.write(line)
+            stats = pr["stats"].to_dict()
+            out.write(f"\n# PR #{count}: {stats['files_changed']} files changed, "
+                      f"+{stats['added']} -{stats['deleted']}\n\n".encode("utf-8"))
+            stats_out.write(json.dumps({"pr": count, **pr["merge"], **stats}) + "\n")
+            print(f"PR #{count} {pr['merge']['commit'][:12]}: {stats['files_changed']} files, "
+                  f"+{stats['added']} -{stats['deleted']}")
+    return count
+
+
+def main(repo_url, output_file, max_count=3, since=None, until=None, paths=None, mode="log",
+         workers=DIFF_WORKERS, stats_file=None):
     # Clone or update the repository
-    clone_or_pull_repo(repo_url, repo_dir)
-    
-    # Get the top 3 merge commits (PRs)
-    merge_commits = get_top_merge_commits(repo_dir, top_n=3)
-    
-    # Collect diffs for each merge commit
-    diffs = {}
-    for i, merge_commit in enumerate(merge_commits, 1):
-        diff = get_diff_for_merge_commit(repo_dir, merge_commit)
-        diffs[f"PR #{i}"] = diff
-
-    # Save diffs to output file
-    save_diffs_to_file(diffs, output_file)
-    print(f"Differences saved to {output_file}")
-
-# Example usage
-repo_url = "https://github.com/owner/repo.git"  # Replace with your repo URL
-output_file = "pr_diffs.txt"
-main(repo_url, output_file)
+    repo_dir = clone_or_pull_repo(repo_url)
+
+    # Stream the diff of each merge commit (PR) straight into the output file
+    if mode == "pool":
+        pr_diffs = iter_pr_diffs_pool(repo_dir, max_count, since, until, paths, workers)
+    else:
+        pr_diffs = iter_pr_diffs_log(repo_dir, max_count, since, until, paths)
+    count = write_pr_diffs(pr_diffs, output_file, stats_file)
+    print(f"Differences of {count} pull requests saved to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the diffs of merged pull requests to a file")
+    parser.add_argument("repo_url")
+    parser.add_argument("--output", default="pr_diffs.txt")
+    parser.add_argument("-n", "--max-count", type=int, default=3, help="Number of merges, 0 for all")
+    parser.add_argument("--since", help="Only merges after this date (any format git log accepts)")
+    parser.add_argument("--until", help="Only merges before this date")
+    parser.add_argument("--path", action="append", dest="paths", help="Only changes under this path (repeatable)")
+    parser.add_argument("--mode", choices=("log", "pool"), default="log")
+    parser.add_argument("--workers", type=int, default=DIFF_WORKERS, help="Diff workers in pool mode")
+    parser.add_argument("--stats", help="Per-PR stats as JSON Lines (default: <output>.stats.jsonl)")
+    args = parser.parse_args()
+    main(args.repo_url, args.output, args.max_count, args.since, args.until, args.paths, args.mode,
+         args.workers, args.stats or f"{args.output}.stats.jsonl")
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import time
+import argparse
+import heapq
+import functools
+import concurrent.futures
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from parse_storedproc import ParseProfile, enable_tracing, parse_stored_procedure
+from source_loader import batched, bounded_map, iter_source_files
+
+# Batch analysis of stored procedures from Sybase schema dumps. Procedures are streamed out of .sql
+# files (split on "go" batch separators, or at each CREATE PROCEDURE when a dump has none), analyzed
+# in batches on a process pool and written as JSON Lines in input order. At most a bounded number
+# of batches is in flight, so memory does not depend on the size of the dump.
+
+SQL_EXTENSIONS = (".sql", ".prc", ".proc", ".sp")
+PROCS_PER_BATCH = 32
+MAX_BATCHES_IN_FLIGHT = 16
+SLOWEST_REPORTED = 10
+
+_BATCH_SEPARATOR = re.compile(r"^\s*go\s*(?:\d+\s*)?$", re.I)
+_CREATE_PROCEDURE = re.compile(r"^\s*create\s+proc(?:edure)?\s+([\w.#\[\]\"]+)", re.I | re.M)
+
+
+def iter_procedures_from_file(file_path: str, encoding: str = "utf-8") -> Iterator[Dict]:
+    """Yields {"name", "source", "line", "sql"} for every CREATE PROCEDURE batch in a .sql file.
+
+    The file is read line by line; batches without a CREATE PROCEDURE (grants, prints, drops) are
+    skipped.
+    """
+    def flush(lines, start):
+        sql = "".join(lines)
+        match = _CREATE_PROCEDURE.search(sql)
+        if match:
+            return {"name": match.group(1).replace("[", "").replace("]", "").replace('"', ""),
+                    "source": file_path, "line": start, "sql": sql}
+        return None
+
+    lines: List[str] = []
+    start = 1
+    with open(file_path, "r", encoding=encoding, errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            if _BATCH_SEPARATOR.match(line):
+                procedure = flush(lines, start)
+                if procedure:
+                    yield procedure
+                lines, start = [], number + 1
+                continue
+            if lines and _CREATE_PROCEDURE.match(line) and _CREATE_PROCEDURE.search("".join(lines)):
+                # A second procedure in the same batch: the dump has no separators
+                yield flush(lines, start)
+                lines, start = [], number
+            if lines or line.strip():
+                lines.append(line)
+            else:
+                start = number + 1
+    procedure = flush(lines, start)
+    if procedure:
+        yield procedure
+
+
+def iter_procedures(paths: Iterable[str], encoding: str = "utf-8") -> Iterator[Dict]:
+    """Streams procedures from dump files and from .sql files under directories."""
+    for path in paths:
+        file_paths = iter_source_files(path, SQL_EXTENSIONS) if os.path.isdir(path) else [path]
+        for file_path in file_paths:
+            yield from iter_procedures_from_file(file_path, encoding)
+
+
+def analyze_procedure(procedure: Dict, reformat: bool = False, profile: bool = False) -> Dict:
+    """Parses one procedure; the result is JSON serializable and never raises.
+
+    With profile, the record also gets the parser's per-phase timings and statement counts.
+    """
+    record = {"name": procedure["name"], "source": procedure["source"], "line": procedure["line"]}
+    parse_profile = ParseProfile() if profile else None
+    start = time.perf_counter()
+    try:
+        formatted, summary = parse_stored_procedure(procedure["sql"], reformat=reformat, profile=parse_profile)
+        record["summary"] = summary
+        if reformat:
+            record["formatted"] = formatted
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    if parse_profile is not None:
+        record["profile"] = parse_profile.to_dict()
+    return record
+
+
+def _analyze_batch(procedures: List[Dict], reformat: bool = False, profile: bool = False) -> List[Dict]:
+    return [analyze_procedure(procedure, reformat, profile) for procedure in procedures]
+
+
+def analyze_to_jsonl(paths: Iterable[str], output_file: str, workers: Optional[int] = None,
+                     procs_per_batch: int = PROCS_PER_BATCH, reformat: bool = False,
+                     encoding: str = "utf-8", profile: bool = False) -> Dict:
+    """Analyzes every procedure under paths on a process pool, writing one JSON line per procedure.
+
+    Returns counts; with profile also the time per parser phase and statement type totals over all
+    procedures, and the slowest procedures.
+    """
+    stats = {"procedures": 0, "errors": 0}
+    phase_totals, statement_types, slowest = Counter(), Counter(), []
+    batches = batched(iter_procedures(paths, encoding), procs_per_batch)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(output_file, "w", encoding="utf-8") as out:
+        analyze = functools.partial(_analyze_batch, reformat=reformat, profile=profile)
+        for results in bounded_map(analyze, batches, max_in_flight=MAX_BATCHES_IN_FLIGHT, executor=executor):
+            for record in results:
+                out.write(json.dumps(record) + "\n")
+                stats["procedures"] += 1
+                stats["errors"] += "error" in record
+                if "profile" in record:
+                    phase_totals.update(record["profile"]["timings_ms"])
+                    statement_types.update(record["profile"]["statement_types"])
+                    heapq.heappush(slowest, (record["elapsed_ms"], record["name"]))
+                    if len(slowest) > SLOWEST_REPORTED:
+                        heapq.heappop(slowest)
+    if profile:
+        stats["phase_ms"] = {phase: round(ms, 1) for phase, ms in phase_totals.items()}
+        stats["statement_types"] = dict(statement_types)
+        stats["slowest"] = [{"name": name, "elapsed_ms": ms} for ms, name in sorted(slowest, reverse=True)]
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze stored procedures from .sql dumps into JSON Lines")
+    parser.add_argument("paths", nargs="+", help=".sql dump files or directories of .sql files")
+    parser.add_argument("--output", default="procedures.jsonl")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=PROCS_PER_BATCH, help="Procedures per worker task")
+    parser.add_argument("--reformat", action="store_true", help="Also store the reformatted procedure text")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--profile", action="store_true", help="Record where parsing time goes per procedure")
+    parser.add_argument("--trace", metavar="LEVEL", help="Parser trace to stderr: INFO, DEBUG or TRACE")
+    args = parser.parse_args()
+    if args.trace:
+        os.environ["PROC_PARSE_TRACE"] = args.trace  # Picked up by worker processes on import
+        enable_tracing(args.trace)
+
+    start = time.perf_counter()
+    stats = analyze_to_jsonl(args.paths, args.output, args.workers, args.batch_size, args.reformat, args.encoding,
+                             args.profile)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['procedures']} procedures ({stats['errors']} errors) in {elapsed:.1f}s "
+          f"({stats['procedures'] / max(elapsed, 1e-9):.0f}/sec) -> {args.output}")
+    if args.profile:
+        print(f"Time per phase (ms, summed over procedures): {stats['phase_ms']}")
+        print(f"Statements by type: {stats['statement_types']}")
+        print("Slowest procedures:")
+        for entry in stats["slowest"]:
+            print(f"  {entry['elapsed_ms']:10.1f} ms  {entry['name']}")
+
+
+if __name__ == "__main__":
+    main()
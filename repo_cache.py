@@ -0,0 +1,129 @@
+import os
+import time
+import fcntl
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import contextlib
+from typing import Iterator, Optional, Sequence
+
+# Shared clone cache: one bare mirror per remote URL, refreshed with incremental fetches, from which
+# each job gets a cheap worktree (optionally a sparse checkout of just the files it needs).
+# Mirrors are partial clones (blobs are fetched on demand), so a sparse checkout of a large repo
+# only downloads the blobs it actually checks out.
+#
+# Locking: fetching and registering/removing worktrees take an exclusive lock on the mirror;
+# checking files out of it takes a shared lock, so jobs read a mirror concurrently but never
+# while it is being updated.
+
+REPO_CACHE_DIR = os.environ.get("REPO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "repo-cache"))
+FETCH_MAX_AGE_SECONDS = int(os.environ.get("REPO_CACHE_FETCH_MAX_AGE", "60"))
+DEFAULT_FILTER = "blob:none"
+
+
+def _git(*args: str, cwd: Optional[str] = None) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+@contextlib.contextmanager
+def _locked(lock_path: str, exclusive: bool = True) -> Iterator[None]:
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class RepoCache:
+    """Keeps bare mirrors of remote repositories and hands out worktrees from them."""
+
+    def __init__(self, cache_dir: str = REPO_CACHE_DIR, fetch_max_age: int = FETCH_MAX_AGE_SECONDS,
+                 clone_filter: Optional[str] = DEFAULT_FILTER):
+        self.cache_dir = cache_dir
+        self.fetch_max_age = fetch_max_age
+        self.clone_filter = clone_filter
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def mirror_path(self, repo_url: str) -> str:
+        """Returns the mirror directory for a URL (stable across runs, separate per clone filter)."""
+        name = os.path.basename(repo_url.rstrip("/")).removesuffix(".git") or "repo"
+        digest = hashlib.sha256(f"{repo_url}\0{self.clone_filter or ''}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name}-{digest}.git")
+
+    def _lock_path(self, repo_url: str) -> str:
+        return self.mirror_path(repo_url) + ".lock"
+
+    def update(self, repo_url: str, force: bool = False) -> str:
+        """Clones the mirror on first use, otherwise fetches new objects; returns the mirror path.
+
+        A mirror fetched less than fetch_max_age seconds ago is not fetched again unless force is set,
+        so a burst of jobs for the same repository shares one fetch.
+        """
+        mirror = self.mirror_path(repo_url)
+        stamp = os.path.join(mirror, "last_fetch")
+        with _locked(self._lock_path(repo_url)):
+            if not os.path.exists(os.path.join(mirror, "HEAD")):
+                shutil.rmtree(mirror, ignore_errors=True)  # Leftover from an interrupted clone
+                filter_args = [f"--filter={self.clone_filter}"] if self.clone_filter else []
+                _git("clone", "--mirror", "--quiet", *filter_args, repo_url, mirror)
+            elif force or not os.path.exists(stamp) or time.time() - os.path.getmtime(stamp) > self.fetch_max_age:
+                _git("fetch", "--prune", "--quiet", "origin", cwd=mirror)
+            else:
+                return mirror
+            with open(stamp, "w") as f:
+                f.write(str(time.time()))
+        return mirror
+
+    def resolve(self, repo_url: str, ref: str = "HEAD") -> str:
+        """Returns the commit a ref points to in the mirror."""
+        with _locked(self._lock_path(repo_url), exclusive=False):
+            return _git("rev-parse", "--verify", f"{ref}^{{commit}}", cwd=self.mirror_path(repo_url)).strip()
+
+    def add_worktree(self, repo_url: str, path: str, ref: str = "HEAD",
+                     patterns: Optional[Sequence[str]] = None) -> str:
+        """Checks out ref of the (already updated) mirror into path, and returns the commit.
+
+        With patterns (gitignore-style globs such as "*.java" or "pom.xml") only matching files
+        are checked out, which with a partial mirror also limits the blobs that get downloaded.
+        """
+        mirror = self.mirror_path(repo_url)
+        commit = self.resolve(repo_url, ref)
+        with _locked(self._lock_path(repo_url)):
+            _git("worktree", "add", "--detach", "--no-checkout", "--quiet", path, commit, cwd=mirror)
+        with _locked(self._lock_path(repo_url), exclusive=False):
+            if patterns:
+                _git("sparse-checkout", "set", "--no-cone", *patterns, cwd=path)
+            _git("checkout", "--quiet", "--detach", commit, cwd=path)
+        return commit
+
+    def remove_worktree(self, repo_url: str, path: str) -> None:
+        """Removes a worktree created by add_worktree."""
+        with _locked(self._lock_path(repo_url)):
+            try:
+                _git("worktree", "remove", "--force", path, cwd=self.mirror_path(repo_url))
+            except RuntimeError:
+                shutil.rmtree(path, ignore_errors=True)
+                _git("worktree", "prune", cwd=self.mirror_path(repo_url))
+
+    @contextlib.contextmanager
+    def checkout(self, repo_url: str, path: Optional[str] = None, ref: str = "HEAD",
+                 patterns: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """Updates the mirror and yields a worktree of ref at path (a temp dir if not given), removed on exit."""
+        self.update(repo_url)
+        cleanup_dir = None
+        if path is None:
+            cleanup_dir = tempfile.mkdtemp(prefix="worktree-")
+            path = os.path.join(cleanup_dir, "repo")
+        try:
+            self.add_worktree(repo_url, path, ref, patterns)
+            yield path
+        finally:
+            self.remove_worktree(repo_url, path)
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+
@@ -3,19 +3,20 @@ import json
 from langchain.llms import OpenAI
 from langchain.prompts import PromptTemplate
 
+from llm_cache import get_default_cache
+from llm_executor import LLMExecutor
+from source_loader import batched, iter_java_files
+from multi_section import extract_sections
+
 # Set up project path and OpenAI API key
 project_path = "/path/to/spring-petclinic"  # Replace with actual path
 openai_api_key = "your_openai_api_key"      # Replace with your OpenAI API key
 llm = OpenAI(model_name="gpt-4-turbo", api_key=openai_api_key)
 
 # Step 1: Load Code Files
-java_files = []
-for root, dirs, files in os.walk(project_path):
-    for file in files:
-        if file.endswith(".java"):
-            file_path = os.path.join(root, file)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                java_files.append({"filename": file_path, "content": f.read()})
+# Files are streamed lazily and processed in small batches, so memory stays flat with repo size
+java_files = iter_java_files(project_path)
+files_per_batch = 32
 
 # Step 2: Define Prompts for Each Documentation Section
 
@@ -65,47 +66,45 @@ glossary_prompt = "Create a glossary of key terms used in the code."
 conclusion_prompt = "Provide a brief summary of the documentation, including key points and recommendations."
 
 # Step 3: Generate Documentation Content
-documentation = ""
-
-for java_file in java_files:
-    file_content = java_file["content"]
-    
-    # Generate Function Documentation
-    function_doc = llm(function_prompt.format(file_content=file_content))
-    documentation += f"File: {java_file['filename']}\n\nFunctions:\n{function_doc}\n\n"
-
-    # Generate API Documentation (if applicable)
-    api_doc = llm(api_prompt.format(file_content=file_content))
-    documentation += f"API Endpoints:\n{api_doc}\n\n"
-
-    # Generate Error Handling and Logging Section
-    error_logging_doc = llm(error_logging_prompt.format(file_content=file_content))
-    documentation += f"Error Handling and Logging:\n{error_logging_doc}\n\n"
-
-# Additional sections
-dependency_doc = llm(dependency_prompt)
-config_doc = llm(config_prompt)
-performance_doc = llm(performance_prompt)
-testing_doc = llm(testing_prompt)
-security_doc = llm(security_prompt)
-version_control_doc = llm(version_control_prompt)
-faq_doc = llm(faq_prompt)
-glossary_doc = llm(glossary_prompt)
-conclusion_doc = llm(conclusion_prompt)
-
-# Combine all sections into final documentation
-documentation += f"Dependencies:\n{dependency_doc}\n\n"
-documentation += f"Configuration:\n{config_doc}\n\n"
-documentation += f"Performance Considerations:\n{performance_doc}\n\n"
-documentation += f"Testing and Quality Assurance:\n{testing_doc}\n\n"
-documentation += f"Security Considerations:\n{security_doc}\n\n"
-documentation += f"Version Control and Changelog:\n{version_control_doc}\n\n"
-documentation += f"FAQ:\n{faq_doc}\n\n"
-documentation += f"Appendix:\nGlossary:\n{glossary_doc}\n\n"
-documentation += f"Conclusion:\n{conclusion_doc}\n\n"
-
-# Save to file
+# Per-file sections are requested in one combined prompt per file, so each file is sent once instead
+# of once per section; the files of a batch run concurrently and are written out as soon as it is done
+executor = LLMExecutor(llm, max_concurrency=8)
+file_prompts = {"functions": function_prompt, "api": api_prompt, "error_logging": error_logging_prompt}
+additional_prompts = [dependency_prompt, config_prompt, performance_prompt, testing_prompt, security_prompt,
+                      version_control_prompt, faq_prompt, glossary_prompt, conclusion_prompt]
+
+def run_jobs(jobs):
+    results = executor.run_all(jobs)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
 with open("full_documentation.txt", "w") as f:
-    f.write(documentation)
+    for batch in batched(java_files, files_per_batch):
+        for java_file, sections in zip(batch, extract_sections(executor, file_prompts, batch)):
+            for result in sections.values():
+                if isinstance(result, Exception):
+                    raise result
+            function_doc, api_doc, error_logging_doc = (sections[name] for name in file_prompts)
+            f.write(f"File: {java_file['filename']}\n\nFunctions:\n{function_doc}\n\n")
+            f.write(f"API Endpoints:\n{api_doc}\n\n")
+            f.write(f"Error Handling and Logging:\n{error_logging_doc}\n\n")
+
+    # Additional sections
+    (dependency_doc, config_doc, performance_doc, testing_doc, security_doc,
+     version_control_doc, faq_doc, glossary_doc, conclusion_doc) = run_jobs([(prompt, "") for prompt in additional_prompts])
+
+    # Combine all sections into final documentation
+    f.write(f"Dependencies:\n{dependency_doc}\n\n")
+    f.write(f"Configuration:\n{config_doc}\n\n")
+    f.write(f"Performance Considerations:\n{performance_doc}\n\n")
+    f.write(f"Testing and Quality Assurance:\n{testing_doc}\n\n")
+    f.write(f"Security Considerations:\n{security_doc}\n\n")
+    f.write(f"Version Control and Changelog:\n{version_control_doc}\n\n")
+    f.write(f"FAQ:\n{faq_doc}\n\n")
+    f.write(f"Appendix:\nGlossary:\n{glossary_doc}\n\n")
+    f.write(f"Conclusion:\n{conclusion_doc}\n\n")
 
 print("Documentation generated and saved as 'full_documentation.txt'")
+print(get_default_cache().format_stats())
@@ -6,22 +6,40 @@ from langchain.document_loaders import DirectoryLoader
 from tqdm import tqdm  # Progress bar for visibility
 from pathlib import Path
 
+from llm_cache import get_default_cache
+from llm_executor import LLMExecutor
+from source_loader import batched, iter_java_files
+from multi_section import extract_sections
+from incremental import get_changed_files, get_head_commit, load_state, save_state
+
 # Configuration
 project_path = "/path/to/spring-petclinic"  # Replace with actual path
 output_path = "documentation.json"          # Save as JSON for structured data
 openai_api_key = "your_openai_api_key"      # Replace with OpenAI API key
 llm_model = OpenAI(model_name="gpt-4-turbo", api_key=openai_api_key)
+incremental = True                          # Only regenerate entries for files changed since the last run
+state_dir = os.path.dirname(os.path.abspath(output_path))
+executor = LLMExecutor(llm_model, max_concurrency=8, requests_per_minute=500, tokens_per_minute=150000)
+files_per_batch = 32                        # Java files held in memory at once
+single_pass_sections = True                 # Ask for all per-file sections in one call instead of one call per section
 
 # Helper function to load Java files from the project directory
 def load_java_files(directory):
-    java_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".java"):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    java_files.append({"filename": file_path, "content": f.read()})
-    return java_files
+    return list(iter_java_files(directory))
+
+# Helper function to stream only the given Java files (used by incremental runs)
+def load_java_files_from_paths(file_paths):
+    for file_path in sorted(file_paths):
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                yield {"filename": file_path, "content": f.read()}
+
+# Load the previous documentation.json so unchanged per-file entries can be reused
+def load_previous_documentation(filename):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 # Prompt template functions
 def generate_prompt(template_text, file_content):
@@ -58,28 +76,70 @@ prompts = {
     # Other prompts (dependencies, configuration, etc.) follow a similar structure...
 }
 
+# Function to process several sections at once; every (section, file) prompt runs concurrently
+def process_sections(java_files, section_names, progress=None):
+    if single_pass_sections and len(section_names) > 1:
+        return process_sections_single_pass(java_files, section_names, progress)
+    jobs = [(section_name, java_file) for section_name in section_names for java_file in java_files]
+    with tqdm(total=len(jobs), desc=f"Processing {', '.join(section_names)}", disable=progress is not None) as own_progress:
+        results = executor.run_all([(prompts[section_name], java_file['content']) for section_name, java_file in jobs],
+                                   progress=(progress or own_progress).update)
+    sections = {section_name: {} for section_name in section_names}
+    for (section_name, java_file), response in zip(jobs, results):
+        if isinstance(response, Exception):
+            print(f"Error processing file {java_file['filename']} for {section_name}: {response}")
+            sections[section_name][java_file['filename']] = "Error generating content"
+        else:
+            sections[section_name][java_file['filename']] = response.strip()
+    return sections
+
+# Function to process several sections with one combined prompt per file, split back per section
+def process_sections_single_pass(java_files, section_names, progress=None):
+    java_files = list(java_files)
+    results = extract_sections(executor, {section_name: prompts[section_name] for section_name in section_names}, java_files)
+    sections = {section_name: {} for section_name in section_names}
+    for java_file, file_sections in zip(java_files, results):
+        for section_name in section_names:
+            response = file_sections[section_name]
+            if isinstance(response, Exception):
+                print(f"Error processing file {java_file['filename']} for {section_name}: {response}")
+                sections[section_name][java_file['filename']] = "Error generating content"
+            else:
+                sections[section_name][java_file['filename']] = response
+    if progress is not None:
+        progress.update(len(java_files) * len(section_names))
+    return sections
+
 # Function to process each section
 def process_section(java_files, section_name):
-    section_data = {}
-    for java_file in tqdm(java_files, desc=f"Processing {section_name}"):
-        prompt = generate_prompt(prompts[section_name], java_file['content'])
-        try:
-            response = llm_model(prompt)
-            section_data[java_file['filename']] = response.strip()
-        except Exception as e:
-            print(f"Error processing file {java_file['filename']} for {section_name}: {e}")
-            section_data[java_file['filename']] = "Error generating content"
-    return section_data
+    return process_sections(java_files, [section_name])[section_name]
 
 # Main function to orchestrate documentation generation
 def generate_documentation():
-    java_files = load_java_files(project_path)
+    previous = load_previous_documentation(output_path) if incremental else {}
+    changes = get_changed_files(project_path, load_state(state_dir).get("last_commit")) if previous else None
+    if changes is None:
+        java_files = iter_java_files(project_path)
+        touched = set()
+    else:
+        # Only re-document files git reports as changed; everything else is reused below
+        java_files = load_java_files_from_paths(changes[0])
+        touched = changes[0] | changes[1]
+        print(f"Incremental run: {len(changes[0])} changed, {len(changes[1])} deleted files")
     documentation = {}
     
-    # Process each documentation section
-    documentation['functions'] = process_section(java_files, "functions")
-    documentation['api'] = process_section(java_files, "api")
-    documentation['error_handling'] = process_section(java_files, "error_logging")
+    # Process all documentation sections concurrently, streaming files through in batches
+    section_keys = {'functions': "functions", 'api': "api", 'error_handling': "error_logging"}
+    generated = {section_name: {} for section_name in section_keys.values()}
+    with tqdm(desc="Processing sections") as progress:
+        for batch in batched(java_files, files_per_batch):
+            for section_name, section_data in process_sections(batch, list(generated), progress).items():
+                generated[section_name].update(section_data)
+    for key, section_name in section_keys.items():
+        section_data = {filename: content for filename, content in previous.get(key, {}).items()
+                        if os.path.normpath(filename) not in touched}
+        section_data.update(generated[section_name])
+        documentation[key] = section_data
     
     # Add other sections in a similar manner, e.g., dependencies, configuration, etc.
     # These can be done by expanding the prompts dictionary and adding them here
@@ -87,11 +147,16 @@ def generate_documentation():
     return documentation
 
 # Save documentation to JSON file for easier structuring and future formatting
+# Written to a temp file and renamed into place, so a dashboard watching the file never sees it half-written
 def save_to_json(data, filename):
-    with open(filename, 'w', encoding='utf-8') as f:
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4)
+    os.replace(tmp_filename, filename)
     print(f"Documentation saved to {filename}")
 
 # Generate documentation and save it
 documentation = generate_documentation()
 save_to_json(documentation, output_path)
+save_state(state_dir, get_head_commit(project_path))
+print(get_default_cache().format_stats())
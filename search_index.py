@@ -0,0 +1,253 @@
+import re
+import math
+import heapq
+import bisect
+import hashlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# In-memory inverted index over documentation.json ({section: {file: content}}) for the dashboard.
+# Each (section, file) entry is one document; queries are ranked with BM25, the last query word
+# (or any word ending in "*") also matches as a prefix, and snippets are cut around the first hit.
+# update() re-indexes only the entries whose content changed since the last load. With a
+# text_source the index keeps no document text and reads it back (for snippets and re-indexing)
+# from wherever the documents live, e.g. a DocStore mmap.
+
+_TOKEN = re.compile(r"\w+")
+MAX_PREFIX_TERMS = 64  # Prefix expansions kept per query word (most frequent terms first)
+SNIPPET_CHARS = 160
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class SearchIndex:
+    """BM25 inverted index with prefix queries, snippets, pagination and incremental updates."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 text_source: Optional[Callable[[str, str], str]] = None):
+        self.k1 = k1
+        self.b = b
+        self.text_source = text_source  # (section, file) -> text; None keeps texts in memory
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc id: term frequency}
+        self.docs: Dict[int, Tuple[str, str]] = {}      # doc id -> (section, file)
+        self.ids: Dict[Tuple[str, str], int] = {}       # (section, file) -> doc id
+        self.texts: Dict[int, str] = {}               # Only without a text_source
+        self.hashes: Dict[int, str] = {}
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self._next_id = 0
+        self._sorted_terms: Optional[List[str]] = None
+        self._impacts: Dict[str, Dict[int, float]] = {}  # term -> {doc id: BM25 score}, cleared on change
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def copy(self) -> "SearchIndex":
+        """An independent copy sharing no mutable state, to update while this one keeps serving."""
+        other = SearchIndex(self.k1, self.b, self.text_source)
+        other.postings = {term: dict(postings) for term, postings in self.postings.items()}
+        other.docs, other.ids, other.texts = dict(self.docs), dict(self.ids), dict(self.texts)
+        other.hashes, other.lengths = dict(self.hashes), dict(self.lengths)
+        other.total_length = self.total_length
+        other._next_id = self._next_id
+        other._sorted_terms = self._sorted_terms  # Replaced, never modified, when terms change
+        return other
+
+    def _text(self, doc_id: int) -> str:
+        if self.text_source is None:
+            return self.texts[doc_id]
+        return self.text_source(*self.docs[doc_id])
+
+    def add(self, section: str, file: str, content: str) -> None:
+        """Indexes one entry, replacing any previous content for the same (section, file)."""
+        key = (section, file)
+        if key in self.ids:
+            self.remove(section, file)
+        doc_id = self._next_id
+        self._next_id += 1
+        counts = Counter(tokenize(content))
+        for term, count in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self._sorted_terms = None
+            postings[doc_id] = count
+        length = sum(counts.values())
+        self._impacts.clear()
+        self.docs[doc_id] = key
+        self.ids[key] = doc_id
+        if self.text_source is None:
+            self.texts[doc_id] = content
+        self.hashes[doc_id] = _content_hash(content)
+        self.lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, section: str, file: str) -> None:
+        doc_id = self.ids.get((section, file))
+        if doc_id is None:
+            return
+        # Postings are found again by re-tokenizing the stored text, so no per-document term list is kept
+        text = self._text(doc_id)
+        del self.ids[(section, file)]
+        for term in set(tokenize(text)):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+                self._sorted_terms = None
+        self._impacts.clear()
+        del self.docs[doc_id], self.hashes[doc_id]
+        self.texts.pop(doc_id, None)
+        self.total_length -= self.lengths.pop(doc_id)
+
+    def update(self, documentation: Dict[str, Dict[str, str]]) -> Dict[str, int]:
+        """Brings the index in line with a (re)loaded documentation dict; returns change counts."""
+        def entries():
+            for section, files in documentation.items():
+                if isinstance(files, dict):
+                    for file, content in files.items():
+                        yield section, file, content
+                else:
+                    yield section, "", files
+        return self.update_entries(entries())
+
+    def update_entries(self, entries: Iterable[Tuple[str, str, object]]) -> Dict[str, int]:
+        """Same as update(), from (section, file, content) triples, e.g. streamed from a DocStore."""
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for section, file, content in entries:
+            content = content if isinstance(content, str) else str(content)
+            key = (section, file)
+            seen.add(key)
+            doc_id = self.ids.get(key)
+            if doc_id is not None and self.hashes[doc_id] == _content_hash(content):
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if doc_id is not None else "added"] += 1
+            self.add(section, file, content)
+        for key in [key for key in self.ids if key not in seen]:
+            self.remove(*key)
+            stats["removed"] += 1
+        return stats
+
+    def update_versions(self, versions: Iterable[Tuple[str, str, str]],
+                        load: Callable[[str, str], str]) -> Dict[str, int]:
+        """Same as update_entries(), from (section, file, version) triples such as DocStore etags.
+
+        Only entries whose version changed are loaded (through load(section, file)) and re-indexed.
+        Removing an entry re-reads its old text through text_source, so switch text_source to the
+        new documents only afterwards.
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for section, file, version in versions:
+            key = (section, file)
+            seen.add(key)
+            doc_id = self.ids.get(key)
+            if doc_id is not None and self.hashes[doc_id] == version:
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if doc_id is not None else "added"] += 1
+            self.add(section, file, load(section, file))
+            self.hashes[self.ids[key]] = version
+        for key in [key for key in self.ids if key not in seen]:
+            self.remove(*key)
+            stats["removed"] += 1
+        return stats
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix, the most frequent MAX_PREFIX_TERMS of them."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        end = bisect.bisect_left(self._sorted_terms, prefix + "\uffff", lo=start)
+        terms = self._sorted_terms[start:end]
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda term: len(self.postings[term]))
+        return terms
+
+    def _query_terms(self, query: str) -> List[List[str]]:
+        """One list of matching index terms per query word."""
+        words = query.lower().split()
+        groups = []
+        for i, word in enumerate(words):
+            is_prefix = word.endswith("*") or (i == len(words) - 1 and not query.endswith(" "))
+            tokens = tokenize(word)
+            for j, token in enumerate(tokens):
+                if is_prefix and j == len(tokens) - 1:
+                    groups.append(self.expand_prefix(token))
+                else:
+                    groups.append([token] if token in self.postings else [])
+        return groups
+
+    def _term_impacts(self, term: str) -> Dict[int, float]:
+        """BM25 score of one term for every document containing it, computed once per index version."""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            df = len(self.postings[term])
+            idf = math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+            k1, b = self.k1, self.b
+            average_length = self.total_length / len(self.docs) or 1.0
+            lengths = self.lengths
+            impacts = {doc_id: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc_id] / average_length))
+                       for doc_id, tf in self.postings[term].items()}
+            self._impacts[term] = impacts
+        return impacts
+
+    def search(self, query: str, page: int = 1, page_size: int = 20, section: Optional[str] = None) -> Dict:
+        """Returns one page of BM25-ranked hits with snippets, plus the total number of matches."""
+        groups = self._query_terms(query)
+        scores: Dict[int, float] = {}
+        for terms in groups:
+            # A document matching several expansions of one prefix word counts its best expansion only
+            if len(terms) == 1:
+                best = self._term_impacts(terms[0])
+            else:
+                best = {}
+                for term in terms:
+                    for doc_id, score in self._term_impacts(term).items():
+                        if score > best.get(doc_id, 0.0):
+                            best[doc_id] = score
+            if not scores:
+                scores = dict(best)
+            else:
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        if section is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if self.docs[doc_id][0] == section}
+
+        page = max(page, 1)
+        start = (page - 1) * page_size
+        top = heapq.nlargest(start + page_size, scores.items(), key=lambda item: (item[1], -item[0]))[start:]
+        matched_terms = [term for terms in groups for term in terms]
+        pattern = (re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, matched_terms)) + r")(?!\w)", re.I)
+                   if matched_terms else None)
+        results = []
+        for doc_id, score in top:
+            doc_section, file = self.docs[doc_id]
+            results.append({
+                "section": doc_section,
+                "file": file,
+                "score": round(score, 4),
+                "snippet": self.snippet(self._text(doc_id), pattern),
+            })
+        return {"query": query, "total": len(scores), "page": page, "page_size": page_size, "results": results}
+
+    @staticmethod
+    def snippet(text: str, pattern: Optional[re.Pattern], width: int = SNIPPET_CHARS) -> str:
+        """A window of text around the first match of pattern (the start of the text if none)."""
+        position = 0
+        if pattern is not None:
+            match = pattern.search(text)
+            if match:
+                position = match.start()
+        start = max(0, position - width // 3)
+        end = min(len(text), start + width)
+        snippet = " ".join(text[start:end].split())
+        return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
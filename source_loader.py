@@ -0,0 +1,149 @@
+import os
+import itertools
+import functools
+import collections
+import concurrent.futures
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from java_splitter import split_java
+
+# Streaming, memory-bounded loading of source files. Everything here is a generator, so downstream
+# stages (chunking, embedding, generation) start working as soon as the first files are read and
+# only a bounded number of files is held in memory at any time.
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_WINDOW_CHARS = 4 * 1024 * 1024
+# "java" (java_splitter.split_java, the code-aware and faster of the two; see bench_chunking.py) or
+# "recursive" (langchain's RecursiveCharacterTextSplitter, for non-Java sources)
+CHUNK_SPLITTER = os.environ.get("CHUNK_SPLITTER", "java")
+
+
+def iter_source_files(directory: str, extensions: Sequence[str] = (".java",)) -> Iterator[str]:
+    """Lazily yields paths of files under directory whose name ends with one of the extensions."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(tuple(extensions)):
+                yield os.path.normpath(os.path.join(root, file))
+
+
+def iter_text_windows(file_path: str, window_chars: int = DEFAULT_WINDOW_CHARS, overlap: int = 0) -> Iterator[str]:
+    """Reads a file in windows of at most window_chars characters, each overlapping the previous one.
+
+    Small files come back as a single window; very large generated sources never have to be
+    held in memory in one piece.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tail = ""
+        while True:
+            block = f.read(window_chars - len(tail))
+            if not block:
+                return
+            window = tail + block
+            yield window
+            # A short read means the end of the file was reached
+            if len(window) < window_chars:
+                return
+            tail = window[-overlap:] if overlap else ""
+
+
+def iter_java_files(directory: str, extensions: Sequence[str] = (".java",)) -> Iterator[Dict[str, str]]:
+    """Yields {"filename", "content"} dicts one file at a time instead of building a list of every file."""
+    for file_path in iter_source_files(directory, extensions):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield {"filename": file_path, "content": f.read()}
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Groups an iterable into lists of up to size items without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bounded_map(func: Callable[[T], R], items: Iterable[T], max_in_flight: int = 64, workers: int = 8,
+                executor: concurrent.futures.Executor = None) -> Iterator[R]:
+    """Maps func over items on a pool, keeping at most max_in_flight results pending, in input order.
+
+    New items are only pulled from the input once the consumer has taken a result, so a slow
+    downstream stage (e.g. embedding) applies backpressure all the way to file reading.
+    """
+    own_executor = executor is None
+    executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    pending = collections.deque()
+    iterator = iter(items)
+    try:
+        for item in itertools.islice(iterator, max_in_flight):
+            pending.append(executor.submit(func, item))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(iterator, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+@functools.lru_cache(maxsize=None)
+def get_splitter(name: str, chunk_size: int, chunk_overlap: int) -> Callable[[str], List[str]]:
+    """Returns a text -> chunks function for a CHUNK_SPLITTER name; built once per process and settings."""
+    if name == "java":
+        return functools.partial(split_java, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if name != "recursive":
+        raise ValueError(f"Unknown splitter {name!r}, expected 'recursive' or 'java'")
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap).split_text
+
+
+def chunk_file(file_path: str, chunk_size: int = 1000, chunk_overlap: int = 100,
+               splitter: str = CHUNK_SPLITTER) -> Tuple[str, List[str]]:
+    """Reads and splits one file with the configured splitter, returning (path, chunks)."""
+    split = get_splitter(splitter, chunk_size, chunk_overlap)
+    chunks = []
+    for text in iter_text_windows(file_path, overlap=chunk_overlap):
+        chunks.extend(split(text))
+    return file_path, chunks
+
+
+def _chunk_file_batch(file_paths: List[str], chunk_size: int, chunk_overlap: int,
+                      splitter: str) -> List[Tuple[str, List[str]]]:
+    # Runs inside a worker process; one bad file must not lose the rest of the batch
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append(chunk_file(file_path, chunk_size, chunk_overlap, splitter))
+        except Exception as e:
+            print(f"Error loading file {file_path}: {e}")
+            results.append((file_path, []))
+    return results
+
+
+def iter_chunk_batches(file_paths: Iterable[str], chunk_size: int = 1000, chunk_overlap: int = 100,
+                       workers: Optional[int] = None, files_per_batch: int = 64,
+                       splitter: str = CHUNK_SPLITTER) -> Iterator[List[Tuple[str, List[str]]]]:
+    """Chunks files across a process pool, yielding [(path, chunks), ...] batches in input order.
+
+    Splitting is CPU-bound pure Python, so a process pool scales with cores where threads cannot.
+    At most two batches per worker are in flight, keeping memory bounded. With a single worker the
+    batches are chunked in this process, since a pool would only add pickling and process startup.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Fail here on an unknown splitter rather than once per file in the workers
+    get_splitter(splitter, chunk_size, chunk_overlap)
+    task = functools.partial(_chunk_file_batch, chunk_size=chunk_size, chunk_overlap=chunk_overlap, splitter=splitter)
+    if workers == 1:
+        yield from map(task, batched(file_paths, files_per_batch))
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from bounded_map(task, batched(file_paths, files_per_batch), max_in_flight=2 * workers, executor=executor)
@@ -0,0 +1,80 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+
+from langchain.schema import Document
+from langchain.vectorstores import Chroma
+
+# Persistent vector index on local disk. Each chunk is keyed by (source path, chunk hash), so a run
+# only embeds chunks that are new or changed and drops chunks whose file or content went away.
+
+
+def chunk_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, content: str) -> str:
+    """Stable vector store id for a chunk, derived from its source path and content hash."""
+    return hashlib.sha256(f"{source}\0{chunk_hash(content)}".encode("utf-8")).hexdigest()
+
+
+class VectorIndex:
+    """Chroma collection persisted under persist_directory and synced chunk-by-chunk."""
+
+    def __init__(self, persist_directory: str, embeddings, batch_size: int = 64, collection_name: str = "codebase"):
+        self.batch_size = batch_size
+        self.store = Chroma(collection_name=collection_name, persist_directory=persist_directory,
+                            embedding_function=embeddings)
+
+    def existing_ids(self, sources: Optional[Set[str]] = None) -> Set[str]:
+        """Returns ids already in the index, optionally limited to chunks of the given sources."""
+        if sources is not None:
+            if not sources:
+                return set()
+            result = self.store.get(where={"source": {"$in": sorted(sources)}}, include=["metadatas"])
+        else:
+            result = self.store.get(include=["metadatas"])
+        return set(result["ids"])
+
+    def _flush(self, batch: List[Document], ids: List[str]) -> None:
+        # One add_documents call per batch means one embedding request per batch_size chunks
+        self.store.add_documents(batch, ids=ids)
+
+    def sync(self, documents: Iterable[Document], sources: Optional[Set[str]] = None) -> Dict[str, int]:
+        """Brings the index in line with documents, embedding only chunks it does not hold yet.
+
+        With sources=None the documents are treated as the whole codebase and any other chunk is
+        removed. With a set of sources only chunks of those files are compared, which lets
+        incremental runs pass just the changed and deleted paths.
+        """
+        stale = self.existing_ids(sources)
+        seen = set()
+        stats = {"added": 0, "unchanged": 0, "removed": 0}
+        batch, batch_ids = [], []
+
+        for doc in documents:
+            source = doc.metadata["source"]
+            doc_id = chunk_id(source, doc.page_content)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if doc_id in stale:
+                stale.discard(doc_id)
+                stats["unchanged"] += 1
+                continue
+            doc.metadata["chunk_hash"] = chunk_hash(doc.page_content)
+            batch.append(doc)
+            batch_ids.append(doc_id)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, batch_ids)
+                stats["added"] += len(batch)
+                batch, batch_ids = [], []
+        if batch:
+            self._flush(batch, batch_ids)
+            stats["added"] += len(batch)
+
+        # Whatever was not seen belongs to changed chunks or deleted files
+        stale_ids = sorted(stale)
+        for i in range(0, len(stale_ids), self.batch_size):
+            self.store.delete(ids=stale_ids[i:i + self.batch_size])
+        stats["removed"] = len(stale_ids)
+        return stats